@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+"""
+    Benchmarks
+    ~~~~~~~~~~~~~~~~
+    Micro benchmarks for the hot paths of the library. Run them from the
+    repository root e.g. ``python -m benchmarks.tokenizer``
+
+    :copyright: (c) 2017 WTFPL.
+    :license: WTFPL, see LICENSE for more details.
+"""
+import time
+
+
+def measure(func, repeat: int=5) -> float:
+    """Runs function several times and returns best time in seconds
+
+    :param func: callable without arguments
+    :param repeat: int
+    :return: float
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def report(name: str, elapsed: float, count: int, unit: str='msgs'):
+    """Prints benchmark result
+
+    :param name: benchmark name
+    :param elapsed: seconds
+    :param count: number of processed items
+    :param unit: name of processed items
+    """
+    print('{:<45} {:>12.0f} {}/sec'.format(name, count / elapsed, unit),
+          flush=True)
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""
+    Entity construction benchmark
+    ~~~~~~~~~~~~~~~~
+    Construction and dump rate of SlotBasedImapEntity subclasses. Generic
+    rows run SlotBasedImapEntity._init_generic and SlotBasedImapEntity.dump,
+    which were used for every entity before __init__ and dump were
+    generated, on the same values.
+
+    :copyright: (c) 2017 WTFPL.
+    :license: WTFPL, see LICENSE for more details.
+"""
+from pymaillib.imap.entity import SlotBasedImapEntity
+from pymaillib.imap.entity.envelope import Envelope, Address
+from pymaillib.imap.entity.server import ImapNamespace
+
+from . import measure, report
+
+COUNT = 100000
+
+ENVELOPE_ARGS = (None, 'subject', None, None, None, None, None, None)
+
+
+def construct(cls, args: tuple=(), kwargs: dict=None):
+    kwargs = kwargs or {}
+    for _ in range(COUNT):
+        cls(*args, **kwargs)
+
+
+def construct_generic(cls, args: tuple=(), kwargs: dict=None):
+    kwargs = kwargs or {}
+    init = SlotBasedImapEntity._init_generic
+    for _ in range(COUNT):
+        # kwargs are consumed by _init_generic
+        init(cls.__new__(cls), args, dict(kwargs))
+
+
+def dumps(item):
+    for _ in range(COUNT):
+        item.dump()
+
+
+def dumps_generic(item):
+    dump = SlotBasedImapEntity.dump
+    for _ in range(COUNT):
+        dump(item)
+
+
+def main():
+    envelope = Envelope(*ENVELOPE_ARGS + (None, '<id@mail.com>'))
+    cases = [
+        ('Envelope positional', Envelope,
+         ENVELOPE_ARGS + (None, '<id@mail.com>'), None),
+        ('Envelope keywords', Envelope, ENVELOPE_ARGS,
+         {'in_reply_to': None, 'message_id': '<id@mail.com>'}),
+        ('ImapNamespace', ImapNamespace, (),
+         {'name': 'INBOX', 'separator': '/'}),
+    ]
+    for name, cls, args, kwargs in cases:
+        report(name + ' generic',
+               measure(lambda: construct_generic(cls, args, kwargs)),
+               COUNT, unit='objects')
+        report(name, measure(lambda: construct(cls, args, kwargs)), COUNT,
+               unit='objects')
+    # Address has own __init__ which calls the generated one
+    report('Address', measure(lambda: construct(
+        Address, ('name', None, 'mailbox', 'host.com'))), COUNT,
+           unit='objects')
+    report('Envelope.dump generic', measure(lambda: dumps_generic(envelope)),
+           COUNT, unit='objects')
+    report('Envelope.dump', measure(lambda: dumps(envelope)), COUNT,
+           unit='objects')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""
+    Date parsing benchmark
+    ~~~~~~~~~~~~~~~~
+    INTERNALDATE and ENVELOPE date parsing with dateutil, regular expression
+    parser and c++ extension parser
+
+    :copyright: (c) 2017 WTFPL.
+    :license: WTFPL, see LICENSE for more details.
+"""
+import dateutil.parser
+
+from pymaillib.imap import utils
+
+from . import measure, report
+
+DATES = 100000
+
+
+def dates(count: int) -> list:
+    res = []
+    for num in range(count):
+        day, hour = num % 28 + 1, num % 24
+        if num % 2:
+            res.append('{:2d}-Nov-2015 {:02d}:37:14 -0500'.format(day, hour))
+        else:
+            res.append('Mon, {} Feb 1994 {:02d}:52:25 +0100 (CET)'.format(
+                day, hour))
+    return res
+
+
+def main():
+    data = dates(DATES)
+    funcs = [('dateutil', dateutil.parser.parse),
+             ('regular expression', utils._parse_datetime),
+             ('parse_date_time', utils.parse_date_time),
+             ('parse_datetime', utils.parse_datetime)]
+    print('parse_date_time implementation:', utils.parse_date_time.__module__)
+    for name, func in funcs:
+        report(name, measure(lambda: [func(item) for item in data], repeat=3),
+               DATES, unit='dates')
+
+
+if __name__ == '__main__':
+    main()
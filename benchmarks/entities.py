@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""
+    Entities benchmark
+    ~~~~~~~~~~~~~~~~
+    Building Envelope and BodyStructure from tokenized FETCH response
+
+    :copyright: (c) 2017 WTFPL.
+    :license: WTFPL, see LICENSE for more details.
+"""
+from pymaillib.imap.entity.body_structure import BodyStructure
+from pymaillib.imap.entity.envelope import Envelope
+from pymaillib.imap.entity.fetch_item import build_envelope, \
+    build_body_structure
+from pymaillib.imap.parsers import tokenize_response
+from pymaillib.imap.utils import decode_list_items
+
+from . import measure, report
+
+MESSAGES = 5000
+
+RESPONSE = (
+    b'1 (ENVELOPE ("Tue, 7 Oct 2014 09:25:38 -0400" "=?UTF-8?Q?Re=3A_AW?="'
+    b' (("xx xx" NIL "xx" "xx.com")) (("xx xx" NIL "xx" "xx.com")) '
+    b'(("xx xx" NIL "xx" "xx.com")) (("a b" NIL "a" "b.com")("c d" NIL "c"'
+    b' "d.com")) NIL NIL NIL "<id@mail.com>") BODYSTRUCTURE ((("text" '
+    b'"plain" ("charset" "utf-8" "format" "flowed") NIL NIL '
+    b'"quoted-printable" 555 19 NIL NIL NIL NIL)("text" "html" ("charset" '
+    b'"utf-8") NIL NIL "quoted-printable" 1797 53 NIL NIL NIL NIL) '
+    b'"alternative" ("boundary" "---080109") NIL NIL NIL)("application" '
+    b'"pdf" ("name" "=?UTF-8?Q?enjoy_-_=D0=B4?=") NIL NIL "base64" 38366 '
+    b'NIL ("attachment" ("filename" "a.pdf")) NIL NIL) "mixed" ("boundary" '
+    b'"---000605") NIL NIL NIL))'
+)
+
+
+def python_build(envelope, body_structure):
+    for _ in range(MESSAGES):
+        Envelope.from_list(decode_list_items(envelope))
+        BodyStructure.build(decode_list_items(body_structure))
+
+
+def fast_build(envelope, body_structure):
+    for _ in range(MESSAGES):
+        build_envelope(envelope)
+        build_body_structure(body_structure)
+
+
+def main():
+    (_, items), = tokenize_response(RESPONSE, [])
+    envelope, body_structure = items[1], items[3]
+    print('Envelope builder:', build_envelope.__module__)
+    report('python entities', measure(lambda: python_build(envelope,
+                                                           body_structure)),
+           MESSAGES)
+    report('build_envelope, build_body_structure',
+           measure(lambda: fast_build(envelope, body_structure)), MESSAGES)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""
+    Fetch table benchmark
+    ~~~~~~~~~~~~~~~~
+    Memory and time to keep UID, FLAGS, RFC822.SIZE and INTERNALDATE of a big
+    folder as ImapFetchedItem list and as FetchResultTable
+
+    :copyright: (c) 2017 WTFPL.
+    :license: WTFPL, see LICENSE for more details.
+"""
+import time
+import tracemalloc
+
+from pymaillib.imap.entity.email_message import ImapFetchedItem
+from pymaillib.imap.entity.fetch_table import FetchResultTable
+from pymaillib.imap.parsers import tokenize_atom_response, ResponseTokenizer
+from pymaillib.imap.query.builders.fetch import FetchQueryBuilder
+
+from . import report
+
+MESSAGES = 300000
+
+QUERY = FetchQueryBuilder(uids='1:*').fetch_flags().fetch_internal_date()\
+    .fetch_rfc822_size()
+
+
+def lines(count: int):
+    flags = [b'', b'\\Seen', b'\\Seen \\Answered', b'\\Seen $Label1']
+    for num in range(1, count + 1):
+        yield (b'%d (UID %d RFC822.SIZE %d FLAGS (%s) INTERNALDATE '
+               b'"%02d-Nov-%d 08:37:14 -0500")' % (
+                   num, num, num * 7 % 100000, flags[num % 4], num % 28 + 1,
+                   2000 + num % 17))
+
+
+def fetched_items():
+    decoder = QUERY.decoder()
+    return [ImapFetchedItem(tokenize_atom_response(line, [], False, decoder))
+            for line in lines(MESSAGES)]
+
+
+def fetch_table():
+    table = FetchResultTable.for_atoms(QUERY.response_items())
+    for line in lines(MESSAGES):
+        parser = ResponseTokenizer(line, [])
+        table.append(parser.__next__(), parser.__next__())
+    return table
+
+
+def main():
+    for name, func in [('ImapFetchedItem list', fetched_items),
+                       ('FetchResultTable', fetch_table)]:
+        tracemalloc.start()
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        report(name, elapsed, MESSAGES)
+        print('{:<45} {:>12.1f} MB'.format(name + ' memory',
+                                           size / 1024 / 1024))
+        del result
+
+
+if __name__ == '__main__':
+    main()
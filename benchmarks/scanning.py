@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""
+    Scanning benchmark
+    ~~~~~~~~~~~~~~~~
+    Tokenizer speed on responses dominated by delimiter scanning: long
+    quoted subjects, long header literals and deeply nested BODYSTRUCTURE
+
+    :copyright: (c) 2017 WTFPL.
+    :license: WTFPL, see LICENSE for more details.
+"""
+from pymaillib.imap.parsers import ResponseTokenizer, tokenize_response
+from pymaillib.imap.utils import build_imap_response_line, \
+    build_imap_response
+
+from . import measure, report
+
+MESSAGES = 2000
+
+
+def long_subjects(count: int) -> list:
+    subject = b'Re: ' + b'very long subject \\"quoted\\" ' * 100
+    return [b'%d (UID %d ENVELOPE ("Wed, 11 Nov 2015 08:37:14 -0500" "%s" '
+            b'NIL NIL NIL NIL NIL NIL NIL NIL))' % (num, num, subject)
+            for num in range(1, count + 1)]
+
+
+def long_literals(count: int) -> list:
+    header = b''.join(b'X-Header-%d: %s\r\n' % (num, b'v' * 70)
+                      for num in range(100))
+    res = []
+    for num in range(1, count + 1):
+        res.append((b'%d (UID %d BODY[HEADER] {%d}' % (num, num, len(header)),
+                    header))
+        res.append(b')')
+    return res
+
+
+def nested_body_structure(count: int, depth: int=30) -> list:
+    leaf = b'("text" "plain" ("charset" "utf-8") NIL NIL "7bit" 10 1)'
+    part = leaf
+    for _ in range(depth):
+        part = b'(%s %s "mixed")' % (leaf, part)
+    return [b'%d (UID %d BODYSTRUCTURE %s)' % (num, num, part)
+            for num in range(1, count + 1)]
+
+
+def per_line(data):
+    for line, literals in build_imap_response_line(data):
+        parser = ResponseTokenizer(line, literals)
+        parser.__next__(), parser.__next__()
+
+
+def batch(data):
+    tokenize_response(*build_imap_response(data))
+
+
+def main():
+    print('Parser implementation:', ResponseTokenizer.__module__)
+    for name, data in [('long subjects', long_subjects(MESSAGES)),
+                       ('long header literals', long_literals(MESSAGES)),
+                       ('nested BODYSTRUCTURE',
+                        nested_body_structure(MESSAGES))]:
+        report('{} per line'.format(name),
+               measure(lambda: per_line(data)), MESSAGES)
+        report('{} batch'.format(name), measure(lambda: batch(data)),
+               MESSAGES)
+
+
+if __name__ == '__main__':
+    main()
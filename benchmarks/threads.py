@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""
+    Threaded tokenizer benchmark
+    ~~~~~~~~~~~~~~~~
+    Parses big FETCH responses from several threads at once. The c++
+    tokenizer scans responses without holding the GIL so throughput should
+    grow with number of threads (up to number of CPU cores).
+
+    :copyright: (c) 2017 WTFPL.
+    :license: WTFPL, see LICENSE for more details.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from pymaillib.imap.parsers import ResponseTokenizer, tokenize_response
+from pymaillib.imap.utils import build_imap_response
+
+from . import measure, report
+
+MESSAGES = 2000
+RESPONSES = 16
+
+
+def big_response(count: int) -> list:
+    """imaplib like response for FETCH (UID FLAGS BODY[HEADER]) with long
+    quoted values and header literals
+
+    :param count: number of messages
+    :return: list
+    """
+    header = b'Subject: test\r\n' + b'X-Spam: ' + b'a' * 2000 + b'\r\n\r\n'
+    res = []
+    for num in range(1, count + 1):
+        res.append((b'%d (UID %d FLAGS (\\Seen) X-GM-LABELS ("%s") '
+                    b'BODY[HEADER] {%d}' % (num, num, b'b' * 2000,
+                                            len(header)), header))
+        res.append(b')')
+    return res
+
+
+def parse_all(executor: ThreadPoolExecutor, line: bytes, literals: list):
+    list(executor.map(lambda _: tokenize_response(line, literals),
+                      range(RESPONSES)))
+
+
+def main():
+    line, literals = build_imap_response(big_response(MESSAGES))
+    print('Parser implementation:', ResponseTokenizer.__module__)
+    print('CPU cores:', os.cpu_count())
+    for threads in (1, 2, 4, 8):
+        with ThreadPoolExecutor(threads) as executor:
+            elapsed = measure(lambda: parse_all(executor, line, literals))
+        report('{} threads'.format(threads), elapsed, MESSAGES * RESPONSES)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""
+    Tokenizer benchmark
+    ~~~~~~~~~~~~~~~~
+    Compares per line parsing of FETCH response with batch parsing
+
+    :copyright: (c) 2017 WTFPL.
+    :license: WTFPL, see LICENSE for more details.
+"""
+from pymaillib.imap import _parsers
+from pymaillib.imap.entity.email_message import ImapFetchedItem
+from pymaillib.imap.parsers import ResponseTokenizer, tokenize_response, \
+    tokenize_atom_response, tokenize_fetch_response
+from pymaillib.imap.query.builders.fetch import FetchQueryBuilder
+from pymaillib.imap.utils import build_imap_response_line, \
+    build_imap_response
+
+from . import measure, report
+
+MESSAGES = 20000
+
+
+def small_items_response(count: int) -> list:
+    """imaplib like response for FETCH (UID FLAGS RFC822.SIZE)
+
+    :param count: number of messages
+    :return: list
+    """
+    return [b'%d (UID %d FLAGS (\\Seen $Forwarded) RFC822.SIZE %d)'
+            % (num, num + 1000, num * 7) for num in range(1, count + 1)]
+
+
+def per_line(data):
+    for line, literals in build_imap_response_line(data):
+        parser = ResponseTokenizer(line, literals)
+        parser.__next__(), parser.__next__()
+
+
+def batch(data):
+    tokenize_response(*build_imap_response(data))
+
+
+def python_per_line(data):
+    for line, literals in build_imap_response_line(data):
+        parser = _parsers.ResponseTokenizer(line, literals)
+        parser.__next__(), parser.__next__()
+
+
+def python_batch(data):
+    _parsers.tokenize_response(*build_imap_response(data))
+
+
+def per_line_items(data):
+    for line, literals in build_imap_response_line(data):
+        ImapFetchedItem(tokenize_atom_response(line, literals))
+
+
+def batch_items(data):
+    for atoms in tokenize_fetch_response(data):
+        ImapFetchedItem(atoms)
+
+
+def batch_items_decoder(data):
+    decoder = FetchQueryBuilder.fast(1).decoder()
+    for atoms in tokenize_fetch_response(data, decoder=decoder):
+        ImapFetchedItem(atoms)
+
+
+def main():
+    data = small_items_response(MESSAGES)
+    print('Parser implementation:', ResponseTokenizer.__module__)
+    for name, func in [('tokens per line', per_line),
+                       ('tokens batch', batch),
+                       ('pure python tokens per line', python_per_line),
+                       ('pure python tokens batch', python_batch),
+                       ('ImapFetchedItem per line', per_line_items),
+                       ('ImapFetchedItem batch', batch_items),
+                       ('ImapFetchedItem batch with decoder',
+                        batch_items_decoder)]:
+        report(name, measure(lambda: func(data)), MESSAGES)
+
+
+if __name__ == '__main__':
+    main()
@@ -2,12 +2,10 @@
 """
 
 """
-from collections import defaultdict
 from pprint import pprint
-from typing import List
 
 from pymaillib.imap.client import ImapClient
-from pymaillib.imap.entity.email_message import ImapFetchedItem
+from pymaillib.imap.entity.fetch_table import FetchResultTable
 from pymaillib.imap.entity.folder import ImapFolder
 from pymaillib.imap.query.builders.fetch import FetchQueryBuilder
 from pymaillib.mailbox import UserMailbox
@@ -21,22 +19,22 @@ CONFIG = {
 
 
 def get_folder_messages(folder: ImapFolder, imap: ImapClient) -> \
-        List[ImapFetchedItem]:
-    """
+        FetchResultTable:
+    """UID, INTERNALDATE and RFC822.SIZE of all messages in the folder. Few
+    bytes per message are used so it works for huge folders.
 
     :param folder:
     :param imap:
     :return:
     """
-    if not folder.total:
-        raise StopIteration
-    data = range(1, folder.total)
-    n = 200  # by chunks
-
-    for items in [data[i:i + n] for i in range(1, len(data), n)]:
-        fp = FetchQueryBuilder(list(items)).fetch_envelope().fetch_uid()
-        for email in imap.fetch(fp):
-            yield email.uid, email.envelope.date
+    table = None
+    n = 5000  # by chunks
+    for start in range(1, folder.total + 1, n):
+        end = min(start + n - 1, folder.total)
+        fp = FetchQueryBuilder('{}:{}'.format(start, end)).fetch_uid()\
+            .fetch_internal_date().fetch_rfc822_size()
+        table = imap.fetch_table(fp, table)
+    return table
 
 
 mailbox = UserMailbox('HOST', 'USER', Config(CONFIG))
@@ -45,9 +43,11 @@ with mailbox.imap() as imap_conn:
     folder = imap_conn.folder_by_name('Inbox')
     imap_conn.select_folder(folder)
     imap_conn.update_folder_info(folder)
-    res = defaultdict(lambda: defaultdict(list))
-    for uid, date in get_folder_messages(folder, imap_conn):
-        if not date:
-            continue
-        res[date.year][date.month].append(uid)
-    pprint(res, width=150, depth=2, compact=True)
+    messages = get_folder_messages(folder, imap_conn)
+    if messages:
+        print('Memory used by the table', messages.nbytes)
+        by_month = messages.group_by_date(period='month')
+        pprint({month: len(uids) for month, uids in by_month.items()},
+               width=150, compact=True)
+        print('Bytes per year')
+        pprint(messages.sum('size', messages.group_by_date(period='year')))
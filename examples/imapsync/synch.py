@@ -8,9 +8,11 @@ import warnings
 from pprint import pprint
 from typing import List, Tuple, Dict
 
-from pymaillib.imap.entity.email_message import ImapFetchedItem, EmailMessage
+from pymaillib.imap.entity.email_message import ImapFetchedItem, EmailMessage, \
+    RawEmailMessage
 from pymaillib.imap.query.builders.fetch import FetchQueryBuilder
 from pymaillib.imap.client import ImapClient, ImapFolder
+from pymaillib.imap.commands.pipeline import PipelineStats
 from pymaillib.imap.entity.server import ImapNamespace, Namespaces
 from pymaillib.mailbox import UserMailbox
 from pymaillib.settings import Config
@@ -159,32 +161,41 @@ def fill_mailbox(source_mailbox, dest_mailbox, folder:ImapFolder):
     print('New messages', msgs_diff)
     if not msgs_diff:
         return count
+    queries = []
+    for msg_id in msgs_diff:
+        msg = from_messages.get(msg_id)
+        if not msg:
+            warnings.warn('Oops not found {}'.format(msg_id), RuntimeWarning)
+            continue
+        queries.append(FetchQueryBuilder(uids=msg.uid).fetch_rfc822()
+                       .fetch_flags())
+
+    stats = PipelineStats()
     with source_mailbox.imap() as from_imap:
         with dest_mailbox.imap(True) as dest_imap:
             dest_imap.select_folder(folder)
-            for msg_id in msgs_diff:
-                msg = from_messages.get(msg_id)
-                if not msg:
-                    warnings.warn('Oops not found {}'.format(msg_id),
-                                  RuntimeWarning)
-                    continue
-
-                fp = FetchQueryBuilder(uids=msg.uid).fetch_rfc822()\
-                    .fetch_flags()
-                msg = list(from_imap.fetch(fp))[-1]
-                if not msg:
-                    warnings.warn('Oops not found {}'.format(msg_id),
+            # fetches are sent without waiting for each response, copy
+            # original octets, message is parsed only if it has no
+            # X-Scalix-Class header
+            for query, items in from_imap.pipeline(queries, raw=True,
+                                                   stats=stats):
+                if not items:
+                    warnings.warn('Oops not found {}'.format(query.uids),
                                   RuntimeWarning)
                     continue
+                msg = items[-1]
 
                 rfc822 = msg.rfc822
                 if not rfc822['X-Scalix-Class']:
-                    rfc822.add_header('X-Scalix-Class',
-                                      guess_email_class(rfc822))
+                    header = 'X-Scalix-Class: {}\r\n'.format(
+                        guess_email_class(rfc822.message))
+                    rfc822 = RawEmailMessage(header.encode() +
+                                             rfc822.as_bytes())
                 print('Migrate message UID', msg.uid)
                 dest_imap.append_message(rfc822, folder, msg.flags)
                 #dest_imap.check()
                 count += 1
+    print('Fetched in', stats)
     return count
 
 
@@ -59,7 +59,9 @@ def get_user_mail_box(auth_data):
             imap_conf = Config().from_config_file('./pymail.ini')
             mailbox = UserMailbox(auth_data.username,
                                   auth_data.password, imap_conf)
-            mailbox.imap()
+            # checks credentials, connection is kept in the pool
+            with mailbox.connection():
+                pass
         except ImapClientException as _:
             traceback.print_exc()
             raise Forbidden()
@@ -103,8 +105,8 @@ class MailboxController(Controller):
             .fetch_envelope() \
             .fetch_flags() \
             .fetch_body_structure()
-        with mailbox.imap() as client:
-            for msg in client.fetch(imap_folder, query):
+        with mailbox.connection(imap_folder) as client:
+            for msg in client.fetch(query):
                 msg['folder'] = imap_folder
                 yield msg
 
@@ -123,8 +125,8 @@ class MailboxController(Controller):
         else:
             query.fetch_rfc822()
 
-        with mailbox.imap() as client:
-            email = list(client.fetch(imap_folder, query))[-1]
+        with mailbox.connection(imap_folder) as client:
+            email = list(client.fetch(query))[-1]
             if not email:
                 raise NotFound('Email with provided uid does not exists'
                                ' anymore')
@@ -9,25 +9,14 @@
 
 from __future__ import generator_stop
 
+import re
+from collections import deque
 from typing import AnyStr
 
 from .utils import byte2int
 from .exceptions import ImapResponseParserError
 
 
-def parse_value(val: bytes):
-    """Parse value from IMAP response
-
-    :param val:
-    :return:
-    """
-    if val in (b'NIL', b'nil') or not val:
-        return None
-    if val.isdigit():
-        return int(val)
-    return val
-
-
 def literal_size(line: bytes) -> int:
     """Get length of transferred value
 
@@ -82,134 +71,156 @@ def check_literal(value: bytes, size: int):
     return value
 
 
-class ResponseTokenizer(object):
-    """Tokenize string into simple lexemes
+_WHITESPACES = re.compile(rb'[ \t]*')
+
+# atom ends with whitespace or ')' but text in square brackets is part of
+# the atom e.g. BODY[HEADER.FIELDS (SUBJECT)]<0>
+_ATOM = re.compile(rb'(?:[^ \t)\[]+|\[[^\]]*\]?)+')
 
+_QUOTED = {
+    byte2int(b'"'): re.compile(rb'[^"\\]*(?:\\.[^"\\]*)*', re.DOTALL),
+    byte2int(b"'"): re.compile(rb"[^'\\]*(?:\\.[^'\\]*)*", re.DOTALL),
+}
+
+_LIST_START = byte2int(b'(')
+_LIST_END = byte2int(b')')
+_LITERAL_START = byte2int(b'{')
+
+_END_OF_LIST = object()
+
+
+def parse_atom(val: bytes):
+    """Parse atom value from IMAP response
+
+    :param val: bytes
+    :return: None, int or bytes
     """
+    if len(val) == 3 and val.lower() == b'nil':
+        return None
+    if val.isdigit():
+        return int(val)
+    return val
+
+
+class ResponseTokenizer(object):
+    """Tokenize string into simple lexemes. Quoted strings and literals are
+    returned as is, atoms are converted to None(NIL), int or bytes.
 
-    __escaping_char = byte2int(b'\\')
-    __quotes = {byte2int(b'\''), byte2int(b'"')}
-    __list_start = byte2int(b'(')
-    __list_end = byte2int(b')')
-    __space = byte2int(b' ')
-    __square_bracket_start = byte2int(b'[')
-    __square_bracket_end = byte2int(b']')
+    """
 
-    __slots__ = ('__line', '__literals', '__len',
-                 '__pos', '__cur_char', 'is_literal')
+    __slots__ = ('__line', '__literals', '__len', '__pos')
 
     def __init__(self, line, literals):
         self.parse_line(line, literals)
 
     def parse_line(self, line, literals):
         self.__line = line
-        self.__literals = literals
+        self.__literals = deque(literals)
         self.__len = len(line)
         self.__pos = 0
-        self.__cur_char = b''
-
-    def __get_literal(self, literal_str):
-        return check_literal(self.__literals.pop(0), literal_size(literal_str))
 
     def __iter__(self):
         return self
 
     def __next__(self):
-
-        if self.__pos >= self.__len:
-            assert not self.__literals, 'Data left in literals' \
-                                        ' {}'.format(self.__repr__())
-
+        token = self.next_token()
+        if token is _END_OF_LIST:
             raise StopIteration
+        return token
 
-        self.__cur_char = self.__line[self.__pos]
-
-        if self.__cur_char == self.__space:
-            self.__pos += 1
-            return self.__next__()
+    def next_token(self):
+        """Reads next value. Lists are collected using explicit stack of
+        not closed lists.
 
-        if self.__cur_char in self.__quotes:
-            self.__pos += 1
-            return parse_value(self._read_until([self.__cur_char]))
-        elif self.__cur_char == self.__list_start:
-            self.__pos += 1
-            return [i for i in self.__parse_list()]
+        :return: value or _END_OF_LIST
+        """
+        line = self.__line
+        stack = []
+        while True:
+            pos = _WHITESPACES.match(line, self.__pos).end()
+            if pos >= self.__len:
+                self.__pos = pos
+                if stack:
+                    # not closed list
+                    return stack[0]
+                assert not self.__literals, 'Data left in literals' \
+                                            ' {}'.format(self.__repr__())
+                return _END_OF_LIST
+
+            char = line[pos]
+            if char == _LIST_START:
+                self.__pos = pos + 1
+                value = []
+                if stack:
+                    stack[-1].append(value)
+                stack.append(value)
+                continue
 
-        return parse_value(self.__read_util_space())
+            if char == _LIST_END:
+                self.__pos = pos + 1
+                if not stack:
+                    return _END_OF_LIST
+                value = stack.pop()
+                if not stack:
+                    return value
+                continue
 
-    def __parse_list(self):
-        """Collects all next tokens into list
+            if char in _QUOTED:
+                value = self.__read_quoted(pos + 1, char)
+            elif char == _LITERAL_START:
+                value = self.__read_literal(pos + 1)
+            else:
+                match = _ATOM.match(line, pos)
+                self.__pos = match.end()
+                value = parse_atom(match.group())
 
-        :return: generator
-        """
-        if self.__line[self.__pos:self.__pos+1] == b')':
-            self.__pos += 1
-            return
-        for item in self:
-            yield item
-            if self.__cur_char == self.__list_end:
-                self.__cur_char = b''
-                break
-            if self.__line[self.__pos:self.__pos+1] == b')':
-                self.__pos += 1
-                break
-        else:
-            raise ImapResponseParserError(
-                'Could find closing ) in line '.format(self.__line)
-            )
+            if not stack:
+                return value
+            stack[-1].append(value)
 
-    def __read_util_space(self) -> bytes:
-        """Reads until next whitespace occurs
+    def __read_quoted(self, start: int, quote: int) -> bytes:
+        """Reads quoted string escaped chars are kept as is
 
+        :param start: position after opening quote
+        :param quote: quote char
         :return: bytes
         """
-        return self._read_until(
-            (self.__list_end, self.__space),
-            self.__square_bracket_start,
-            self.__square_bracket_end
-        )
+        end = _QUOTED[quote].match(self.__line, start).end()
+        self.__pos = end + 1
+        return self.__line[start:end]
 
-    def _read_until(self, looking_for, special_start=False,
-                    special_end=False) -> bytes:
-        """Reads until first specified char occurs
+    def __read_literal(self, start: int):
+        """Gets literal value for {size}
 
-        :param looking_for: iterable
-        :return: bytes
+        :param start: position after '{'
+        :return: literal value
         """
-        line = enumerate(self.__line[self.__pos:])
-        special_count = 0
-        for index, self.__cur_char in line:
-            if self.__cur_char == self.__escaping_char:
-                line.__next__()
-                continue
-            if self.__cur_char == special_start:
-                special_count += 1
-            if self.__cur_char == special_end:
-                special_count -= 1
-            if self.__cur_char not in looking_for or special_count > 0:
-                continue
-            return self.__get_value(self.__pos, self.__pos + index)
-        else:
-            if self.__space in looking_for:
-                return self.__get_value(self.__pos, self.__len)
-
+        end = self.__line.find(b'}', start)
+        if end < 0:
             raise ImapResponseParserError(
-                'Could not find {} in line {}'.format(
-                    list(map(chr, looking_for)),
-                    self.__line
-                )
+                'Could not find }} in line {}'.format(self.__line)
             )
-
-    def __get_value(self, start, end):
-        value = self.__line[start:end]
         self.__pos = end + 1
-        if value[-1:] == b'}':
-            return self.__get_literal(value)
-        return value
+        if not self.__literals:
+            raise ImapResponseParserError('Literal list is empty')
+        return check_literal(self.__literals.popleft(),
+                             literal_size(self.__line[start:end]))
 
     def __repr__(self):
         return 'Line {}. Literal values {}'.format(self.__line,
-                                                   self.__literals)
+                                                   list(self.__literals))
+
+
+def tokenize_response(line: bytes, literals: list) -> list:
+    """Parses whole FETCH response (all messages joined in one line) in one
+    call.
+
+    :param line: bytes
+    :param literals: list with literal values for all messages
+    :return: list of tuples sequence number, list of atoms
+    """
+    tokens = ResponseTokenizer(line, literals)
+    return list(zip(tokens, tokens))
 
 
 __ATOM_SPECIALS = {byte2int(b'['), byte2int(b'<')}
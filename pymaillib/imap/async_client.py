@@ -0,0 +1,641 @@
+# -*- coding: utf-8 -*-
+"""
+    Imap4 asyncio Client
+    ~~~~~~~~~~~~~~~~
+    IMAP client for asyncio event loop. Responses are parsed by
+    ImapFeedParser as they arrive, queries are built by the same query
+    builders and results are the same entities as ImapClient returns, so
+    many mailbox sessions can be served by one thread.
+
+    :copyright: (c) 2017 WTFPL.
+    :license: WTFPL, see LICENSE for more details.
+"""
+import asyncio
+import imaplib
+import re
+import ssl
+import time
+from collections import defaultdict
+
+from typing import Any, List, Tuple
+
+from . import __version__, __description__
+from .commands import ImapBaseCommand
+from .commands.fetch import ImapFetchCommand
+from .commands.folder import ImapSelectFolderCommand, \
+    ImapFolderDetailsCommand, ImapCreateFolderCommand
+from .commands.folders import ImapFolderListCommand
+from .commands.id import ImapIDCommand
+from .commands.login import ImapLoginCommand
+from .commands.message import AppendMessageCommand
+from .commands.search import ImapSearchCommand
+from .commands.store import ImapStoreCommand
+from .constants import IMAP4REV1_CAPABILITY_KEYS, IMAP4_COMMANDS
+from .entity.email_message import ImapFetchedItem, LazyImapFetchedItem, \
+    RawImapFetchedItem, LazyRawImapFetchedItem
+from .entity.folder import ImapFolder
+from .entity.server import from_id_command
+from .exceptions.base import ImapClientAbort, ImapInvalidArgument, \
+    ImapUnsupportedCommand, ImapAuthorizationException, ImapClientError
+from .exceptions.rfc5530 import ImapTryCreate
+from .feed_parser import ImapFeedParser, ImapResponse, CRLF, UNTAGGED, \
+    CONTINUATION
+from .flags import FlagRegistry
+from .parsers import FetchDecoder
+from .query.builders.fetch import FetchQueryBuilder
+from .query.builders.search import SearchQueryBuilder
+from .query.builders.store import StoreQueryBuilder
+from ..user import UserCredentials
+
+_RESPONSE_CODE = re.compile(rb'\[(?P<type>[A-Z-]+)( (?P<data>.*))?\]')
+# Python < 3.7 has no get_running_loop, get_event_loop returns the running
+# loop inside coroutines there
+_get_running_loop = getattr(asyncio, 'get_running_loop',
+                            asyncio.get_event_loop)
+
+
+def _to_bytes(value: Any) -> bytes:
+    """Command argument as bytes
+
+    :param value: str, bytes or int
+    :return: bytes
+    """
+    if isinstance(value, bytes):
+        return value
+    return str(value).encode()
+
+
+def _quote(value: str) -> str:
+    """Quoted string argument e.g. user name for LOGIN
+
+    :param value: str
+    :return: str
+    """
+    return '"{}"'.format(value.replace('\\', '\\\\').replace('"', '\\"'))
+
+
+class ImapProtocol(asyncio.Protocol):
+    """asyncio protocol which sends tagged commands one by one and collects
+    untagged responses of the running command.
+
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        """
+
+        :param loop: event loop
+        """
+        self.parser = ImapFeedParser()
+        self.__loop = loop
+        self.__transport = None
+        self.__lock = asyncio.Lock()
+        self.__tag_prefix = imaplib.Int2AP(int(time.time() * 1000) % 65536)
+        self.__tag_num = 0
+        self.__greeting = loop.create_future()
+        self.__continuation = None
+        self.__waiter = None
+        self.__tag = None
+        self.__untagged = []
+        self.__closed = None
+
+    @property
+    def closed(self) -> bool:
+        """Connection is lost
+
+        :return: bool
+        """
+        return self.__closed is not None
+
+    def connection_made(self, transport: asyncio.Transport):
+        self.__transport = transport
+
+    def connection_lost(self, exc: Exception):
+        self.__closed = ImapClientAbort('socket error: {}'.format(
+            exc or 'connection closed'))
+        for future in (self.__greeting, self.__continuation, self.__waiter):
+            if future is not None and not future.done():
+                future.set_exception(self.__closed)
+
+    def data_received(self, data: bytes):
+        try:
+            responses = self.parser.feed(data)
+        except Exception as excp:
+            self.__fail(excp)
+            return
+        for response in responses:
+            self.__dispatch(response)
+
+    def __dispatch(self, response: ImapResponse):
+        """Routes parsed response
+
+        :param response: ImapResponse
+        """
+        if not self.__greeting.done():
+            if response.typ == 'BYE':
+                self.__greeting.set_exception(ImapClientAbort(response.data))
+            else:
+                self.__greeting.set_result(response)
+            return
+        if response.tag == UNTAGGED:
+            self.__untagged.append(response)
+        elif response.tag == CONTINUATION:
+            if self.__continuation and not self.__continuation.done():
+                self.__continuation.set_result(response)
+        elif response.tag == self.__tag:
+            if self.__continuation and not self.__continuation.done():
+                # command was rejected before literal was sent
+                self.__continuation.set_result(None)
+            self.__waiter.set_result(response)
+        else:
+            self.__fail(ImapClientAbort(
+                'unexpected tagged response: {}'.format(response)))
+
+    def __fail(self, excp: Exception):
+        """Breaks connection because of protocol error
+
+        :param excp: Exception for the waiting command
+        """
+        if self.__waiter is not None and not self.__waiter.done():
+            self.__waiter.set_exception(excp)
+        self.__transport.close()
+
+    async def greeting(self) -> ImapResponse:
+        """Waits for server greeting
+
+        :return: ImapResponse
+        """
+        return await self.__greeting
+
+    async def command(self, name: str, *args, literal: bytes=None,
+                      decoder: FetchDecoder=None, lazy: bool=False,
+                      item_class: type=None) -> Tuple[ImapResponse, List]:
+        """Sends command and waits for the tagged response. Commands of one
+        connection are sent one by one. FETCH options are applied to the
+        parser only while the command runs, so concurrent commands of one
+        connection do not change each other's results.
+
+        :param name: e.g. FETCH or UID FETCH
+        :param args: arguments, str or bytes are sent as is
+        :param literal: octets sent as literal after the arguments e.g. message
+            for APPEND
+        :param decoder: FetchDecoder plan for FETCH responses
+        :param lazy: build LazyImapFetchedItem for FETCH responses
+        :param item_class: ImapFetchedItem subclass of FETCH responses
+        :return: tuple tagged ImapResponse, list of untagged ImapResponse
+        """
+        async with self.__lock:
+            if self.__closed is not None:
+                raise self.__closed
+            self.parser.set_fetch_options(decoder, lazy, item_class)
+            self.__tag_num += 1
+            self.__tag = self.__tag_prefix + str(self.__tag_num).encode()
+            self.__untagged = []
+            self.__waiter = self.__loop.create_future()
+            line = b' '.join([self.__tag, name.encode()] +
+                             [_to_bytes(arg) for arg in args
+                              if arg is not None])
+            if literal is None:
+                self.__transport.write(line + CRLF)
+            else:
+                self.__continuation = self.__loop.create_future()
+                self.__transport.write(line + b' {%d}' % len(literal) + CRLF)
+                try:
+                    if await self.__continuation is not None:
+                        self.__transport.write(literal + CRLF)
+                finally:
+                    self.__continuation = None
+            try:
+                return await self.__waiter, self.__untagged
+            finally:
+                self.__tag = self.__waiter = None
+                self.__untagged = []
+                self.parser.set_fetch_options()
+
+    def close(self):
+        """Closes transport
+
+        """
+        if self.__transport is not None:
+            self.__transport.close()
+
+
+def untagged_responses(responses: List[ImapResponse]) -> dict:
+    """Groups untagged responses by type the same way as imaplib does. Data
+    of response codes (e.g. [UIDVALIDITY 1]) of OK, NO and BAD responses is
+    stored by code name.
+
+    :param responses: list of ImapResponse
+    :return: dict with lists
+    """
+    result = defaultdict(list)
+    for response in responses:
+        result[response.typ].append(response.data)
+        if response.typ in ('OK', 'NO', 'BAD'):
+            match = _RESPONSE_CODE.match(response.data)
+            if match:
+                result[match.group('type').decode()].append(
+                    match.group('data'))
+    return result
+
+
+class AsyncImapClient(object):
+    """IMAP client for asyncio with the same methods as ImapClient returning
+    the same entities. Methods are coroutines.
+
+    ::
+        >>> async with AsyncImapClient(config['imap'], credentials) as imap:
+        ...     await imap.select_folder(folder)
+        ...     items = await imap.fetch(FetchQueryBuilder('1:*')
+        ...                              .fetch_envelope())
+
+    """
+
+    def __init__(self, settings: dict, auth_data: UserCredentials,
+                 loop: asyncio.AbstractEventLoop=None):
+        """Creates client. Connection is opened by :meth:connect or `async
+        with`.
+
+        :param settings: imap section of the Config
+        :param auth_data: UserCredentials
+        :param loop: event loop, current one if it's None
+        """
+        self.__settings = settings
+        self.__auth_data = auth_data
+        self.__loop = loop
+        self.__protocol = None
+        self.__selected_folder = None
+        self.capabilities = set()
+        self.server_info = None
+        self.last_untagged_responses = {}
+        self.__last_responses = []
+        self.__last_tagged = b''
+        self.flag_registry = FlagRegistry()
+
+    async def __aenter__(self) -> 'AsyncImapClient':
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.logout()
+
+    def __repr__(self):
+        return 'Async imap connection host: {} port: {} secure: {}.'.format(
+            self.host, self.port, self.secure)
+
+    @property
+    def host(self) -> str:
+        """Host of the IMAP server
+
+        :return: str
+        """
+        return self.__settings.get('host')
+
+    @property
+    def port(self) -> int:
+        """Port of the IMAP server, default depends on :attr:secure
+
+        :return: int
+        """
+        port = self.__settings.get('port')
+        if not port:
+            port = imaplib.IMAP4_SSL_PORT if self.secure \
+                else imaplib.IMAP4_PORT
+        return int(port)
+
+    @property
+    def secure(self) -> bool:
+        """Use SSL connection
+
+        :return: bool
+        """
+        return self.__settings.get('secure')
+
+    @property
+    def timeout(self) -> float:
+        """Connection timeout
+
+        :return: float
+        """
+        return float(self.__settings.get('timeout', 60))
+
+    @property
+    def opened(self) -> bool:
+        """Connection is established and alive
+
+        :return: bool
+        """
+        return self.__protocol is not None and not self.__protocol.closed
+
+    @property
+    def selected_folder(self) -> str:
+        """IMAP name of the folder selected by :meth:select_folder or None
+
+        :return: str
+        """
+        return self.__selected_folder
+
+    def supports(self, command_name: str) -> bool:
+        """Checks if IMAP server supports the command
+
+        :param command_name: IMAP command name ignore letter case
+        :return: bool
+        """
+        return command_name.upper() in self.capabilities
+
+    def _ssl_context(self) -> ssl.SSLContext:
+        """SSL context for secure connection
+
+        :return: ssl.SSLContext
+        """
+        context = ssl.create_default_context()
+        certfile = self.__settings.get('certfile')
+        if certfile:
+            context.load_cert_chain(certfile, self.__settings.get('keyfile'))
+        return context
+
+    async def connect(self) -> 'AsyncImapClient':
+        """Connects to the server, authorizes user and gets server info
+
+        Raises:
+            ImapInvalidArgument - if host is empty or stream:// command
+            ImapAuthorizationException - if credentials are wrong
+            ImapReferralsException - if server sent other server url
+
+        :return: self
+        """
+        if not self.host or self.host.startswith('stream://'):
+            raise ImapInvalidArgument('host', self.host)
+        loop = self.__loop or _get_running_loop()
+        _, self.__protocol = await asyncio.wait_for(loop.create_connection(
+            lambda: ImapProtocol(loop), self.host, self.port,
+            ssl=self._ssl_context() if self.secure else None
+        ), self.timeout)
+        try:
+            greeting = await self.__protocol.greeting()
+            self.__update_capabilities(untagged_responses([greeting]))
+            if not self.capabilities:
+                await self._command(ImapBaseCommand(), 'CAPABILITY')
+                self.__update_capabilities(self.last_untagged_responses)
+            await self.login()
+            if self.supports('ID'):
+                await self.__server_id()
+        except BaseException:
+            self.close()
+            raise
+        return self
+
+    async def login(self):
+        """Executes LOGIN command
+
+        Raises:
+            ImapAuthorizationException - if credentials are wrong
+            ImapReferralsException - if server sent other server url
+
+        """
+        command = ImapLoginCommand(self.__auth_data)
+        try:
+            data = await self._command(
+                command, 'LOGIN', _quote(self.__auth_data.username),
+                _quote(str(self.__auth_data.password))
+            )
+        except ImapClientError as exception:
+            command.check_refferal(self.__last_tagged)
+            raise ImapAuthorizationException(exception)
+        command.check_refferal(data)
+        # some servers send CAPABILITY response code in the tagged response
+        self.__update_capabilities(self.last_untagged_responses)
+        self.__update_capabilities(untagged_responses(
+            [ImapResponse(UNTAGGED, 'OK', data)]
+        ))
+
+    async def __server_id(self):
+        """Executes ID command
+
+        """
+        command = ImapIDCommand()
+        await self._command(command, 'ID', '("name" "{}" "version" "{}")'
+                            .format(__description__, __version__))
+        value = (self.last_untagged_responses.get('ID') or [b''])[-1]
+        self.server_info = from_id_command(command.parse_string_pair(value),
+                                           self.host, self.port)
+
+    def __update_capabilities(self, untagged: dict):
+        """Updates capabilities from untagged CAPABILITY response
+
+        :param untagged: dict
+        """
+        for line in untagged.get('CAPABILITY') or ():
+            self.capabilities |= set(line.decode().upper().split())
+        if IMAP4REV1_CAPABILITY_KEYS & self.capabilities:
+            self.capabilities |= IMAP4_COMMANDS
+
+    async def _command(self, command: ImapBaseCommand, name: str, *args,
+                       literal: bytes=None, **fetch_options) -> bytes:
+        """Sends command and checks tagged response. Untagged responses are
+        available in :attr:last_untagged_responses
+
+        Raises:
+            ImapClientException subclass according to response code
+
+        :param command: ImapBaseCommand for error messages and exceptions
+        :param name: command name
+        :param args: arguments
+        :param literal: octets sent as literal
+        :param fetch_options: decoder, lazy and item_class of FETCH responses
+            see :meth:ImapProtocol.command
+        :return: text of the tagged response
+        """
+        if self.__protocol is None:
+            raise ImapClientAbort('Connection is not opened')
+        if self.capabilities and \
+                not self.supports(name.split(' ')[-1]):
+            raise ImapUnsupportedCommand(command)
+        tagged, responses = await self.__protocol.command(
+            name, *args, literal=literal, **fetch_options
+        )
+        self.__last_responses = responses
+        self.__last_tagged = tagged.data
+        self.last_untagged_responses = untagged_responses(responses)
+        if 'BYE' in self.last_untagged_responses and tagged.typ != 'OK':
+            self.__protocol.close()
+            raise ImapClientAbort(self.last_untagged_responses['BYE'][-1])
+        command.check_response(tagged.typ, [tagged.data])
+        return tagged.data
+
+    async def noop(self):
+        """Executes NOOP e.g. to receive updates of the selected folder
+
+        """
+        await self._command(ImapBaseCommand(), 'NOOP')
+
+    async def logout(self):
+        """Sends LOGOUT and closes the connection
+
+        """
+        if not self.opened:
+            return
+        try:
+            await self._command(ImapBaseCommand(), 'LOGOUT')
+        except ImapClientAbort as _:
+            pass
+        finally:
+            self.close()
+
+    def close(self):
+        """Closes the connection without LOGOUT
+
+        """
+        if self.__protocol is not None:
+            self.__protocol.close()
+        self.__selected_folder = None
+
+    async def folders(self, directory: str='""', pattern: str='*',
+                      namespace=None) -> List[ImapFolder]:
+        """Get folder list from IMAP server. Executes LIST command.
+
+        :param directory: reference name
+        :param pattern: mailbox name with possible wildcards
+        :param namespace: ImapNamespace
+        :return: list with ImapFolder items
+        """
+        if namespace and namespace.name:
+            directory = '"{}"'.format(namespace.name)
+        await self._command(ImapFolderListCommand(directory, pattern), 'LIST',
+                            directory, pattern)
+        return [ImapFolder.build(response.data, response.literals)
+                for response in self.__protocol_responses('LIST')]
+
+    def __protocol_responses(self, typ: str) -> List[ImapResponse]:
+        """Untagged responses of the last command with literals
+
+        :param typ: response type
+        :return: list of ImapResponse
+        """
+        return [response for response in self.__last_responses
+                if response.typ == typ]
+
+    async def folder_stats(self, folder: ImapFolder) -> dict:
+        """Executes EXAMINE for the folder
+
+        :param folder: ImapFolder
+        :return: dict
+        """
+        self.__selected_folder = None
+        return await self.__select(ImapFolderDetailsCommand(folder),
+                                   'EXAMINE', folder)
+
+    async def select_folder(self, folder: ImapFolder) -> dict:
+        """Selects folder in read-write mode
+
+        :param folder: ImapFolder
+        :return: dict
+        """
+        self.__selected_folder = None
+        result = await self.__select(ImapSelectFolderCommand(folder),
+                                     'SELECT', folder)
+        self.__selected_folder = folder.imap_name()
+        self.flag_registry.mask(result.get('FLAGS') or ())
+        return result
+
+    async def __select(self, command: ImapFolderDetailsCommand, name: str,
+                       folder: ImapFolder) -> dict:
+        """Executes SELECT or EXAMINE
+
+        :param command: ImapFolderDetailsCommand
+        :param name: SELECT or EXAMINE
+        :param folder: ImapFolder
+        :return: dict
+        """
+        await self._command(command, name, folder.imap_name())
+        untagged = self.last_untagged_responses
+        return command.folder_info(
+            (untagged.get('EXISTS') or [0])[-1],
+            lambda attr: (untagged.get(attr) or [None])[-1]
+        )
+
+    async def fetch(self, query: FetchQueryBuilder, lazy: bool=False,
+                    compact_flags: bool=False,
+                    raw: bool=False) -> List[ImapFetchedItem]:
+        """Retries messages from the selected folder. FETCH responses are
+        built while they arrive.
+
+        :param query: FetchQueryBuilder
+        :param lazy: build expensive atoms on first access
+        :param compact_flags: FLAGS are returned as Flags bitmask of
+            :attr:flag_registry
+        :param raw: keep RFC822 and BODY[] as RawEmailMessage
+        :return: list of fetched items
+        """
+        command = ImapFetchCommand(query)
+        item_class = ImapFetchedItem
+        if raw:
+            item_class = LazyRawImapFetchedItem if lazy \
+                else RawImapFetchedItem
+        elif lazy:
+            item_class = LazyImapFetchedItem
+        name, args = 'FETCH', query.build()
+        if query.uids:
+            name = 'UID FETCH'
+        await self._command(
+            command, name, *args, lazy=lazy, item_class=item_class,
+            decoder=query.decoder(self.flag_registry if compact_flags
+                                  else None)
+        )
+        return self.last_untagged_responses.get('FETCH', [])
+
+    async def search(self, query: SearchQueryBuilder,
+                     charset: str=None) -> List[int]:
+        """Executes SEARCH command
+
+        :param query: SearchQueryBuilder
+        :param charset: str
+        :return: list of message numbers
+        """
+        command = ImapSearchCommand(query, charset)
+        args = ('CHARSET', charset) if charset else ()
+        await self._command(command, 'SEARCH', *args, str(query))
+        return [int(num) for line in self.last_untagged_responses.get(
+            'SEARCH', []) for num in line.split(b' ') if num]
+
+    async def store(self, query: StoreQueryBuilder) -> List[dict]:
+        """Executes STORE command
+
+        :param query: StoreQueryBuilder
+        :return: list of dict with updated values
+        """
+        command = ImapStoreCommand(query)
+        name = 'UID STORE' if query.uids else 'STORE'
+        await self._command(command, name, *query.build())
+        return [dict(item) for item in
+                self.last_untagged_responses.get('FETCH', [])]
+
+    async def append_message(self, message: Any, folder: ImapFolder,
+                             flags: Any=None) -> Any:
+        """Appends message to the folder. Folder is created if server
+        responds with TRYCREATE.
+
+        :param message: EmailMessage, RawEmailMessage or bytes
+        :param folder: ImapFolder
+        :param flags: str or iterable with flags
+        :return: message with uid from APPENDUID response code
+        """
+        command = AppendMessageCommand(message, folder, flags)
+        message = command.message
+        if flags and not isinstance(flags, (str, bytes)):
+            flags = '({})'.format(' '.join([str(item) for item in flags]))
+        args = (folder.imap_name(), flags or None,
+                imaplib.Time2Internaldate(time.time()))
+        literal = imaplib.MapCRLF.sub(CRLF, message.as_bytes())
+        try:
+            data = await self._command(command, 'APPEND', *args,
+                                       literal=literal)
+        except ImapTryCreate as _:
+            create = ImapCreateFolderCommand(folder.name, None)
+            await self._command(create, 'CREATE', folder.imap_name())
+            data = await self._command(command, 'APPEND', *args,
+                                       literal=literal)
+        message.uid = 0
+        if b'APPENDUID' in data:
+            append_uid, *_ = data.partition(b']')
+            message.uid = int(append_uid.split()[-1])
+        return message
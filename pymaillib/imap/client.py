@@ -8,11 +8,12 @@
     :license: WTFPL, see LICENSE for more details.
 """
 import warnings
+from concurrent.futures import Executor
 from datetime import datetime
 from threading import Lock, current_thread
 from traceback import print_exception
 
-from typing import Iterable, Any
+from typing import Iterable, Iterator, Any, Union
 
 from .utils import is_iterable
 from .query.builders.search import SearchQueryBuilder
@@ -22,23 +23,30 @@ from .commands.message import AppendMessageCommand, UpdateMessageCommand, \
     DeleteMessageCommand
 from .commands.store import ImapStoreCommand
 from .commands.search import ImapSearchCommand
-from .commands.fetch import ImapFetchCommand
+from .commands.fetch import ImapFetchCommand, ImapFetchTableCommand, \
+    ImapFetchPartCommand
 from .commands.folder import *
 from .commands.folders import ImapFolderListCommand
 from .commands.id import ImapIDCommand
+from .commands.idle import ImapIdleCommand
 from .commands.login import ImapLoginCommand
 from .commands.namespace import Namespace
+from .commands.pipeline import ImapPipelineCommand, PipelineStats
 from .commands.scalix_id import ImaXScalixIDCommand
 from .commands.unselect import ImapUnSelectFolderCommand
 from .commands.wrapper import ImapLibWrapper
-from .constants import IMAP4REV1_CAPABILITY_KEYS, IMAP4_COMMANDS
-from .entity.folder import ImapFolder
+from .constants import IMAP4REV1_CAPABILITY_KEYS, IMAP4_COMMANDS, \
+    IDLE_RENEW_INTERVAL, COMPRESS_DEFLATE
+from .entity.folder import ImapFolder, FolderChange
 from .entity.server import Namespaces, ImapNamespace
-from .entity.email_message import EmailMessage
+from .entity.email_message import EmailMessage, RawEmailMessage
+from .entity.body_structure import SimpleBodyPart
+from .entity.fetch_table import FetchResultTable
+from .flags import FlagRegistry
 
 from .exceptions.base import ImapObjectNotFound, ImapIllegalStateException, \
-    ImapUnsupportedCommand, ImapInvalidArgument
-from .imap4 import IMAP4SSL, IMAP4, IMAP4Stream
+    ImapUnsupportedCommand, ImapInvalidArgument, ImapClientError
+from .imap4 import IMAP4SSL, IMAP4, IMAP4Stream, TransferCounters
 from ..user import UserCredentials
 
 
@@ -66,16 +74,46 @@ class ImapClient(object):
         self.__server_info = None
         self.__imap_obj = None
         self.__auth_data = auth_data
+        self.__selected_folder = None
+        self.__idle = None
+        # one registry per connection, so flags of messages of all folders
+        # of the mailbox can be compared as bitmasks
+        self.flag_registry = FlagRegistry()
         self._init_connection()
 
     def _init_connection(self):
         self.__imap_obj = self.__init_imap_obj()
+        self.__imap_obj.literal_spool_size = self.literal_spool_size
         self.__opened = True
         self._update_capabilities(
             ImapLoginCommand(self.__auth_data).run(self.__imap_obj)
         )
         self._update_server_info(self.__imap_obj)
         self._update_capabilities(self.__imap_obj.capabilities)
+        if self.compress:
+            self.__start_compression()
+
+    def __start_compression(self):
+        """Enables COMPRESS=DEFLATE if server supports it. Connection is
+        used without compression if server rejects it.
+
+        """
+        if not hasattr(self.__imap_obj, 'compress'):
+            # e.g. IMAP4Stream
+            return
+        if not self.supports(COMPRESS_DEFLATE):
+            # servers usually announce it only after login
+            _, data = self.__imap_obj.capability()
+            self._update_capabilities(
+                b' '.join(filter(None, data)).decode().upper().split()
+            )
+        if not self.supports(COMPRESS_DEFLATE):
+            return
+        try:
+            self.__imap_obj.compress()
+        except ImapClientError as exp:
+            warnings.warn('Could not enable compression {}'.format(exp),
+                          RuntimeWarning)
 
     def __enter__(self):
         if not self.__lock.locked():
@@ -131,6 +169,9 @@ class ImapClient(object):
             raise ImapIllegalStateException('Working outside context')
         if not self.supports(command.name):
             raise ImapUnsupportedCommand(command)
+        if self.__idle is not None and self.__idle is not command:
+            # IDLE is started again by :meth:idle iterator
+            self.__idle.done(self.__imap_obj)
 
         result = command.run(self.__imap_obj)
         self.last_untagged_responses = self.__imap_obj.untagged_responses
@@ -171,6 +212,15 @@ class ImapClient(object):
         except Exception as excp:
             warnings.warn(str(excp), RuntimeWarning)
 
+    @property
+    def selected_folder(self) -> str:
+        """IMAP name of the folder selected in read-write mode by
+        :meth:select_folder or None
+
+        :return: str
+        """
+        return self.__selected_folder
+
     @property
     def opened(self):
         """Indicates if connection to the IMAP is alive
@@ -263,6 +313,41 @@ class ImapClient(object):
         """
         return self.__settings.get('timeout', 60)
 
+    @property
+    def literal_spool_size(self) -> int:
+        """Literals bigger than this number of octets are returned as
+        SpooledLiteral backed by temporary file instead of bytes. 0 means
+        that all literals are kept in memory.
+
+        :return: int
+        """
+        return int(self.__settings.get('literal_spool_size') or 0)
+
+    @property
+    def compress(self) -> bool:
+        """Use COMPRESS=DEFLATE if server supports it
+
+        :return: bool
+        """
+        return bool(self.__settings.get('compress'))
+
+    @property
+    def transfer_counters(self) -> TransferCounters:
+        """Octets sent and received by the connection before and after
+        compression or None if connection does not count them
+
+        :return: TransferCounters
+        """
+        return getattr(self.__imap_obj, 'counters', None)
+
+    @property
+    def pipeline_depth(self) -> int:
+        """Default max number of commands :meth:pipeline keeps in flight
+
+        :return: int
+        """
+        return int(self.__settings.get('pipeline_depth') or 16)
+
     def __init_imap_obj(self) -> IMAP4:
         """Creates new IMAP4 object
 
@@ -308,12 +393,15 @@ class ImapClient(object):
         :param folder: ImapFolder
         :return: dict
         """
+        # EXAMINE deselects current folder
+        self.__selected_folder = None
         return self._simple_command(ImapFolderDetailsCommand(folder))
 
     def un_select_folder(self):
         """Executes UNSELECT folder
 
         """
+        self.__selected_folder = None
         self._simple_command(ImapUnSelectFolderCommand())
 
     def release_current_folder(self):
@@ -327,6 +415,7 @@ class ImapClient(object):
             # if imap server does not support UNSELECT imap command than we
             # need to re establish connection.
             self.imaplib('close')
+        self.__selected_folder = None
 
     def update_folder_info(self, folder: ImapFolder) -> ImapFolder:
         """Updates additional information about folder for an ImapFolder object.
@@ -415,15 +504,74 @@ class ImapClient(object):
 
         :param folder:
         """
-        return self._simple_command(ImapSelectFolderCommand(folder))
+        self.__selected_folder = None
+        result = self._simple_command(ImapSelectFolderCommand(folder))
+        self.__selected_folder = folder.imap_name()
+        # folder flags get bits in the order server sends them
+        self.flag_registry.mask(result.get('FLAGS') or ())
+        return result
 
-    def fetch(self, query: FetchQueryBuilder):
+    def fetch(self, query: FetchQueryBuilder, stream: bool=False,
+              zero_copy: bool=False, lazy: bool=False,
+              executor: Executor=None, chunk_size: int=500,
+              compact_flags: bool=False, raw: bool=False):
         """Retries messages from a folder
 
-        :param folder: ImapFolder object
         :param query: FetchQueryBuilder object
-        """
-        yield from self._simple_command(ImapFetchCommand(query))
+        :param stream: yield messages as soon as they arrive from the server
+            instead of waiting for the whole response. Useful for huge
+            folders because only one message is kept in memory.
+        :param zero_copy: literal values (BODY[], RFC822 ...) are returned as
+            memoryview without copying them. Messages are not parsed
+            until :meth:ImapFetchedItem.email_message is requested. Implies
+            stream.
+        :param lazy: ENVELOPE, BODYSTRUCTURE, INTERNALDATE and RFC822 are
+            built on first access. Useful when only few of fetched messages
+            are used.
+        :param executor: decode messages using executor e.g.
+            ProcessPoolExecutor to use all CPU cores for big responses with
+            ENVELOPE, BODYSTRUCTURE or headers. Messages are returned in the
+            same order.
+        :param chunk_size: number of messages decoded by one executor task
+        :param compact_flags: FLAGS are returned as :class:Flags bitmask of
+            :attr:flag_registry instead of list of str
+        :param raw: RFC822 and BODY[] are returned as
+            :class:RawEmailMessage with original octets which can be passed
+            to :meth:append_message without parsing e.g. for migrations
+        """
+        yield from self._simple_command(ImapFetchCommand(
+            query, stream, zero_copy, lazy, executor, chunk_size,
+            self.flag_registry if compact_flags else None, raw
+        ))
+
+    def fetch_table(self, query: FetchQueryBuilder,
+                    table: FetchResultTable=None) -> FetchResultTable:
+        """Retries UID, FLAGS, RFC822.SIZE and INTERNALDATE of messages into
+        columnar table. Uses few bytes per message so suits scanning of big
+        folders.
+
+        :param query: FetchQueryBuilder object with scalar atoms only
+        :param table: FetchResultTable to append messages to
+        :return: FetchResultTable
+        """
+        return self._simple_command(ImapFetchTableCommand(query, table))
+
+    def fetch_part(self, uid: int, part: SimpleBodyPart, sink: Any,
+                   decode: bool=True, chunk_size: int=1 << 20) -> int:
+        """Downloads message part by chunks into file-like object. Useful
+        for big attachments because whole part is never kept in memory.
+
+        :param uid: message UID
+        :param part: SimpleBodyPart from message BODYSTRUCTURE
+        :param sink: object with write method e.g. file or response stream
+        :param decode: decode Content-Transfer-Encoding (base64 etc.)
+        :param chunk_size: number of octets requested by one FETCH
+        :return: number of bytes written to the sink
+        """
+        return self._simple_command(ImapFetchPartCommand(
+            uid, part.mime_id, sink, part.encoding if decode else None,
+            chunk_size
+        ))
 
     def store(self, query: StoreQueryBuilder):
         """To avoid all those calls to STORE trying calling it with multiple
@@ -439,6 +587,71 @@ class ImapClient(object):
         """
         return self._simple_command(ImapStoreCommand(query))
 
+    def idle(self, folder: ImapFolder=None, timeout: float=None,
+             renew: float=IDLE_RENEW_INTERVAL) -> Iterator[FolderChange]:
+        """Waits for changes of the selected folder with IDLE command
+        instead of polling :meth:folder_stats. Other commands can be
+        executed while iterating, IDLE is ended with DONE before them and
+        started again on the next iteration.
+
+        ::
+            >>> with imap:
+            ...     for change in imap.idle(inbox, timeout=600):
+            ...         if change.typ == 'EXISTS':
+            ...             new = list(imap.fetch(query))
+
+        Raises:
+            ImapUnsupportedCommand - if server does not support IDLE
+
+        :param folder: folder to select if it's not selected already
+        :param timeout: stop after this number of seconds, wait forever if
+            it's None
+        :param renew: seconds after which IDLE is restarted so server does
+            not log out the client
+        :return: generator of FolderChange
+        """
+        if folder is not None and self.selected_folder != folder.imap_name():
+            self.select_folder(folder)
+        command = ImapIdleCommand(timeout, renew)
+        self.__idle = command
+        try:
+            yield from self._simple_command(command)
+        finally:
+            if self.__idle is command:
+                self.__idle = None
+
+    def pipeline(self, queries: Iterable[Any], depth: int=None,
+                 lazy: bool=False, compact_flags: bool=False,
+                 raw: bool=False, stats: PipelineStats=None):
+        """Executes independent FETCH and STORE queries keeping up to
+        `depth` commands in flight, so latency of the connection is not paid
+        once per command. Useful for e.g. fetching messages one by one over
+        slow network.
+
+        ::
+            >>> stats = PipelineStats()
+            >>> queries = (FetchQueryBuilder(uids=uid).fetch_rfc822()
+            ...            for uid in uids)
+            >>> for query, items in imap.pipeline(queries, raw=True,
+            ...                                   stats=stats):
+            ...     migrate(items)
+            >>> stats.saved_round_trips
+
+        :param queries: FetchQueryBuilder or StoreQueryBuilder objects
+        :param depth: max number of commands in flight, `pipeline_depth`
+            option if it's None
+        :param lazy: return LazyImapFetchedItem for fetch queries
+        :param compact_flags: FLAGS are returned as :class:Flags bitmask
+        :param raw: RFC822 and BODY[] are returned as :class:RawEmailMessage
+        :param stats: PipelineStats updated with number of commands and
+            round trips
+        :return: generator of tuples query, list of results of the query
+        """
+        yield from self._simple_command(ImapPipelineCommand(
+            queries, depth or self.pipeline_depth, lazy,
+            self.flag_registry if compact_flags else None, raw, stats
+        ))
+
     def search(self, query: SearchQueryBuilder):
         """
 
@@ -472,11 +685,13 @@ class ImapClient(object):
         """
         return self._simple_command(ImapLibWrapper(func, *args, **kwargs))
 
-    def append_message(self, message: EmailMessage, folder: ImapFolder,
-                       flags:str =None) -> EmailMessage:
+    def append_message(self, message: Union[EmailMessage, RawEmailMessage],
+                       folder: ImapFolder, flags:str =None) \
+            -> Union[EmailMessage, RawEmailMessage]:
         """
         
-        :param message: 
+        :param message: EmailMessage or RawEmailMessage which is appended
+            without serialization
         :param folder: 
         :return: 
         """
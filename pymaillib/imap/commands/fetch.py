@@ -8,15 +8,54 @@
     :license: WTFPL, see LICENSE for more details.
 """
 import imaplib
+from concurrent.futures import Executor
+from typing import Any, Iterator
+from functools import partial
+from itertools import islice
 
 from ..query.builders.fetch import FetchQueryBuilder
 from . import ImapBaseCommand
-from ..entity.email_message import ImapFetchedItem
+from ..entity.email_message import ImapFetchedItem, LazyImapFetchedItem, \
+    RawImapFetchedItem, LazyRawImapFetchedItem
+from ..entity.fetch_table import FetchResultTable
 from ..exceptions import ImapInvalidArgument
-from ..parsers import tokenize_atom_response
+from ..flags import FlagRegistry, Flags
+from ..imap4 import ImapResponseReader, ZeroCopyResponseReader
+from ..parsers import tokenize_atom_response, tokenize_fetch_response, \
+    FetchDecoder, ResponseTokenizer
+from ..transfer_encoding import transfer_decoder
 from ..utils import build_imap_response_line
 
 
+def decode_messages(item_class: type, lazy: bool, decoder: FetchDecoder,
+                    messages: list) -> list:
+    """Builds fetched items for the part of the response. Runs in worker
+    processes so it must be picklable.
+
+    :param item_class: ImapFetchedItem or LazyImapFetchedItem
+    :param lazy: build expensive atoms on first access
+    :param decoder: FetchDecoder
+    :param messages: list of tuples line, literals
+    :return: list of fetched items
+    """
+    return [item_class(tokenize_atom_response(line, literals, lazy, decoder))
+            for line, literals in messages]
+
+
+def chunks(iterable, size: int):
+    """Splits iterable into lists
+
+    :param iterable:
+    :param size: max length of the list
+    :return: generator
+    """
+    iterable = iter(iterable)
+    chunk = list(islice(iterable, size))
+    while chunk:
+        yield chunk
+        chunk = list(islice(iterable, size))
+
+
 class ImapFetchCommand(ImapBaseCommand):
     """Executes  IMAP Fetch cammand
 
@@ -24,7 +63,10 @@ class ImapFetchCommand(ImapBaseCommand):
 
     _COMMAND = 'FETCH'
 
-    def __init__(self, query: FetchQueryBuilder):
+    def __init__(self, query: FetchQueryBuilder, stream: bool=False,
+                 zero_copy: bool=False, lazy: bool=False,
+                 executor: Executor=None, chunk_size: int=500,
+                 flag_registry: FlagRegistry=None, raw: bool=False):
         """Creates instance of Fetch IMAP command
 
         Raises:
@@ -32,11 +74,41 @@ class ImapFetchCommand(ImapBaseCommand):
                                 FetchQueryBuilder
 
         :param query: FetchQueryBuilder
+        :param stream: read messages from the connection one by one instead
+            of waiting for the whole response
+        :param zero_copy: keep literals as memoryview of the buffer they
+            were read into. Implies stream.
+        :param lazy: return LazyImapFetchedItem which builds expensive atoms
+            on first access
+        :param executor: e.g. ProcessPoolExecutor. Response is split at
+            message boundaries and decoded by the executor. Items are
+            returned in the same order. Can't be used with zero_copy.
+        :param chunk_size: number of messages decoded by one executor task
+        :param flag_registry: FlagRegistry to return FLAGS as Flags bitmask
+        :param raw: keep RFC822 and BODY[] as RawEmailMessage instead of
+            parsing them
         :return:
         """
         if not isinstance(query, FetchQueryBuilder):
             raise ImapInvalidArgument('query', query)
+        if executor and zero_copy:
+            # memoryview can't be sent to other process
+            raise ImapInvalidArgument('executor', executor)
+        self.__executor = executor
+        self.__chunk_size = chunk_size
+        self.__flag_registry = flag_registry
         self.__fetch_query = query
+        self.__stream = stream or zero_copy
+        self.__reader_class = ImapResponseReader
+        if zero_copy:
+            self.__reader_class = ZeroCopyResponseReader
+        self.__lazy = lazy
+        self.__item_class = ImapFetchedItem
+        if lazy:
+            self.__item_class = LazyImapFetchedItem
+        if raw:
+            self.__item_class = LazyRawImapFetchedItem if lazy \
+                else RawImapFetchedItem
 
     def run(self, imap_obj: imaplib.IMAP4):
         """Executes IMAP fetch command according to the requested
@@ -44,6 +116,10 @@ class ImapFetchCommand(ImapBaseCommand):
 
         :param imap_obj:
         """
+        if self.__stream:
+            yield from self.__run_stream(imap_obj)
+            return
+
         func = 'fetch'
         args = self.__fetch_query.build()
         if self.__fetch_query.uids:
@@ -52,5 +128,181 @@ class ImapFetchCommand(ImapBaseCommand):
 
         typ, data = getattr(imap_obj, func)(*args)
         self.check_response(typ, data)
-        for line, literals in build_imap_response_line(data):
-            yield ImapFetchedItem(tokenize_atom_response(line, literals))
+        decoder = self.__fetch_query.decoder(self.__flag_registry)
+        if self.__executor:
+            yield from self.__decode(build_imap_response_line(data), decoder)
+            return
+        for atoms in tokenize_fetch_response(data, self.__lazy, decoder):
+            yield self.__item_class(atoms)
+
+    def arguments(self) -> tuple:
+        """Command name and arguments as imaplib sends them
+
+        :return: tuple e.g. ('UID', 'FETCH', '1:10', '(FLAGS)')
+        """
+        if self.__fetch_query.uids:
+            return ('UID', 'FETCH') + self.__fetch_query.build()
+        return ('FETCH',) + self.__fetch_query.build()
+
+    def build(self, responses) -> Iterator[ImapFetchedItem]:
+        """Builds fetched items from untagged FETCH responses read from the
+        connection by the caller e.g. by ImapPipelineReader
+
+        :param responses: iterable with tuples line, literals
+        :return: generator
+        """
+        decoder = self.__fetch_query.decoder(self.__flag_registry)
+        if self.__executor:
+            yield from self.__decode(responses, decoder)
+            return
+        for line, literals in responses:
+            yield self.__item_class(
+                tokenize_atom_response(line, literals, self.__lazy, decoder)
+            )
+
+    def __run_stream(self, imap_obj: imaplib.IMAP4):
+        """Sends IMAP fetch command and parses untagged FETCH responses as
+        soon as they arrive, so only one message is kept in memory.
+
+        :param imap_obj: imaplib.IMAP4
+        """
+        reader = self.__reader_class(imap_obj,
+                                     imap_obj._command(*self.arguments()))
+        try:
+            yield from self.build(
+                (line, literals) for _, line, literals in reader
+            )
+        finally:
+            # generator could be closed before all responses were read
+            reader.close()
+        self.check_response(*reader.result)
+
+    def __decode(self, messages, decoder: FetchDecoder):
+        """Decodes messages by the executor. Worker processes get copies of
+        the flag registry, so FLAGS are mapped back to the registry of the
+        command and bits match the other Flags of it.
+
+        :param messages: iterable with tuples line, literals
+        :param decoder: FetchDecoder
+        :return: generator
+        """
+        func = partial(decode_messages, self.__item_class, self.__lazy,
+                       decoder)
+        registry = self.__flag_registry
+        for items in self.__executor.map(func,
+                                         chunks(messages, self.__chunk_size)):
+            for item in items:
+                flags = item.get('FLAGS')
+                if isinstance(flags, Flags) and flags.registry is not registry:
+                    item['FLAGS'] = registry.flags(flags)
+                yield item
+
+
+class ImapFetchTableCommand(ImapBaseCommand):
+    """Executes IMAP Fetch command for scalar atoms (UID, FLAGS, RFC822.SIZE,
+    INTERNALDATE) and stores values of all messages in FetchResultTable
+
+    """
+
+    _COMMAND = 'FETCH'
+
+    def __init__(self, query: FetchQueryBuilder,
+                 table: FetchResultTable=None):
+        """Creates instance of Fetch IMAP command
+
+        Raises:
+            ImapInvalidArgument - if :param query is not instance of
+                                FetchQueryBuilder or requests atoms which
+                                can't be stored in the table or :param table
+                                has no columns for them
+
+        :param query: FetchQueryBuilder
+        :param table: FetchResultTable to append messages to e.g. when
+            folder is fetched by chunks
+        """
+        if not isinstance(query, FetchQueryBuilder):
+            raise ImapInvalidArgument('query', query)
+        try:
+            columns = FetchResultTable.for_atoms(query.response_items())
+        except ImapInvalidArgument as _:
+            raise ImapInvalidArgument('query', query)
+        if table is not None and \
+                not set(columns.columns).issubset(table.columns):
+            raise ImapInvalidArgument('table', table)
+        self.__fetch_query = query
+        self.__table = table if table is not None else columns
+
+    def run(self, imap_obj: imaplib.IMAP4) -> FetchResultTable:
+        """Reads untagged FETCH responses one by one into the table
+
+        :param imap_obj: imaplib.IMAP4
+        :return: FetchResultTable
+        """
+        name, args = 'FETCH', self.__fetch_query.build()
+        if self.__fetch_query.uids:
+            name, args = 'UID', ('FETCH',) + args
+
+        table = self.__table
+        reader = ImapResponseReader(imap_obj, imap_obj._command(name, *args))
+        try:
+            for _, line, literals in reader:
+                parser = ResponseTokenizer(line, literals)
+                table.append(next(parser), next(parser))
+        finally:
+            reader.close()
+        self.check_response(*reader.result)
+        return table
+
+
+class ImapFetchPartCommand(ImapBaseCommand):
+    """Downloads message part by chunks with BODY.PEEK[part]<offset.size>
+    and writes it to a file-like object decoding Content-Transfer-Encoding
+    on the fly. Only one chunk is kept in memory.
+
+    """
+
+    _COMMAND = 'FETCH'
+
+    def __init__(self, uid: int, mime_id: str, sink: Any, encoding: str=None,
+                 chunk_size: int=1 << 20):
+        """Creates instance of Fetch IMAP command
+
+        :param uid: message UID
+        :param mime_id: part number e.g. 1.2
+        :param sink: object with write method
+        :param encoding: Content-Transfer-Encoding of the part. Data is
+            written as is if it's None
+        :param chunk_size: number of octets requested by one FETCH
+        """
+        if chunk_size <= 0:
+            raise ImapInvalidArgument('chunk_size', chunk_size)
+        self.__uid = uid
+        self.__mime_id = str(mime_id)
+        self.__sink = sink
+        self.__encoding = encoding
+        self.__chunk_size = chunk_size
+
+    def run(self, imap_obj: imaplib.IMAP4) -> int:
+        """Fetches part until server returns less octets than requested
+
+        :param imap_obj: imaplib.IMAP4
+        :return: number of bytes written to the sink
+        """
+        offset = 0
+        with transfer_decoder(self.__encoding, self.__sink) as decoder:
+            while True:
+                query = FetchQueryBuilder(uids=self.__uid).fetch_body_peek(
+                    self.__mime_id, self.__chunk_size, offset
+                )
+                chunk = None
+                for item in ImapFetchCommand(query, stream=True)\
+                        .run(imap_obj):
+                    if item.get('UID') == self.__uid:
+                        chunk = item.get_fetched_part(self.__mime_id)
+                if not chunk:
+                    break
+                decoder.write(chunk)
+                offset += len(chunk)
+                if len(chunk) < self.__chunk_size:
+                    break
+        return decoder.written
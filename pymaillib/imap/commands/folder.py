@@ -11,7 +11,7 @@
     STATUS (EXISTS ......)
 """
 import imaplib
-from typing import AnyStr, Any
+from typing import AnyStr, Any, Callable
 
 from ..exceptions import ImapRuntimeError
 from ..constants import FOLDER_UNTAGGED_KEYS
@@ -55,13 +55,25 @@ class ImapFolderDetailsCommand(ImapBaseCommand):
         """
         status, data = imap_obj.select(self.__folder, readonly=self.__readonly)
         self.check_response(status, data)
+        return self.folder_info(
+            data[0], lambda attr: self.untagged_value(imap_obj, attr)
+        )
+
+    @staticmethod
+    def folder_info(exists: bytes, untagged_value: Callable) -> dict:
+        """Builds result of the command from untagged responses
 
-        result = {'EXISTS': int(data[0])}
+        :param exists: number of messages
+        :param untagged_value: function which returns value of untagged
+            response by name or None
+        :return: dict
+        """
+        result = {'EXISTS': int(exists)}
         for attr in FOLDER_UNTAGGED_KEYS:
-            value = self.untagged_value(imap_obj, attr)
+            value = untagged_value(attr)
             if value:
                 if value and attr in ('PERMANENTFLAGS', 'FLAGS'):
-                    value = value.strip(b'()').split(b' ')
+                    value = value.strip(b'()').split()
                 else:
                     value = int(value)
             result[attr] = value
@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+"""
+    Imap4 Idle Command
+    ~~~~~~~~~~~~~~~~
+    Executes IMAP IDLE command (RFC 2177) and reports changes of the
+    selected folder as soon as server sends them
+
+    :copyright: (c) 2017 WTFPL.
+    :license: WTFPL, see LICENSE for more details.
+"""
+import imaplib
+from collections import deque
+from time import monotonic
+from typing import Iterator
+
+from . import ImapBaseCommand
+from ..constants import IDLE_RENEW_INTERVAL
+from ..entity.folder import FolderChange
+from ..exceptions import ImapInvalidArgument
+from ..imap4 import wait_readable
+from ..parsers import tokenize_atom_response
+
+# untagged responses which are reported as FolderChange
+IDLE_CHANGES = ('EXISTS', 'RECENT', 'EXPUNGE', 'FETCH')
+
+
+class ImapIdleCommand(ImapBaseCommand):
+    """Keeps connection in IDLE state and yields FolderChange for EXISTS,
+    RECENT, EXPUNGE and FETCH responses. IDLE is ended with DONE by
+    :meth:done e.g. to execute other command and started again on the next
+    iteration. Changes which server sends with responses of other commands
+    are reported as well.
+
+    """
+
+    _COMMAND = 'IDLE'
+
+    def __init__(self, timeout: float=None,
+                 renew: float=IDLE_RENEW_INTERVAL):
+        """Creates instance of IDLE command
+
+        Raises:
+            ImapInvalidArgument - if renew is not positive
+
+        :param timeout: stop after this number of seconds, wait forever if
+            it's None
+        :param renew: IDLE is restarted after this number of seconds so
+            server does not log out inactive client
+        """
+        if renew <= 0:
+            raise ImapInvalidArgument('renew', renew)
+        self.__timeout = timeout
+        self.__renew = renew
+        self.__tag = None
+        self.__continued = False
+        self.__started = False
+        self.__changes = deque()
+
+    @property
+    def idling(self) -> bool:
+        """IDLE command was sent and not completed yet
+
+        :return: bool
+        """
+        return self.__tag is not None
+
+    def run(self, imap_obj: imaplib.IMAP4) -> Iterator[FolderChange]:
+        """Sends IDLE and yields changes until timeout
+
+        :param imap_obj: imaplib.IMAP4
+        :return: generator of FolderChange
+        """
+        deadline = None
+        if self.__timeout is not None:
+            deadline = monotonic() + self.__timeout
+        renew_at = None
+        try:
+            while True:
+                while self.__changes:
+                    yield self.__changes.popleft()
+                now = monotonic()
+                if deadline is not None and now >= deadline:
+                    break
+                if self.__tag is None:
+                    self.__start(imap_obj)
+                    renew_at = now + self.__renew
+                    continue
+                if now >= renew_at:
+                    self.done(imap_obj)
+                    continue
+                wait = renew_at - now
+                if deadline is not None:
+                    wait = min(wait, deadline - now)
+                if wait_readable(imap_obj, wait):
+                    self.__read(imap_obj)
+        except (imap_obj.abort, OSError):
+            # connection is broken, DONE can't be sent
+            self.__tag = None
+            raise
+        finally:
+            # generator could be closed by the caller
+            self.done(imap_obj)
+        yield from self.__changes
+        self.__changes.clear()
+
+    def done(self, imap_obj: imaplib.IMAP4):
+        """Ends IDLE, so other command can be sent. Changes which server
+        sends before completion of IDLE are yielded on the next iteration.
+
+        :param imap_obj: imaplib.IMAP4
+        """
+        # RFC 2177 DONE is sent only after continuation request
+        while self.__tag is not None and not self.__continued:
+            self.__read(imap_obj)
+        if self.__tag is None:
+            return
+        imap_obj.send(b'DONE' + imaplib.CRLF)
+        while self.__tag is not None:
+            self.__read(imap_obj)
+
+    def __start(self, imap_obj: imaplib.IMAP4):
+        """Sends IDLE command. Changes which were received with responses of
+        the commands executed after previous IDLE are reported first.
+
+        :param imap_obj: imaplib.IMAP4
+        """
+        for typ in IDLE_CHANGES[:-1]:
+            values = imap_obj.untagged_responses.pop(typ, ())
+            # responses of SELECT etc. before the first IDLE are not changes
+            if not self.__started:
+                continue
+            for value in values:
+                self.__changes.append(FolderChange(typ, int(value), None))
+        self.__started = True
+        self.__continued = False
+        self.__tag = imap_obj._command(self._COMMAND)
+
+    def __read(self, imap_obj: imaplib.IMAP4):
+        """Reads one response of IDLE command
+
+        :param imap_obj: imaplib.IMAP4
+        """
+        line = imap_obj._get_line()
+        if imap_obj._match(imap_obj.tagre, line):
+            tag = imap_obj.mo.group('tag')
+            if tag != self.__tag:
+                raise imap_obj.abort(
+                    'unexpected tagged response: {}'.format(line)
+                )
+            imap_obj.tagged_commands.pop(tag, None)
+            self.__tag = None
+            self.check_response(str(imap_obj.mo.group('type'),
+                                    imap_obj._encoding),
+                                [imap_obj.mo.group('data')])
+        elif imap_obj._match(imaplib.Continuation, line):
+            self.__continued = True
+        elif imap_obj._match(imap_obj.Untagged_status, line):
+            self.__change(imap_obj,
+                          str(imap_obj.mo.group('type'), imap_obj._encoding),
+                          int(imap_obj.mo.group('data')),
+                          imap_obj.mo.group('data2') or b'')
+        elif imap_obj._match(imaplib.Untagged_response, line):
+            # OK, BYE, FLAGS etc. are stored the same way as imaplib does
+            imap_obj._append_untagged(
+                str(imap_obj.mo.group('type'), imap_obj._encoding),
+                imap_obj.mo.group('data') or b''
+            )
+            imap_obj._check_bye()
+        else:
+            raise imap_obj.abort('unexpected response: {}'.format(line))
+
+    def __change(self, imap_obj: imaplib.IMAP4, typ: str, number: int,
+                 dat: bytes):
+        """Reads the rest of the response with literals and stores change
+
+        :param imap_obj: imaplib.IMAP4
+        :param typ: response type e.g. EXISTS
+        :param number: number of messages or message sequence number
+        :param dat: response data after the type
+        """
+        lines = [str(number).encode() + b' ']
+        literals = []
+        while imap_obj._match(imap_obj.Literal, dat):
+            literals.append(imap_obj.read(int(imap_obj.mo.group('size'))))
+            lines.append(dat)
+            dat = imap_obj._get_line()
+        lines.append(dat)
+        if typ not in IDLE_CHANGES:
+            return
+        data = None
+        if typ == 'FETCH':
+            data = dict(tokenize_atom_response(b''.join(lines), literals))
+        self.__changes.append(FolderChange(typ, number, data))
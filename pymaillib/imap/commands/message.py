@@ -10,13 +10,13 @@
 import imaplib
 
 import time
-from typing import Any
+from typing import Any, Union
 
 from ..commands.folder import ImapCreateFolderCommand
 from ..exceptions import ImapTryCreate
 from ..entity.folder import ImapFolder
 from ..exceptions import ImapInvalidArgument, ImapRuntimeError
-from ..entity.email_message import EmailMessage
+from ..entity.email_message import EmailMessage, RawEmailMessage
 from . import ImapBaseCommand
 
 
@@ -32,18 +32,29 @@ class AppendMessageCommand(ImapBaseCommand):
         """
         Raises:
             ImapRuntimeError - if :param message is not instance of
-                                EmailMessage
+                                EmailMessage or RawEmailMessage
 
-        :param message: EmailMessage
+        :param message: EmailMessage or RawEmailMessage. Raw message octets
+            are sent as is. bytes are wrapped into RawEmailMessage
         :param folder: ImapFolder
         :return:
         """
-        if not isinstance(message, EmailMessage):
+        if isinstance(message, (bytes, bytearray, memoryview)):
+            message = RawEmailMessage(bytes(message))
+        if not isinstance(message, (EmailMessage, RawEmailMessage)):
             raise ImapInvalidArgument('message', message)
         self._message = message
         self.__folder = folder
         self.__flags = flags
 
+    @property
+    def message(self) -> Union[EmailMessage, RawEmailMessage]:
+        """Message which is appended, bytes are wrapped into RawEmailMessage
+
+        :return: EmailMessage or RawEmailMessage
+        """
+        return self._message
+
     def run(self, imap_obj: imaplib.IMAP4, attemps=0):
         """Sends IMAP APPEND command.
 
@@ -92,7 +103,7 @@ class DeleteMessageCommand(AppendMessageCommand):
     _COMMAND = 'STORE'
 
     def __init__(self, uids: Any):
-        if isinstance(uids, EmailMessage):
+        if isinstance(uids, (EmailMessage, RawEmailMessage)):
             uids = uids.uid
         self.__uids = str(uids)
 
@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""
+    Imap4 Pipeline Command
+    ~~~~~~~~~~~~~~~~
+    Sends independent FETCH and STORE commands without waiting for tagged
+    response of each one
+
+    :copyright: (c) 2017 WTFPL.
+    :license: WTFPL, see LICENSE for more details.
+"""
+import imaplib
+from itertools import islice
+from typing import Any, Iterable, Iterator, Tuple
+
+from . import ImapBaseCommand
+from .fetch import ImapFetchCommand
+from .store import ImapStoreCommand
+from ..exceptions import ImapInvalidArgument
+from ..flags import FlagRegistry
+from ..imap4 import ImapPipelineReader
+from ..query.builders.fetch import FetchQueryBuilder
+from ..query.builders.store import StoreQueryBuilder
+
+
+class PipelineStats(object):
+    """Counters of pipelined execution. Without pipelining each command
+    costs one round trip. Pipeline pays it only when commands are sent while
+    no other command is in flight, so `saved_round_trips` shows how many
+    times the client did not wait for the server.
+
+    """
+
+    __slots__ = ('commands', 'round_trips', 'max_in_flight')
+
+    def __init__(self):
+        self.commands = 0
+        self.round_trips = 0
+        self.max_in_flight = 0
+
+    @property
+    def saved_round_trips(self) -> int:
+        """Number of round trips which sequential execution would take more
+
+        :return: int
+        """
+        return self.commands - self.round_trips
+
+    def __repr__(self) -> str:
+        return '{}(commands={}, round_trips={}, max_in_flight={})'.format(
+            self.__class__.__name__, self.commands, self.round_trips,
+            self.max_in_flight
+        )
+
+
+class ImapPipelineCommand(ImapBaseCommand):
+    """Keeps up to `depth` FETCH and STORE commands in flight: next command
+    is sent as soon as the tagged response of the previous one arrives and
+    responses are matched to commands by tag, so the connection latency is
+    not paid once per command. Commands must not depend on each other e.g.
+    fetches of different UIDs.
+
+    """
+
+    # STORE is a part of IMAP4rev1 as well
+    _COMMAND = 'FETCH'
+
+    def __init__(self, queries: Iterable[Any], depth: int=16,
+                 lazy: bool=False, flag_registry: FlagRegistry=None,
+                 raw: bool=False, stats: PipelineStats=None):
+        """Creates instance of pipeline command
+
+        Raises:
+            ImapInvalidArgument - if depth is less than 1
+
+        :param queries: FetchQueryBuilder or StoreQueryBuilder objects
+        :param depth: max number of commands in flight
+        :param lazy: return LazyImapFetchedItem for fetch queries
+        :param flag_registry: FlagRegistry to return FLAGS as Flags bitmask
+        :param raw: keep RFC822 and BODY[] as RawEmailMessage
+        :param stats: PipelineStats to update, new one if it's None
+        """
+        if depth < 1:
+            raise ImapInvalidArgument('depth', depth)
+        self.__queries = queries
+        self.__depth = depth
+        self.__lazy = lazy
+        self.__flag_registry = flag_registry
+        self.__raw = raw
+        self.stats = stats if stats is not None else PipelineStats()
+
+    def __command(self, query: Any) -> ImapBaseCommand:
+        """Command which builds arguments and results of the query
+
+        :param query: FetchQueryBuilder or StoreQueryBuilder
+        :return: ImapFetchCommand or ImapStoreCommand
+        """
+        if isinstance(query, FetchQueryBuilder):
+            return ImapFetchCommand(query, lazy=self.__lazy,
+                                    flag_registry=self.__flag_registry,
+                                    raw=self.__raw)
+        if isinstance(query, StoreQueryBuilder):
+            return ImapStoreCommand(query)
+        raise ImapInvalidArgument('query', query)
+
+    def run(self, imap_obj: imaplib.IMAP4) -> Iterator[Tuple[Any, list]]:
+        """Executes queries. Results are yielded as soon as command is
+        completed. If some command failed responses of the rest of commands
+        in flight are dropped before exception is raised.
+
+        :param imap_obj: imaplib.IMAP4
+        :return: generator of tuples query, list of ImapFetchedItem or dict
+        """
+        queries = iter(self.__queries)
+        reader = ImapPipelineReader(imap_obj)
+        sent = {}
+        try:
+            self.__fill(queries, reader, sent)
+            while reader.in_flight:
+                tag, result, responses = reader.read()
+                query, command = sent.pop(tag)
+                command.check_response(*result)
+                items = list(command.build(responses))
+                # window is refilled before the caller processes results
+                self.__fill(queries, reader, sent)
+                yield query, items
+        finally:
+            # generator could be closed before all responses were read
+            reader.close()
+
+    def __fill(self, queries: Iterator[Any], reader: ImapPipelineReader,
+               sent: dict):
+        """Sends next queries until `depth` commands are in flight
+
+        :param queries: iterator of queries
+        :param reader: ImapPipelineReader
+        :param sent: dict tag: tuple query, command of commands in flight
+        """
+        stats = self.stats
+        for query in islice(queries, self.__depth - reader.in_flight):
+            command = self.__command(query)
+            if not reader.in_flight:
+                stats.round_trips += 1
+            sent[reader.send(*command.arguments())] = query, command
+            stats.commands += 1
+        stats.max_in_flight = max(stats.max_in_flight, reader.in_flight)
@@ -8,6 +8,7 @@
     :license: WTFPL, see LICENSE for more details.
 """
 import imaplib
+from typing import Iterator
 
 from ..parsers import tokenize_atom_response
 from ..query.builders.store import StoreQueryBuilder
@@ -50,5 +51,23 @@ class ImapStoreCommand(ImapBaseCommand):
 
         typ, data = getattr(imap_obj, func)(*args)
         self.check_response(typ, data)
-        for line in data:
-            yield dict(tokenize_atom_response(line, []))
+        yield from self.build((line, []) for line in data)
+
+    def arguments(self) -> tuple:
+        """Command name and arguments as imaplib sends them
+
+        :return: tuple e.g. ('UID', 'STORE', '1:10', '+FLAGS', '(\\Seen)')
+        """
+        if self.__store_query.uids:
+            return ('UID', 'STORE') + self.__store_query.build()
+        return ('STORE',) + self.__store_query.build()
+
+    def build(self, responses) -> Iterator[dict]:
+        """Builds results from untagged FETCH responses read from the
+        connection by the caller e.g. by ImapPipelineReader
+
+        :param responses: iterable with tuples line, literals
+        :return: generator
+        """
+        for line, literals in responses:
+            yield dict(tokenize_atom_response(line, literals))
@@ -11,17 +11,31 @@
 import imaplib
 
 from . import ImapBaseCommand
+from ..constants import IMAP4_COMMANDS
 
 
 class ImapLibWrapper(ImapBaseCommand):
 
-    name = "IMAP4"
+    _COMMAND = "IMAP4"
 
     def __init__(self, func, *args, **kwargs):
         self.func = func
         self.args = args
         self.kwargs = kwargs
 
+    @property
+    def name(self) -> str:
+        """IMAP command name for base IMAP4rev1 commands e.g. noop, so
+        support is checked as for other commands. IMAP4 for other imaplib
+        functions.
+
+        :return: str
+        """
+        name = str(self.func).upper()
+        if name in IMAP4_COMMANDS:
+            return name
+        return self._COMMAND
+
     def run(self, imap_obj: imaplib.IMAP4):
         typ, data = getattr(imap_obj, self.func)(*self.args, **self.kwargs)
         self.check_response(typ, data)
@@ -15,7 +15,20 @@ IMAP_DEFAULTS = {
     'port': imaplib.IMAP4_PORT,
     'secure': False,
     'keyfile': None,
-    'certfile': None
+    'certfile': None,
+    # literals bigger than this (octets) are spooled to temporary files,
+    # 0 - disabled
+    'literal_spool_size': 0,
+    # use COMPRESS=DEFLATE if server supports it
+    'compress': False,
+    # max number of commands sent by ImapClient.pipeline without waiting
+    'pipeline_depth': 16,
+    # connection pool of UserMailbox.imap_pool, times are in seconds
+    'pool_min_size': 0,
+    'pool_max_size': 4,
+    'pool_timeout': 30,
+    'pool_idle_ttl': 300,
+    'pool_check_interval': 30
 }
 
 IMAP4_COMMANDS = {'CAPABILITY', 'LOGOUT', 'LOGIN', 'DELETE', 'RENAME', 'CREATE',
@@ -32,6 +45,12 @@ IMAP4_OK_RESULT = 'OK'
 IMAP4_NO_RESULT = 'NO'
 IMAP4_BAD_REQUEST = 'BAD'
 
+# RFC 2177 server may log out client which idles longer than 30 minutes
+IDLE_RENEW_INTERVAL = 29 * 60
+
+# RFC 4978 capability
+COMPRESS_DEFLATE = 'COMPRESS=DEFLATE'
+
 IMAP4_FOLDER_SPECIAL_CHARS = re.compile(b'([\s,/"_)(\[\]]+)')
 
 #  NOT USED FOR NOW
@@ -37,8 +37,96 @@ class ImapEntity(object):
         return '{}'.format(self.dump())
 
 
+def _ordered_slots(cls) -> tuple:
+    """Slots of the class in definition order. Empty tuple if order is not
+    known (e.g. __slots__ is a set)
+
+    :param cls: class
+    :return: tuple
+    """
+    slots = cls.__dict__.get('__slots__', ())
+    if isinstance(slots, str):
+        slots = (slots,)
+    if not isinstance(slots, (tuple, list)):
+        return ()
+    for name in slots:
+        if not name.isidentifier() or name.startswith('__'):
+            return ()
+    return tuple(slots)
+
+
+def _compile(cls, name: str, source: str, namespace: dict):
+    """Compiles generated method of the class
+
+    :param cls: class
+    :param name: method name
+    :param source: str
+    :param namespace: globals of the method
+    :return: function
+    """
+    exec(compile(source, '<{} {}>'.format(cls.__name__, name), 'exec'),
+         namespace)
+    func = namespace[name]
+    func.__qualname__ = '{}.{}'.format(cls.__qualname__, name)
+    func.__doc__ = getattr(SlotBasedImapEntity, name).__doc__
+    func.generated = True
+    return func
+
+
+def _build_init(cls):
+    """Generates __init__ assigning all values straight into slots. Mixed
+    arguments and wrong number of values are handled by
+    SlotBasedImapEntity._init_generic
+
+    :param cls: class
+    :return: function
+    """
+    slots = _ordered_slots(cls)
+    lines = [
+        'def __init__(self, *args, **kwargs):',
+        # reached by super().__init__ from subclass with own __init__
+        '    if self.__class__ is not CLS:',
+        '        return self._init_slots(*args, **kwargs)',
+    ]
+    if slots:
+        lines += [
+            '    if not kwargs and len(args) == {}:'.format(len(slots)),
+            '        {}, = args'.format(
+                ', '.join('self.' + name for name in slots)),
+            '        return',
+            '    if not args and kwargs.keys() == SLOTS:',
+        ]
+        lines += ["        self.{0} = kwargs['{0}']".format(name)
+                  for name in slots]
+        lines.append('        return')
+    lines.append('    self._init_generic(args, kwargs)')
+    return _compile(cls, '__init__', '\n'.join(lines),
+                    {'CLS': cls, 'SLOTS': frozenset(slots)})
+
+
+def _build_dump(cls):
+    """Generates dump returning public slots as dict literal
+
+    :param cls: class
+    :return: function
+    """
+    items = ', '.join("'{0}': self.{0}".format(name)
+                      for name in _ordered_slots(cls)
+                      if not name.startswith('_'))
+    source = '\n'.join([
+        'def dump(self) -> dict:',
+        '    if self.__class__ is not CLS:',
+        '        return SlotBasedImapEntity.dump(self)',
+        '    return {{{}}}'.format(items),
+    ])
+    return _compile(cls, 'dump', source,
+                    {'CLS': cls, 'SlotBasedImapEntity': SlotBasedImapEntity})
+
+
 class SlotBasedImapEntity(ImapEntity):
-    """NamedTuple analog maybe remove it in the future
+    """NamedTuple analog maybe remove it in the future. Each subclass gets
+    generated __init__ and dump for its own __slots__ unless it defines
+    them.
 
     """
 
@@ -48,33 +136,55 @@ class SlotBasedImapEntity(ImapEntity):
 
     __slots__ = ()
 
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        init = _build_init(cls)
+        cls._init_slots = init
+        if getattr(cls.__init__, 'generated', False) or \
+                cls.__init__ is SlotBasedImapEntity.__init__:
+            cls.__init__ = init
+        if not _ordered_slots(cls):
+            # generated dump of parent falls back to generic one
+            return
+        if getattr(cls.dump, 'generated', False) or \
+                cls.dump is SlotBasedImapEntity.dump:
+            cls.dump = _build_dump(cls)
+
     def __init__(self, *args, **kwargs):
+        self._init_slots(*args, **kwargs)
+
+    def _init_generic(self, args, kwargs):
+        """Assign values by slots names
+
+        :param args: tuple
+        :param kwargs: dict
+        """
         if not args and not kwargs:
             raise TypeError('No Arguments provided')
 
-        args, kwargs = self._bulk_append(self.__slots__, list(args), kwargs)
+        args, kwargs = self._bulk_append(self.__slots__, args, kwargs)
 
         if args or kwargs:
             raise TypeError('Too many values provided {} {}'.format(args,
                                                                     kwargs))
 
     def _bulk_append(self, keys, args, kwargs):
+        index = 0
         if args:
             for item in keys:
                 if item in kwargs:
                     break
                 try:
-                    setattr(self, item, args.pop(0))
-                    # super().__setattr__(item, args.pop(0))
+                    setattr(self, item, args[index])
                 except IndexError as exp:
                     raise TypeError('Missing positional argument for'
                                     ' {}'.format(item), exp)
+                index += 1
         for name in list(kwargs):
             setattr(self, name, kwargs.pop(name))
-            # super().__setattr__(name, kwargs.pop(name))
 
         # left items
-        return args, kwargs
+        return list(args[index:]), kwargs
 
     def dump(self) -> dict:
         """Convert class attributes into dictionary
@@ -21,6 +21,8 @@ MIME specifies a set of subtypes that include "alternative", "mixed", "related",
 
 """
 
+DISPOSITION_TYPES = ('attachment', 'inline')
+
 
 class SimpleBodyPart(SlotBasedImapEntity):
     """Class to represent simple body part
@@ -86,6 +88,21 @@ class SimpleBodyPart(SlotBasedImapEntity):
         """
         return isinstance(self, MultiPartBodyPart)
 
+    @property
+    def content_disposition(self) -> str:
+        """Disposition type of the part
+
+        :return: 'attachment', 'inline' or None
+        """
+        for values in (self.disposition, self.attributes):
+            for key in values or ():
+                if not isinstance(key, str):
+                    continue
+                key = key.lower()
+                if key in DISPOSITION_TYPES:
+                    return key
+        return None
+
 
 class MessageRFC822BodPart(SimpleBodyPart):
     """Represent MESSAGE/RFC822 message body part and his attributes
@@ -152,10 +169,40 @@ class BodyStructure(ImapEntity):
 
     """
 
-    __slots__ = '__part',
+    __slots__ = '__part', '__index', '__attachments', '__text_parts', \
+                '__html_parts', '__inline_images'
 
     def __init__(self, part: SimpleBodyPart):
         self.__part = part
+        self.__index = {}
+        self.__attachments = []
+        self.__text_parts = []
+        self.__html_parts = []
+        self.__inline_images = []
+        for item in self:
+            self.__index.setdefault(item.mime_id, item)
+            if not item.is_multipart():
+                self.__add_to_views(item)
+
+    def __add_to_views(self, part: SimpleBodyPart):
+        """Sorts part into query views
+
+        :param part: SimpleBodyPart
+        """
+        disposition = part.content_disposition
+        main_type = (part.main_type or '').lower()
+        if main_type == 'image' and (disposition == 'inline' or
+                                     (not disposition and part.part_id)):
+            self.__inline_images.append(part)
+        elif disposition == 'attachment' or \
+                (not disposition and (part.filename or part.name)):
+            self.__attachments.append(part)
+        elif main_type == 'text':
+            subtype = (part.subtype or '').lower()
+            if subtype == 'plain':
+                self.__text_parts.append(part)
+            elif subtype == 'html':
+                self.__html_parts.append(part)
 
     def is_multipart(self) -> bool:
         """Is this part is multipart
@@ -191,9 +238,47 @@ class BodyStructure(ImapEntity):
         :param mime_id: str
         :return:
         """
-        for item in self:
-            if item.mime_id == mime_id:
-                return item
+        return self.__index.get(mime_id)
+
+    @property
+    def attachments(self) -> List[SimpleBodyPart]:
+        """Parts with attachment disposition or file name
+
+        :return: list
+        """
+        return self.__attachments
+
+    @property
+    def attachments_size(self) -> int:
+        """Total size of attachments in bytes (transfer encoded)
+
+        :return: int
+        """
+        return sum(part.size or 0 for part in self.__attachments)
+
+    @property
+    def text_parts(self) -> List[SimpleBodyPart]:
+        """text/plain parts which are not attachments
+
+        :return: list
+        """
+        return self.__text_parts
+
+    @property
+    def html_parts(self) -> List[SimpleBodyPart]:
+        """text/html parts which are not attachments
+
+        :return: list
+        """
+        return self.__html_parts
+
+    @property
+    def inline_images(self) -> List[SimpleBodyPart]:
+        """Images with inline disposition or Content-ID without disposition
+
+        :return: list
+        """
+        return self.__inline_images
 
     def __repr__(self):
         return '{}'.format([item.dump() for item in self.dump()])
@@ -7,10 +7,7 @@
     :copyright: (c) 2017 WTFPL.
     :license: WTFPL, see LICENSE for more details.
 """
-import quopri
-import uu
 from email import policy
-from email._encoded_words import decode_b
 from email.errors import InvalidBase64CharactersDefect
 from email.message import EmailMessage as ImapLibEmailMessage, MIMEPart
 from email.base64mime import body_decode
@@ -19,38 +16,28 @@ from io import BytesIO
 from typing import Any, List, AnyStr, Generator
 
 from ..exceptions import ImapRuntimeError
+from ..imap4 import SpooledLiteral, SPOOL_CHUNK_SIZE
+from ..transfer_encoding import decode_stream, UUENCODE
 from . import ImapEntity
 
 
 def decode_part(part_info, data):
-    """Copy/paste from email module because if base64 string does not contains
-    '==' if raise a Defect but value is decoded, but you will get original
-     message.
-    
-    :param part_info: 
-    :param data: 
-    :return: 
+    """Decodes body part according to its Content-Transfer-Encoding. Invalid
+    base64 characters are skipped instead of returning original value as
+    email module does. See :mod:pymaillib.imap.transfer_encoding to decode
+    big parts by chunks.
+
+    :param part_info: SimpleBodyPart
+    :param data: bytes, memoryview or SpooledLiteral
+    :return: bytes or None for not encoded parts
     """
-    if part_info.encoding == 'quoted-printable':
-        return quopri.decodestring(data)
-    elif part_info.encoding == 'base64':
-        # XXX: this is a bit of a hack; decode_b should probably be factored
-        # out somewhere, but I haven't figured out where yet.
-        value, defects = decode_b(b''.join(data.splitlines()))
-        for defect in defects:
-            if isinstance(defect, InvalidBase64CharactersDefect):
-                return b''.join([body_decode(line)
-                                 for line in data.splitlines()])
-        return value
-    elif part_info.encoding in ('x-uuencode', 'uuencode', 'uue', 'x-uue'):
-        in_file = BytesIO(data)
+    if part_info.encoding in ('quoted-printable', 'base64') + UUENCODE:
         out_file = BytesIO()
-        try:
-            uu.decode(in_file, out_file, quiet=True)
-            return out_file.getvalue()
-        except uu.Error:
-            # Some decoding problem
-            return data
+        chunks = (data,)
+        if isinstance(data, SpooledLiteral):
+            chunks = data.chunks()
+        decode_stream(part_info.encoding, chunks, out_file)
+        return out_file.getvalue()
 
 
 class EmailMessage(ImapLibEmailMessage, ImapEntity):
@@ -137,6 +124,133 @@ class EmailMessage(ImapLibEmailMessage, ImapEntity):
         return self.as_bytes()
 
 
+class RawEmailMessage(ImapEntity):
+    """Message exactly as it was sent by the server. Nothing is parsed
+    until headers or :attr:message are requested, so messages can be copied
+    to another folder or server (e.g. by :class:AppendMessageCommand)
+    without parsing and serializing them again.
+
+    """
+
+    __slots__ = ('__data', '__headers', '__message', 'uid', 'sequence')
+
+    def __init__(self, data: Any):
+        """
+
+        :param data: bytes, memoryview or SpooledLiteral
+        """
+        self.__data = data
+        self.__headers = None
+        self.__message = None
+        self.uid = 0
+        self.sequence = 0
+
+    def __len__(self) -> int:
+        return len(self.__data)
+
+    def __repr__(self) -> str:
+        return '<{} size={}>'.format(self.__class__.__name__, len(self))
+
+    def __reduce__(self):
+        return RawEmailMessage, (self.as_bytes(),)
+
+    @property
+    def raw(self) -> Any:
+        """Fetched value as is
+
+        :return: bytes, memoryview or SpooledLiteral
+        """
+        return self.__data
+
+    def as_bytes(self) -> bytes:
+        """Message octets without any changes
+
+        :return: bytes
+        """
+        if isinstance(self.__data, bytes):
+            return self.__data
+        return self.__data.tobytes()
+
+    def header_bytes(self) -> bytes:
+        """Header block of the message including delimiting empty line.
+        Only beginning of spooled messages is read.
+
+        :return: bytes
+        """
+        data = self.__data
+        if isinstance(data, bytes):
+            chunks = (data,)
+        elif isinstance(data, SpooledLiteral):
+            chunks = data.chunks()
+        else:
+            chunks = (data[pos:pos + SPOOL_CHUNK_SIZE].tobytes()
+                      for pos in range(0, len(data), SPOOL_CHUNK_SIZE))
+        head = b''
+        for chunk in chunks:
+            head += chunk
+            end = _header_end(head)
+            if end >= 0:
+                return head[:end]
+        return head
+
+    @property
+    def headers(self) -> EmailMessage:
+        """Parsed headers. Body is not parsed.
+
+        :return: EmailMessage without payload
+        """
+        if self.__message is not None:
+            return self.__message
+        if self.__headers is None:
+            self.__headers = parse_email_headers(self.header_bytes())
+        return self.__headers
+
+    def __getitem__(self, name: str) -> Any:
+        return self.headers[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.headers
+
+    def get(self, name: str, default=None) -> Any:
+        """Header value
+
+        :param name: header name
+        :param default: value if header is not present
+        :return: header value
+        """
+        return self.headers.get(name, default)
+
+    @property
+    def message(self) -> EmailMessage:
+        """Parsed message. Parsed once on first access.
+
+        :return: EmailMessage
+        """
+        if self.__message is None:
+            self.__message = parse_email(self.__data)
+            self.__message.uid = self.uid
+            self.__message.sequence = self.sequence
+        return self.__message
+
+    def dump(self) -> bytes:
+        """Returns email as bytes
+
+        :return: bytes
+        """
+        return self.as_bytes()
+
+
+def _header_end(data: bytes) -> int:
+    """Position after the empty line which ends message headers
+
+    :param data: bytes
+    :return: int or -1 if the empty line was not found
+    """
+    positions = [pos + len(sep) for sep in (b'\r\n\r\n', b'\n\n')
+                 for pos in (data.find(sep),) if pos >= 0]
+    return min(positions) if positions else -1
+
+
 class ImapFetchedItem(dict, ImapEntity):
     """Generic class for fetched item from imap
     
@@ -148,12 +262,17 @@ class ImapFetchedItem(dict, ImapEntity):
         for key, value in seq:
             self[key] = value
 
+    def __reduce__(self):
+        # values are built already, unpickling must not run them through
+        # __setitem__ again
+        return _restore_fetched_item, (self.__class__, dict.copy(self))
+
     def __setitem__(self, key, value):
         if isinstance(value, dict):
             for item in list(value.keys()):
                 if isinstance(item, int):
                     if item == 0:
-                        value[item] = parse_email(value[item])
+                        value[item] = self._build_message(value[item])
                     continue
                 if 'BODYSTRUCTURE' in value:
                     super().__setitem__('BODYSTRUCTURE',
@@ -167,16 +286,26 @@ class ImapFetchedItem(dict, ImapEntity):
         elif 'RFC822.HEADER' == key:
             self.__proccess_header(value)
         elif 'RFC822' == key:
-            super().__setitem__(key, parse_email(value))
+            super().__setitem__(key, self._build_message(value))
         else:
             super().__setitem__(key, value)
 
+    def _build_message(self, value: Any) -> Any:
+        """Builds value of RFC822 and BODY[]
+
+        :param value: bytes, memoryview or SpooledLiteral
+        :return: EmailMessage or not parsed value
+        """
+        return parse_fetched_email(value)
+
     def __proccess_header(self, data: bytes):
         """Parsers email header 
         
         :param data: bytes 
         :return: 
         """
+        if isinstance(data, (memoryview, SpooledLiteral)):
+            data = data.tobytes()
         if 'HEADER' not in self:
             super().__setitem__('HEADER', parse_email_headers(data))
             return
@@ -207,11 +336,17 @@ class ImapFetchedItem(dict, ImapEntity):
 
     @property
     def email_message(self) -> EmailMessage:
-        """Returns EmailMessage object 
+        """Returns EmailMessage object. Messages fetched in zero copy mode
+        or spooled to the disk are parsed on each call.
         
         :return: 
         """
-        return self.get('RFC822', self.get_fetched_part(0))
+        message = self.get('RFC822', self.get_fetched_part(0))
+        if isinstance(message, (memoryview, SpooledLiteral)):
+            return parse_email(message)
+        if isinstance(message, RawEmailMessage):
+            return message.message
+        return message
 
     def get_fetched_part(self, num: Any):
         """
@@ -279,4 +414,200 @@ class ImapFetchedItem(dict, ImapEntity):
         return "{}".format(self.dump())
 
 
+def _restore_fetched_item(cls, data: dict) -> ImapFetchedItem:
+    """Creates fetched item from pickled data
+
+    :param cls: ImapFetchedItem or subclass
+    :param data: dict with built values
+    :return: ImapFetchedItem
+    """
+    item = cls(())
+    dict.update(item, data)
+    return item
+
+
+class _DeferredAtom(object):
+    """Raw value of an atom which is not built yet
+
+    """
+
+    __slots__ = ('key', 'atom', 'atom_data', 'value')
+
+    def __init__(self, key, atom, atom_data, value):
+        self.key = key
+        self.atom = atom
+        self.atom_data = atom_data
+        self.value = value
+
+    def build(self):
+        return self.atom.build(self.atom_data, self.value)
+
+
+class LazyImapFetchedItem(ImapFetchedItem):
+    """Fetched item which keeps raw values of expensive atoms (ENVELOPE,
+    BODYSTRUCTURE, INTERNALDATE, RFC822, BODY[]) and builds them on first
+    access. Built values are cached.
+
+    """
+
+    LAZY_ATOMS = {'ENVELOPE', 'BODYSTRUCTURE', 'INTERNALDATE', 'RFC822'}
+
+    def __init__(self, seq=None, **kwargs):
+        """
+
+        :param seq: iterable with tuples name, atom, atom data, raw value
+            see :func:pymaillib.imap.parsers.raw_atoms
+        :param kwargs:
+        """
+        super().__init__((), **kwargs)
+        for key, atom, atom_data, value in seq or ():
+            if atom is None:
+                self[key] = value
+            elif key in self.LAZY_ATOMS:
+                dict.__setitem__(self, key,
+                                 _DeferredAtom(key, atom, atom_data, value))
+            elif key == 'BODY' and atom_data.get('part') is None:
+                # BODY without section is body structure
+                dict.setdefault(self, key, {})
+                dict.__setitem__(self, 'BODYSTRUCTURE',
+                                 _DeferredAtom(key, atom, atom_data, value))
+            elif key == 'BODY' and not atom_data.get('part'):
+                # BODY[] is the whole message as RFC822, other parts are
+                # stored as is
+                dict.setdefault(self, key, {})[0] = \
+                    _DeferredAtom(key, atom, atom_data, value)
+            else:
+                self[key] = atom.build(atom_data, value)
+
+    def __resolve(self, key, value):
+        """Builds deferred value and replace it
+
+        :param key: str
+        :param value: _DeferredAtom
+        :return: built value
+        """
+        dict.__delitem__(self, key)
+        ImapFetchedItem.__setitem__(self, value.key, value.build())
+        return dict.__getitem__(self, key)
+
+    def __resolve_message(self, parts: dict) -> dict:
+        """Parses deferred BODY[] in place
+
+        :param parts: value of BODY
+        :return: parts
+        """
+        value = parts.get(0)
+        if isinstance(value, _DeferredAtom):
+            parts[0] = self._build_message(value.build()[0])
+        return parts
+
+    def __getitem__(self, key):
+        value = super().__getitem__(key)
+        if isinstance(value, _DeferredAtom):
+            return self.__resolve(key, value)
+        if key == 'BODY':
+            return self.__resolve_message(value)
+        return value
+
+    def __iter__(self):
+        # dict(), {**item} and dict.update use the C fast path which reads
+        # deferred values directly unless __iter__ is overridden, then they
+        # go through keys() and __getitem__
+        return super().__iter__()
+
+    def keys(self):
+        self.resolve()
+        return super().keys()
+
+    def get(self, key, default=None):
+        if key in self:
+            return self[key]
+        return default
+
+    def pop(self, key, *args):
+        if key in self:
+            return super().pop(key, self[key])
+        return super().pop(key, *args)
+
+    def popitem(self):
+        self.resolve()
+        return super().popitem()
+
+    def setdefault(self, key, default=None):
+        if key in self:
+            return self[key]
+        return super().setdefault(key, default)
+
+    def copy(self) -> 'LazyImapFetchedItem':
+        """Shallow copy with built values
+
+        :return: LazyImapFetchedItem
+        """
+        return _restore_fetched_item(self.__class__,
+                                     dict.copy(self.resolve()))
+
+    def __reduce__(self):
+        self.resolve()
+        return super().__reduce__()
+
+    def resolve(self) -> 'LazyImapFetchedItem':
+        """Builds all deferred values
+
+        :return: self
+        """
+        for key, value in list(super().items()):
+            if isinstance(value, _DeferredAtom):
+                self.__resolve(key, value)
+        if isinstance(dict.get(self, 'BODY'), dict):
+            self.__resolve_message(dict.__getitem__(self, 'BODY'))
+        return self
+
+    def items(self):
+        self.resolve()
+        return super().items()
+
+    def values(self):
+        self.resolve()
+        return super().values()
+
+    def __eq__(self, other):
+        if isinstance(other, LazyImapFetchedItem):
+            other.resolve()
+        return dict.__eq__(self.resolve(), other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+
+class RawImapFetchedItem(ImapFetchedItem):
+    """Fetched item which keeps RFC822 and BODY[] as RawEmailMessage
+
+    """
+
+    def _build_message(self, value: Any) -> RawEmailMessage:
+        if isinstance(value, RawEmailMessage):
+            return value
+        return RawEmailMessage(value)
+
+
+class LazyRawImapFetchedItem(LazyImapFetchedItem, RawImapFetchedItem):
+    """LazyImapFetchedItem with raw RFC822 and BODY[]
+
+    """
+
+
+def parse_fetched_email(value):
+    """Parses fetched message. Values fetched in zero copy mode (memoryview)
+    and spooled literals are kept as is until they are requested.
+
+    :param value: bytes, memoryview or SpooledLiteral
+    :return: EmailMessage, memoryview or SpooledLiteral
+    """
+    if isinstance(value, (memoryview, SpooledLiteral)):
+        return value
+    return parse_email(value)
+
+
 from ..utils import parse_email_headers, parse_email
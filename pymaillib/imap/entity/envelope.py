@@ -34,8 +34,8 @@ class Envelope(SlotBasedImapEntity):
             parse_datetime(date),
             decode_parameter_value(subj),
             *[AddressList.from_list(addr) for addr in addrs],
-            in_reply_to=in_reply,
-            message_id=msg_id
+            in_reply,
+            msg_id
         )
 
 
@@ -15,6 +15,15 @@ from ..utils import parse_datetime, decode_list_items
 from .body_structure import BodyStructure
 from .envelope import Envelope
 
+try:
+    from ..pyimapparser import build_envelope, build_body_structure
+except ImportError as _:
+    def build_envelope(value):
+        return Envelope.from_list(decode_list_items(value))
+
+    def build_body_structure(value):
+        return BodyStructure.build(decode_list_items(value))
+
 FETCH_ITEMS = {}
 __all__ = ['FETCH_ITEMS']
 
@@ -428,7 +437,7 @@ class BodyStructureFetchItem(FetchItem):
         :param value:
         :return:
         """
-        return BodyStructure.build(decode_list_items(value))
+        return build_body_structure(value)
 
 
 class BodyPeekFetchItem(BodyFetchItem):
@@ -519,7 +528,7 @@ class EnvelopeFetchItem(FetchItem):
         :param value:
         :return:
         """
-        return Envelope.from_list(decode_list_items(value))
+        return build_envelope(value)
 
 
 class FlagsFetchItem(FetchItem):
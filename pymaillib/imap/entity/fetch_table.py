@@ -0,0 +1,386 @@
+# -*- coding: utf-8 -*-
+"""
+    Imap Fetch Result Table
+    ~~~~~~~~~~~~~~~~
+    Columnar storage for scalar FETCH atoms (UID, FLAGS, RFC822.SIZE,
+    INTERNALDATE). Values of all messages are kept in arrays so scanning
+    of big folders does not create dictionary and datetime per message.
+
+    :copyright: (c) 2017 WTFPL.
+    :license: WTFPL, see LICENSE for more details.
+"""
+from array import array
+from datetime import date, datetime, timezone
+
+from typing import Any, Callable, Dict, Iterable, Iterator
+
+from ..exceptions import ImapRuntimeError, ImapInvalidArgument
+from ..utils import parse_datetime, get_timezone, decode_list_items
+
+try:
+    import numpy
+except ImportError as _:
+    numpy = None
+
+# column name: array type code
+COLUMNS = {
+    'seq': 'I',
+    'uid': 'I',
+    'size': 'I',
+    'internaldate': 'q',
+    'tz_offset': 'h',
+    'flags': 'I',
+}
+
+# FETCH atom: columns filled from its value
+ATOM_COLUMNS = {
+    b'UID': ('uid',),
+    b'RFC822.SIZE': ('size',),
+    b'INTERNALDATE': ('internaldate', 'tz_offset'),
+    b'FLAGS': ('flags',),
+}
+
+# 1970-01-01
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+DATE_PERIODS = {
+    'year': lambda day: day.year,
+    'month': lambda day: (day.year, day.month),
+    'day': lambda day: day,
+}
+
+
+def group_indexes(values: Iterable, key: Callable[[Any], Any]=None) \
+        -> Dict[Any, array]:
+    """Groups positions of values by value
+
+    :param values: iterable
+    :param key: callable called once for each distinct value
+    :return: dict key: array with indexes
+    """
+    groups = {}
+    keys = {}
+    for index, value in enumerate(values):
+        if key is not None:
+            try:
+                value = keys[value]
+            except KeyError as _:
+                keys[value] = value = key(value)
+        try:
+            groups[value].append(index)
+        except KeyError as _:
+            groups[value] = array('I', (index,))
+    return groups
+
+
+class FetchResultTable(object):
+    """Table with a column per scalar FETCH atom. Missing values are stored
+    as 0.
+
+    Columns:
+        seq - message sequence number
+        uid - UID
+        size - RFC822.SIZE
+        internaldate - INTERNALDATE as seconds since epoch
+        tz_offset - INTERNALDATE timezone offset in minutes
+        flags - index in :attr:flag_sets. Each distinct set of flags is
+            stored once
+
+    ::
+        >>> table.sum('size', table.group_by_date(period='year'))
+        {2015: 1024, 2016: 35678}
+
+    """
+
+    __slots__ = ('__columns', '__flag_sets', '__flag_ids', '__fillers')
+
+    def __init__(self, columns: Iterable[str]=('seq', 'uid')):
+        """
+
+        :param columns: names of the columns from COLUMNS
+        """
+        self.__columns = {}
+        for name in columns:
+            if name not in COLUMNS:
+                raise ImapInvalidArgument('columns', name)
+            self.__columns[name] = array(COLUMNS[name])
+        self.__flag_sets = []
+        self.__flag_ids = {}
+        self.__fillers = []
+        converters = {
+            b'UID': None,
+            b'RFC822.SIZE': None,
+            b'INTERNALDATE': self.__timestamp,
+            b'FLAGS': self.__flags_id,
+        }
+        for atom, names in ATOM_COLUMNS.items():
+            if any(name in self.__columns for name in names):
+                self.__fillers.append((atom, converters[atom], [
+                    self.__columns.get(name, array(COLUMNS[name]))
+                    for name in names
+                ]))
+
+    @staticmethod
+    def for_atoms(names: Iterable[bytes]) -> 'FetchResultTable':
+        """Creates table with columns for FETCH response items
+
+        Raises:
+            ImapInvalidArgument - if atom can't be stored in the table
+
+        :param names: list of bytes e.g. FetchQueryBuilder.response_items()
+        :return: FetchResultTable
+        """
+        columns = ['seq']
+        for name in names:
+            if name not in ATOM_COLUMNS:
+                raise ImapInvalidArgument('names', name)
+            columns.extend(ATOM_COLUMNS[name])
+        return FetchResultTable(dict.fromkeys(columns))
+
+    @property
+    def columns(self) -> tuple:
+        """Names of the columns
+
+        :return: tuple
+        """
+        return tuple(self.__columns)
+
+    @property
+    def flag_sets(self) -> list:
+        """Distinct sets of flags referenced by flags column
+
+        :return: list of frozenset
+        """
+        return self.__flag_sets
+
+    @property
+    def nbytes(self) -> int:
+        """Memory used by the columns
+
+        :return: int
+        """
+        return sum(len(column) * column.itemsize
+                   for column in self.__columns.values())
+
+    def __len__(self) -> int:
+        for column in self.__columns.values():
+            return len(column)
+        return 0
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.__columns
+
+    def __repr__(self):
+        return '<{} columns={} rows={}>'.format(self.__class__.__name__,
+                                                list(self.__columns),
+                                                len(self))
+
+    def column(self, name: str) -> array:
+        """Values of the column
+
+        :param name: column name
+        :return: array
+        """
+        try:
+            return self.__columns[name]
+        except KeyError as _:
+            raise ImapInvalidArgument('name', name)
+
+    def append(self, seq: int, items: list):
+        """Adds message from tokenized FETCH response
+
+        :param seq: message sequence number
+        :param items: flat list of atom names and values
+        """
+        atoms = dict(zip(items[0::2], items[1::2]))
+        if 'seq' in self.__columns:
+            self.__columns['seq'].append(seq)
+        for atom, convert, columns in self.__fillers:
+            value = atoms.get(atom)
+            if value is None:
+                for column in columns:
+                    column.append(0)
+            elif convert is None:
+                columns[0].append(value)
+            elif len(columns) == 1:
+                columns[0].append(convert(value))
+            else:
+                for column, column_value in zip(columns, convert(value)):
+                    column.append(column_value)
+
+    @staticmethod
+    def __timestamp(value) -> tuple:
+        """Converts INTERNALDATE to seconds since epoch and offset
+
+        :param value: bytes
+        :return: tuple
+        """
+        value = parse_datetime(value)
+        if not value:
+            return 0, 0
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return int(value.timestamp()), \
+            int(value.utcoffset().total_seconds() // 60)
+
+    def __flags_id(self, value: list) -> int:
+        """Index of the flags set
+
+        :param value: list of bytes
+        :return: int
+        """
+        key = tuple(value or ())
+        try:
+            return self.__flag_ids[key]
+        except KeyError as _:
+            self.__flag_sets.append(frozenset(decode_list_items(key)))
+            return self.__flag_ids.setdefault(key, len(self.__flag_sets) - 1)
+
+    def row(self, index: int) -> dict:
+        """Values of one message. INTERNALDATE is returned as datetime and
+        FLAGS as frozenset
+
+        :param index: int
+        :return: dict
+        """
+        res = {name: column[index] for name, column
+               in self.__columns.items()}
+        if 'internaldate' in res:
+            res['internaldate'] = datetime.fromtimestamp(
+                res['internaldate'], get_timezone(res.pop('tz_offset', 0))
+            )
+        if 'flags' in res:
+            res['flags'] = self.__flag_sets[res['flags']]
+        return res
+
+    def __iter__(self) -> Iterator[dict]:
+        for index in range(len(self)):
+            yield self.row(index)
+
+    def take(self, indexes: Iterable[int]) -> 'FetchResultTable':
+        """New table with rows by indexes
+
+        :param indexes: iterable with int
+        :return: FetchResultTable
+        """
+        if not isinstance(indexes, (array, list, tuple, range)):
+            indexes = list(indexes)
+        res = FetchResultTable(self.__columns)
+        res.__flag_sets = self.__flag_sets
+        res.__flag_ids = self.__flag_ids
+        for name, column in self.__columns.items():
+            res.__columns[name].extend(map(column.__getitem__, indexes))
+        return res
+
+    def where(self, name: str, predicate: Callable[[Any], bool]) -> array:
+        """Indexes of rows for which predicate returns True. Predicate is
+        called once for each distinct value of the column.
+
+        :param name: column name
+        :param predicate: callable
+        :return: array with indexes
+        """
+        cache = {}
+        res = array('I')
+        for index, value in enumerate(self.column(name)):
+            try:
+                matched = cache[value]
+            except KeyError as _:
+                matched = cache[value] = bool(predicate(value))
+            if matched:
+                res.append(index)
+        return res
+
+    def filter(self, name: str,
+               predicate: Callable[[Any], bool]) -> 'FetchResultTable':
+        """New table with rows for which predicate returns True
+
+        :param name: column name
+        :param predicate: callable
+        :return: FetchResultTable
+        """
+        return self.take(self.where(name, predicate))
+
+    def with_flag(self, flag: str, present: bool=True) -> 'FetchResultTable':
+        """New table with messages which have (or not) the flag. Flag is
+        checked once for each distinct set of flags.
+
+        :param flag: str e.g. \\Seen
+        :param present: bool
+        :return: FetchResultTable
+        """
+        flag_sets = self.__flag_sets
+        return self.filter('flags', lambda value:
+                           (flag in flag_sets[value]) == present)
+
+    def sort(self, name: str, reverse: bool=False) -> 'FetchResultTable':
+        """New table sorted by the column
+
+        :param name: column name
+        :param reverse: bool
+        :return: FetchResultTable
+        """
+        column = self.column(name)
+        return self.take(sorted(range(len(column)), key=column.__getitem__,
+                                reverse=reverse))
+
+    def group_by(self, name: str, key: Callable[[Any], Any]=None) \
+            -> Dict[Any, array]:
+        """Indexes of rows grouped by value of the column. Key function is
+        called once for each distinct value.
+
+        :param name: column name
+        :param key: callable which converts column value to the group key
+        :return: dict key: array with indexes
+        """
+        return group_indexes(self.column(name), key)
+
+    def group_by_date(self, name: str='internaldate', period: str='day') \
+            -> Dict[Any, array]:
+        """Indexes of rows grouped by local date of the message
+
+        :param name: column with seconds since epoch
+        :param period: year (int key), month (tuple year, month key) or
+            day (date key)
+        :return: dict key: array with indexes
+        """
+        try:
+            period_key = DATE_PERIODS[period]
+        except KeyError as _:
+            raise ImapInvalidArgument('period', period)
+        column = self.column(name)
+        offsets = self.__columns.get('tz_offset')
+        if offsets:
+            days = map(lambda value, offset: (value + offset * 60) // 86400,
+                       column, offsets)
+        else:
+            days = map(lambda value: value // 86400, column)
+        return group_indexes(days, lambda day: period_key(
+            date.fromordinal(day + EPOCH_ORDINAL)
+        ))
+
+    def sum(self, name: str, groups: Dict[Any, array]=None):
+        """Sum of column values
+
+        :param name: column name
+        :param groups: result of group_by or group_by_date
+        :return: int or dict key: int
+        """
+        column = self.column(name)
+        if groups is None:
+            return sum(column)
+        return {key: sum(map(column.__getitem__, indexes))
+                for key, indexes in groups.items()}
+
+    def to_numpy(self) -> dict:
+        """Columns as numpy arrays. Data is not copied.
+
+        Raises:
+            ImapRuntimeError - if numpy is not installed
+
+        :return: dict name: numpy.ndarray
+        """
+        if numpy is None:
+            raise ImapRuntimeError('numpy is required for to_numpy')
+        return {name: numpy.frombuffer(column, dtype=column.typecode)
+                for name, column in self.__columns.items()}
@@ -8,6 +8,7 @@
     :license: WTFPL, see LICENSE for more details.
 """
 import uuid
+from collections import namedtuple
 
 from ..parsers import ResponseTokenizer
 from ..constants import IMAP4_FOLDER_SPECIAL_CHARS
@@ -15,6 +16,16 @@ from ..utf7 import imap4_utf7_decode, imap4_utf7_encode
 from ..exceptions import ImapRuntimeError
 from . import ImapEntity
 
+FolderChange = namedtuple('FolderChange', ['typ', 'number', 'data'])
+FolderChange.__doc__ = """Change of the selected folder reported by the server
+e.g. during IDLE
+
+typ - str EXISTS, RECENT, EXPUNGE or FETCH
+number - int number of messages for EXISTS and RECENT, message sequence
+    number for EXPUNGE and FETCH
+data - dict with fetched atoms e.g. FLAGS for FETCH, None for others
+"""
+
 
 class ImapFolder(ImapEntity):
     """Represents imap folder attributes
@@ -177,15 +188,18 @@ class ImapFolder(ImapEntity):
         }
 
     @staticmethod
-    def build(data: bytes) -> 'ImapFolder':
+    def build(data: bytes, literals: tuple=()) -> 'ImapFolder':
         """Construct from raw string valid ImapFolder object
 
         :param data:
+        :param literals: literal values of the response e.g. folder name
         :return: ImapFolder object
         """
 
         try:
-            raw_attributes, path, name = list(ResponseTokenizer(data, []))
+            raw_attributes, path, name = list(ResponseTokenizer(
+                data, list(literals)
+            ))
         except Exception as exp:
             raise ImapRuntimeError(b'Could not parse line: ' + data, exp)
 
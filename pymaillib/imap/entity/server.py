@@ -42,7 +42,7 @@ def from_id_command(data: dict, host: str, port: int) -> ServerInfo:
 
 class ImapNamespace(SlotBasedImapEntity):
 
-    __slots__ = {'name', 'separator'}
+    __slots__ = ('name', 'separator')
 
     @staticmethod
     def build(data):
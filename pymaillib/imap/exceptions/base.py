@@ -107,6 +107,14 @@ class ImapInvalidArgument(ImapRuntimeError):
         super().__init__(message)
 
 
+class ImapPoolTimeout(ImapRuntimeError):
+    """All connections of the pool are in use and none was released in
+    time
+
+    """
+    pass
+
+
 class ImapObjectNotFound(ImapRuntimeError):
     """Entity is not exists at IMAP server
 
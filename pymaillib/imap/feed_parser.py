@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+"""
+    Imap4 Feed Parser
+    ~~~~~~~~~~~~~~~~
+    Incremental parser for IMAP server responses. Data can be passed in
+    chunks of any size as it arrives from the transport (asyncio protocol,
+    selectors etc.)
+
+    :copyright: (c) 2017 WTFPL.
+    :license: WTFPL, see LICENSE for more details.
+"""
+import re
+from collections import namedtuple
+
+from .entity.email_message import ImapFetchedItem, LazyImapFetchedItem
+from .parsers import tokenize_atom_response, FetchDecoder
+
+CRLF = b'\r\n'
+UNTAGGED = b'*'
+CONTINUATION = b'+'
+
+ImapResponse = namedtuple('ImapResponse', ['tag', 'typ', 'data', 'literals'])
+ImapResponse.__new__.__defaults__ = ((),)
+ImapResponse.__doc__ = """Parsed server response
+
+tag - bytes command tag, b'*' for untagged responses and b'+' for
+    continuation requests
+typ - str e.g. OK, NO, FETCH, EXISTS. None for continuation requests
+data - bytes, ImapFetchedItem for FETCH responses
+literals - literal values of not FETCH responses e.g. LIST with folder name
+    sent as literal
+"""
+
+_LITERAL = re.compile(rb'\{(\d+)\+?\}$')
+_UNTAGGED_STATUS = re.compile(rb'(\d+) ([A-Za-z-]+)(?: (.*))?$', re.DOTALL)
+
+
+class ImapFeedParser(object):
+    """Push parser for IMAP responses. Tracks literals so response lines
+    are joined only after all literal octets were received.
+
+    ::
+        >>> parser = ImapFeedParser()
+        >>> parser.feed(b'* 1 FETCH (UID 10 BODY[] {5}\\r\\nHel')
+        []
+        >>> parser.feed(b'lo)\\r\\nA001 OK done\\r\\n')
+        [ImapResponse(tag=b'*', typ='FETCH', data={...}),
+         ImapResponse(tag=b'A001', typ='OK', data=b'done')]
+
+    """
+
+    __slots__ = ('__buffer', '__pos', '__parts', '__literals',
+                 '__literal_size', '__decoder', '__lazy', '__item_class')
+
+    def __init__(self, decoder: FetchDecoder=None, lazy: bool=False):
+        """
+
+        :param decoder: FetchDecoder plan for FETCH responses
+        :param lazy: build LazyImapFetchedItem for FETCH responses
+        """
+        self.__buffer = bytearray()
+        self.__pos = 0
+        self.__parts = []
+        self.__literals = []
+        self.__literal_size = None
+        self.set_fetch_options(decoder, lazy)
+
+    def set_fetch_options(self, decoder: FetchDecoder=None, lazy: bool=False,
+                          item_class: type=None):
+        """Changes how next FETCH responses are built e.g. when connection
+        sends FETCH command with other query
+
+        :param decoder: FetchDecoder plan for FETCH responses
+        :param lazy: build LazyImapFetchedItem for FETCH responses
+        :param item_class: ImapFetchedItem subclass, depends on lazy if it's
+            None
+        """
+        self.__decoder = decoder
+        self.__lazy = lazy
+        if item_class is None:
+            item_class = LazyImapFetchedItem if lazy else ImapFetchedItem
+        self.__item_class = item_class
+
+    @property
+    def pending(self) -> bool:
+        """Is some not complete response in the buffer
+
+        :return: bool
+        """
+        return bool(self.__parts) or self.__pos < len(self.__buffer)
+
+    def feed(self, data: bytes) -> list:
+        """Adds received data and parses all complete responses
+
+        :param data: bytes
+        :return: list of ImapResponse
+        """
+        buffer = self.__buffer
+        buffer += data
+        responses = []
+        while True:
+            if self.__literal_size is not None:
+                end = self.__pos + self.__literal_size
+                if end > len(buffer):
+                    break
+                self.__literals.append(bytes(buffer[self.__pos:end]))
+                self.__literal_size = None
+                self.__pos = end
+                continue
+
+            end = buffer.find(CRLF, self.__pos)
+            if end < 0:
+                break
+            line = bytes(buffer[self.__pos:end])
+            self.__pos = end + 2
+            self.__parts.append(line)
+            match = _LITERAL.search(line)
+            if match:
+                self.__literal_size = int(match.group(1))
+                continue
+            responses.append(self.__response(b''.join(self.__parts),
+                                             self.__literals))
+            self.__parts = []
+            self.__literals = []
+
+        # drop parsed data only once per chunk
+        del buffer[:self.__pos]
+        self.__pos = 0
+        return responses
+
+    def __response(self, line: bytes, literals: list) -> ImapResponse:
+        """Creates response from complete line
+
+        :param line: bytes response without CRLF
+        :param literals: list
+        :return: ImapResponse
+        """
+        tag, _, rest = line.partition(b' ')
+        if tag == CONTINUATION:
+            return ImapResponse(tag, None, rest)
+
+        if tag != UNTAGGED:
+            typ, _, rest = rest.partition(b' ')
+            return ImapResponse(tag, typ.decode().upper(), rest)
+
+        match = _UNTAGGED_STATUS.match(rest)
+        if not match:
+            typ, _, rest = rest.partition(b' ')
+            return ImapResponse(tag, typ.decode().upper(), rest,
+                                tuple(literals))
+
+        typ = match.group(2).decode().upper()
+        if typ == 'FETCH':
+            line = match.group(1) + b' ' + (match.group(3) or b'')
+            return ImapResponse(tag, typ, self.__item_class(
+                tokenize_atom_response(line, literals, self.__lazy,
+                                       self.__decoder)
+            ))
+        return ImapResponse(tag, typ, match.group(1), tuple(literals))
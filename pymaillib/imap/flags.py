@@ -0,0 +1,252 @@
+# -*- coding: utf-8 -*-
+"""
+    Imap4 Message Flags
+    ~~~~~~~~~~~~~~~~
+    Compact representation of message flags. System flags and keywords are
+    mapped to bit positions by FlagRegistry so flags of a message are stored
+    as one int.
+
+    :copyright: (c) 2017 WTFPL.
+    :license: WTFPL, see LICENSE for more details.
+"""
+from collections.abc import Set
+from threading import Lock
+
+from typing import AnyStr, Iterable, Iterator
+
+from .constants import FLAG_SEEN, FLAG_ANSWERED, FLAG_FLAGGED, \
+    FLAG_DELETED, FLAG_DRAFT, FLAG_RECENT
+
+# have the same bits in every registry
+SYSTEM_FLAGS = (FLAG_SEEN, FLAG_ANSWERED, FLAG_FLAGGED, FLAG_DELETED,
+                FLAG_DRAFT, FLAG_RECENT)
+
+
+class FlagRegistry(object):
+    """Maps flags to bits. System flags have fixed bits, keywords get next
+    free bit when they are seen first time. Flags are compared case
+    insensitive.
+
+    Registry can be used as FETCH item builder for FLAGS
+    see :class:pymaillib.imap.parsers.FetchDecoder
+
+    """
+
+    __slots__ = ('__bits', '__names', '__lock')
+
+    def __init__(self, flags: Iterable[AnyStr]=()):
+        """
+
+        :param flags: flags to register e.g. PERMANENTFLAGS of the folder
+        """
+        self.__bits = {}
+        self.__names = []
+        self.__lock = Lock()
+        for flag in SYSTEM_FLAGS:
+            self.bit(flag)
+        for flag in flags:
+            self.bit(flag)
+
+    def __len__(self) -> int:
+        return len(self.__names)
+
+    def __repr__(self) -> str:
+        return '{}({})'.format(self.__class__.__name__, self.__names)
+
+    def __reduce__(self):
+        return FlagRegistry, (tuple(self.__names),)
+
+    def bit(self, flag: AnyStr) -> int:
+        """Mask of the flag. Flag is registered if it is unknown
+
+        :param flag: str or bytes
+        :return: int
+        """
+        if isinstance(flag, (bytes, bytearray)):
+            flag = flag.decode(errors='replace')
+        key = flag.lower()
+        try:
+            return self.__bits[key]
+        except KeyError as _:
+            pass
+        with self.__lock:
+            if key not in self.__bits:
+                bit = 1 << len(self.__names)
+                self.__names.append(flag)
+                # tokenized responses contain bytes
+                self.__bits[key.encode(errors='replace')] = bit
+                self.__bits[key] = bit
+        return self.__bits[key]
+
+    def find(self, flag: AnyStr) -> int:
+        """Mask of the flag without registering it
+
+        :param flag: str or bytes
+        :return: int, 0 if flag is unknown
+        """
+        try:
+            return self.__bits.get(flag.lower(), 0)
+        except AttributeError as _:
+            return 0
+
+    def mask(self, flags: Iterable[AnyStr]) -> int:
+        """Bitmask of the flags
+
+        :param flags: iterable with str or bytes
+        :return: int
+        """
+        if isinstance(flags, Flags) and flags.registry is self:
+            return flags.mask
+        res = 0
+        bits = self.__bits
+        for flag in flags:
+            try:
+                res |= bits[flag.lower()]
+            except (KeyError, TypeError) as _:
+                res |= self.bit(flag)
+        return res
+
+    def known_mask(self, flags: Iterable[AnyStr]) -> int:
+        """Bitmask of the flags without registering unknown ones. Unknown
+        flags are not set in any Flags of the registry, so they can be
+        skipped e.g. for intersection or difference.
+
+        :param flags: iterable with str or bytes
+        :return: int
+        """
+        if isinstance(flags, Flags) and flags.registry is self:
+            return flags.mask
+        res = 0
+        for flag in flags:
+            res |= self.find(flag)
+        return res
+
+    def names(self, mask: int) -> Iterator[str]:
+        """Names of the flags in the mask
+
+        :param mask: int
+        :return: generator
+        """
+        names = self.__names
+        pos = 0
+        while mask:
+            if mask & 1:
+                yield names[pos]
+            mask >>= 1
+            pos += 1
+
+    def flags(self, flags: Iterable[AnyStr]=()) -> 'Flags':
+        """Creates Flags
+
+        :param flags: iterable with str or bytes
+        :return: Flags
+        """
+        return Flags(self, self.mask(flags))
+
+    def build(self, atom_data, value) -> 'Flags':
+        """Same as FlagsFetchItem.build but returns Flags
+
+        :param atom_data:
+        :param value: list of bytes
+        :return: Flags
+        """
+        return Flags(self, self.mask(value or ()))
+
+
+class Flags(Set):
+    """Immutable set of message flags stored as bitmask
+
+    ::
+        >>> registry = FlagRegistry()
+        >>> flags = registry.flags([b'\\\\Seen', b'$Label1'])
+        >>> '\\\\seen' in flags
+        True
+        >>> flags.diff(registry.flags(['\\\\Seen']))
+        Flags(['$Label1'])
+
+    """
+
+    __slots__ = ('registry', 'mask')
+
+    def __init__(self, registry: FlagRegistry, mask: int=0):
+        """
+
+        :param registry: FlagRegistry
+        :param mask: int
+        """
+        self.registry = registry
+        self.mask = mask
+
+    def __contains__(self, flag: AnyStr) -> bool:
+        return bool(self.mask & self.registry.find(flag))
+
+    def __iter__(self) -> Iterator[str]:
+        return self.registry.names(self.mask)
+
+    def __len__(self) -> int:
+        return bin(self.mask).count('1')
+
+    def __bool__(self) -> bool:
+        return bool(self.mask)
+
+    def __int__(self) -> int:
+        return self.mask
+
+    def __repr__(self) -> str:
+        return '{}({})'.format(self.__class__.__name__, list(self))
+
+    def __str__(self) -> str:
+        return '({})'.format(' '.join(self))
+
+    def _from_iterable(self, iterable: Iterable[AnyStr]) -> 'Flags':
+        return Flags(self.registry, self.registry.known_mask(iterable))
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, Flags) and other.registry is self.registry:
+            return self.mask == other.mask
+        return super().__eq__(other)
+
+    __hash__ = Set._hash
+
+    def __and__(self, other) -> 'Flags':
+        if not isinstance(other, Iterable):
+            return NotImplemented
+        return Flags(self.registry,
+                     self.mask & self.registry.known_mask(other))
+
+    def __or__(self, other) -> 'Flags':
+        if not isinstance(other, Iterable):
+            return NotImplemented
+        return Flags(self.registry, self.mask | self.registry.mask(other))
+
+    def __sub__(self, other) -> 'Flags':
+        if not isinstance(other, Iterable):
+            return NotImplemented
+        return Flags(self.registry,
+                     self.mask & ~self.registry.known_mask(other))
+
+    def __rsub__(self, other) -> 'Flags':
+        if not isinstance(other, Iterable):
+            return NotImplemented
+        # flags of other are in the result, so they are registered
+        return Flags(self.registry, self.registry.mask(other) & ~self.mask)
+
+    def __xor__(self, other) -> 'Flags':
+        if not isinstance(other, Iterable):
+            return NotImplemented
+        return Flags(self.registry, self.mask ^ self.registry.mask(other))
+
+    __rand__ = __and__
+    __ror__ = __or__
+    __rxor__ = __xor__
+
+    def diff(self, other: Iterable[AnyStr]) -> 'Flags':
+        """Flags which are set only in one of the sets
+
+        :param other: Flags or iterable with flags
+        :return: Flags
+        """
+        return self ^ other
+
+    def __reduce__(self):
+        return Flags, (self.registry, self.mask)
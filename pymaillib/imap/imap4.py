@@ -8,13 +8,20 @@
     :license: WTFPL, see LICENSE for more details.
 """
 import imaplib
+import io
+import mmap
+import re
+import select
 import socket
+import ssl
+import zlib
 
 import collections
+from tempfile import SpooledTemporaryFile
 
 from datetime import datetime
 
-from typing import Any
+from typing import Any, Iterator, Tuple, List
 
 from .exceptions.base import ImapClientError, ImapClientAbort, \
     ImapClientReadOnlyError, ImapByeByeException, ImapRuntimeError
@@ -22,6 +29,14 @@ from .exceptions.base import ImapClientError, ImapClientAbort, \
 imaplib.IMAP4.error = ImapClientError
 imaplib.IMAP4.abort = ImapClientAbort
 imaplib.IMAP4.readonly = ImapClientReadOnlyError
+# RFC 2177, imaplib does not know IDLE command
+imaplib.Commands.setdefault('IDLE', ('AUTH', 'SELECTED'))
+# RFC 4978
+imaplib.Commands.setdefault('COMPRESS', ('AUTH', 'SELECTED'))
+
+
+# size of one read from the connection when literal is spooled
+SPOOL_CHUNK_SIZE = 1 << 16
 
 
 def _profile(func):
@@ -39,14 +54,381 @@ def _profile(func):
     return wrapper
 
 
-class IMAP4(imaplib.IMAP4):
+def wait_readable(imap_obj: imaplib.IMAP4, timeout: float) -> bool:
+    """Waits until server response can be read from the connection without
+    blocking
+
+    :param imap_obj: imaplib.IMAP4
+    :param timeout: seconds
+    :return: False if nothing arrived in timeout seconds
+    """
+    sock = getattr(imap_obj, 'sock', None)
+    file = getattr(imap_obj, 'file', None)
+    if sock is None or not hasattr(file, 'peek'):
+        # e.g. IMAP4Stream, reading blocks until response arrives
+        return True
+    # data could be buffered by previous reads already, so socket is not
+    # readable. Non blocking peek does not wait and does not break the file
+    # as socket timeout does.
+    sock_timeout = sock.gettimeout()
+    sock.setblocking(False)
+    try:
+        if file.peek(1):
+            return True
+    except (BlockingIOError, ssl.SSLWantReadError) as _:
+        pass
+    finally:
+        sock.settimeout(sock_timeout)
+    return bool(select.select([sock], [], [], max(timeout, 0))[0])
+
+
+class SpooledLiteral(object):
+    """Literal value which is bigger than `literal_spool_size` option of
+    the imap config. First `literal_spool_size` octets are kept in memory
+    and the rest is written to temporary file while literal is read from
+    the connection, so memory usage does not depend on message size.
+
+    ::
+        >>> with open('message.eml', 'wb') as out_file:
+        ...     for chunk in literal.chunks():
+        ...         out_file.write(chunk)
+
+    """
+
+    __slots__ = ('__file', '__size')
+
+    def __init__(self, max_memory: int):
+        """
+
+        :param max_memory: octets kept in memory before data is written to
+            the disk
+        """
+        self.__file = SpooledTemporaryFile(max_size=max_memory)
+        self.__size = 0
+
+    def __len__(self) -> int:
+        return self.__size
+
+    def __repr__(self) -> str:
+        # do not dump whole message into error messages
+        return '<{} size={}>'.format(self.__class__.__name__, self.__size)
+
+    def __bytes__(self) -> bytes:
+        return self.tobytes()
+
+    def __reduce__(self):
+        # executors send values to other processes as bytes
+        return bytes, (self.tobytes(),)
+
+    def __enter__(self) -> 'SpooledLiteral':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def write(self, data: bytes) -> int:
+        """Appends data to the literal
+
+        :param data: bytes
+        :return: number of written octets
+        """
+        self.__file.seek(0, 2)
+        self.__size += len(data)
+        return self.__file.write(data)
+
+    def read(self, size: int=-1) -> bytes:
+        """Reads from current position. Literal is used as file-like
+        object e.g. by email parser.
+
+        :param size: number of octets, all if it's negative
+        :return: bytes
+        """
+        return self.__file.read(size)
+
+    def seek(self, offset: int, whence: int=0) -> int:
+        """Changes position for :meth:read
+
+        :param offset: int
+        :param whence: same as for file.seek
+        :return: new position
+        """
+        return self.__file.seek(offset, whence)
+
+    def tell(self) -> int:
+        """Current position
+
+        :return: int
+        """
+        return self.__file.tell()
+
+    def chunks(self, size: int=SPOOL_CHUNK_SIZE) -> Iterator[bytes]:
+        """Reads the whole literal by chunks from the beginning
+
+        :param size: max size of the chunk
+        :return: generator
+        """
+        self.__file.seek(0)
+        chunk = self.__file.read(size)
+        while chunk:
+            yield chunk
+            chunk = self.__file.read(size)
+
+    def tobytes(self) -> bytes:
+        """Loads the whole literal into memory
+
+        :return: bytes
+        """
+        self.__file.seek(0)
+        return self.__file.read()
+
+    def mmap(self) -> mmap.mmap:
+        """Maps spooled data into memory read only. Temporary file is
+        created if data is still in memory.
+
+        :return: mmap.mmap
+        """
+        self.__file.rollover()
+        return mmap.mmap(self.__file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def close(self):
+        """Removes temporary file
+
+        """
+        self.__file.close()
+
+    @property
+    def closed(self) -> bool:
+        """Temporary file was removed
+
+        :return: bool
+        """
+        return self.__file.closed
+
+
+# response line which is followed by literal of RFC822 or BODY[] value
+_MESSAGE_LITERAL = re.compile(
+    rb'(?:RFC822(?:\.[A-Z]+)?|(?:BODY|BINARY)\[[^\]]*\](?:<\d+>)?) \{\d+\}$',
+    re.I
+)
+
+
+class LiteralSpoolMixin(object):
+    """Reads message literals (RFC822, BODY[...]) bigger than
+    :attr:literal_spool_size into SpooledLiteral instead of bytes. imaplib
+    reads literals with `read` so all commands get spooled values. Other
+    literals e.g. strings of ENVELOPE are decoded as text and are always
+    read into memory.
+
+    """
+
+    # 0 - keep all literals in memory
+    literal_spool_size = 0
+    # last response line, literal which follows it belongs to its last atom
+    _last_line = b''
+
+    def _get_line(self) -> bytes:
+        line = super()._get_line()
+        self._last_line = line
+        return line
+
+    def read(self, size: int) -> Any:
+        """Reads literal from the connection
+
+        :param size: number of octets
+        :return: bytes or SpooledLiteral
+        """
+        threshold = self.literal_spool_size
+        if not threshold or size <= threshold or \
+                not _MESSAGE_LITERAL.search(self._last_line):
+            return super().read(size)
+
+        literal = SpooledLiteral(threshold)
+        left = size
+        while left:
+            chunk = super().read(min(left, SPOOL_CHUNK_SIZE))
+            if not chunk:
+                literal.close()
+                raise self.abort('socket error: EOF')
+            literal.write(chunk)
+            left -= len(chunk)
+        literal.seek(0)
+        return literal
+
+
+class TransferCounters(object):
+    """Octets sent and received by one connection. `sent` and `received`
+    count IMAP protocol data, `wire_sent` and `wire_received` count octets
+    on the socket, which are compressed once COMPRESS=DEFLATE is active.
+
+    """
+
+    __slots__ = ('sent', 'received', 'wire_sent', 'wire_received')
+
+    def __init__(self):
+        self.sent = 0
+        self.received = 0
+        self.wire_sent = 0
+        self.wire_received = 0
+
+    @property
+    def compression_ratio(self) -> float:
+        """How many times received data is bigger than data on the socket
+
+        :return: float
+        """
+        if not self.wire_received:
+            return 1.0
+        return self.received / self.wire_received
+
+    def __repr__(self) -> str:
+        return '{}(sent={}, received={}, wire_sent={}, wire_received={})'\
+            .format(self.__class__.__name__, self.sent, self.received,
+                    self.wire_sent, self.wire_received)
+
+
+class SocketReader(io.RawIOBase):
+    """Raw stream of the connection which counts received octets and
+    inflates them once COMPRESS=DEFLATE is active. Like socket.SocketIO it
+    returns None if socket is non blocking and there is no data.
+
+    """
+
+    def __init__(self, sock: socket.socket, counters: TransferCounters):
+        """
+
+        :param sock: connected socket
+        :param counters: TransferCounters of the connection
+        """
+        super().__init__()
+        self.__sock = sock
+        self.__counters = counters
+        self.__inflater = None
+        self.__pending = b''
+
+    def readable(self) -> bool:
+        return True
+
+    def inflate(self, pending: bytes=b''):
+        """Inflates all data received from now on
+
+        :param pending: compressed data which was read already
+        """
+        self.__inflater = zlib.decompressobj(-zlib.MAX_WBITS)
+        self.__pending = pending
+
+    def readinto(self, buffer) -> int:
+        """Reads data into the buffer
+
+        :param buffer: writable bytes-like object
+        :return: number of octets, None if non blocking socket has no data
+        """
+        if self.__inflater is None:
+            try:
+                size = self.__sock.recv_into(buffer)
+            except (BlockingIOError, ssl.SSLWantReadError) as _:
+                return None
+            self.__counters.wire_received += size
+            self.__counters.received += size
+            return size
+
+        buffer = memoryview(buffer).cast('B')
+        while True:
+            if self.__inflater.unconsumed_tail:
+                data = self.__inflater.unconsumed_tail
+            elif self.__pending:
+                data, self.__pending = self.__pending, b''
+            else:
+                try:
+                    data = self.__sock.recv(SPOOL_CHUNK_SIZE)
+                except (BlockingIOError, ssl.SSLWantReadError) as _:
+                    return None
+                if not data:
+                    return 0
+                self.__counters.wire_received += len(data)
+            # compressed stream can contain flush blocks without data
+            data = self.__inflater.decompress(data, len(buffer))
+            if data:
+                buffer[:len(data)] = data
+                self.__counters.received += len(data)
+                return len(data)
+
+
+class CompressMixin(object):
+    """Counts transferred octets and compresses the connection with
+    COMPRESS=DEFLATE (RFC 4978) after :meth:compress.
+
+    """
+
+    # zlib compression level of sent data
+    compress_level = zlib.Z_DEFAULT_COMPRESSION
+
+    def open(self, *args, **kwargs):
+        self.counters = TransferCounters()
+        self.__compressor = None
+        super().open(*args, **kwargs)
+        self.file.close()
+        self.file = io.BufferedReader(SocketReader(self.sock, self.counters))
+
+    @property
+    def compressed(self) -> bool:
+        """COMPRESS=DEFLATE is active
+
+        :return: bool
+        """
+        return self.__compressor is not None
+
+    def compress(self):
+        """Sends COMPRESS DEFLATE and compresses all data from now on
+
+        Raises:
+            ImapClientError - if server rejected compression
+
+        """
+        if self.compressed:
+            return
+        typ, data = self._simple_command('COMPRESS', 'DEFLATE')
+        if typ != 'OK':
+            raise self.error('COMPRESS command error: {} {}'.format(typ,
+                                                                   data))
+        # server could send compressed data right after tagged response
+        sock_timeout = self.sock.gettimeout()
+        self.sock.setblocking(False)
+        try:
+            pending = self.file.peek(1)
+        finally:
+            self.sock.settimeout(sock_timeout)
+        pending = self.file.read(len(pending))
+        self.counters.received -= len(pending)
+
+        reader = SocketReader(self.sock, self.counters)
+        reader.inflate(pending)
+        self.file = io.BufferedReader(reader)
+        self.__compressor = zlib.compressobj(self.compress_level,
+                                             zlib.DEFLATED, -zlib.MAX_WBITS)
+
+    def send(self, data: bytes):
+        """Sends data compressing it if COMPRESS=DEFLATE is active
+
+        :param data: bytes
+        """
+        self.counters.sent += len(data)
+        if self.__compressor is not None:
+            data = self.__compressor.compress(data) + \
+                self.__compressor.flush(zlib.Z_SYNC_FLUSH)
+        self.counters.wire_sent += len(data)
+        super().send(data)
+
+
+class IMAP4(LiteralSpoolMixin, CompressMixin, imaplib.IMAP4):
 
     def __init__(self, host: Any, port: int, timeout: int=60):
         self._timeout = timeout
         super().__init__(host, port)
 
-    def _create_socket(self):
-        return socket.create_connection((self.host, self.port), self._timeout)
+    def _create_socket(self, timeout: float=None):
+        # imaplib passes timeout since python 3.9
+        return socket.create_connection((self.host, self.port),
+                                        timeout or self._timeout)
 
     def _check_bye(self):
         try:
@@ -68,15 +450,15 @@ class IMAP4(imaplib.IMAP4):
             return item
 
 
-class IMAP4SSL(imaplib.IMAP4_SSL):
+class IMAP4SSL(LiteralSpoolMixin, CompressMixin, imaplib.IMAP4_SSL):
 
     def __init__(self, host: Any, port: int, keyfile=None, certfile=None,
                  ssl_context=None, timeout: int=60):
         self._timeout = timeout
         super().__init__(host, port, keyfile, certfile, ssl_context)
 
-    def _create_socket(self):
-        sock = IMAP4._create_socket(self)
+    def _create_socket(self, timeout: float=None):
+        sock = IMAP4._create_socket(self, timeout)
         try:
             return self.ssl_context.wrap_socket(sock,
                                                 server_hostname=self.host)
@@ -84,7 +466,263 @@ class IMAP4SSL(imaplib.IMAP4_SSL):
             raise ImapRuntimeError(excp)
 
 
-class IMAP4Stream(imaplib.IMAP4_stream):
+class IMAP4Stream(LiteralSpoolMixin, imaplib.IMAP4_stream):
 
     def __init__(self, command: str):
         super().__init__(command=command.replace('stream:/', '', 1))
+
+
+class ImapResponseReader(object):
+    """Reads responses for a tagged command directly from the connection
+    instead of letting imaplib buffer all of them in `untagged_responses`.
+
+    Untagged responses of the requested types are yielded one by one as soon
+    as they were read completely (including all literals) and all others are
+    stored as imaplib does it. Status of the tagged response is available in
+    :attr:result once iteration is finished.
+
+    """
+
+    def __init__(self, imap_obj: imaplib.IMAP4, tag: bytes,
+                 types: tuple=('FETCH',)):
+        """
+
+        :param imap_obj: imaplib.IMAP4
+        :param tag: tag of the command returned by imaplib
+        :param types: untagged response types to yield
+        """
+        self._imap_obj = imap_obj
+        self._tag = tag
+        self._types = types
+        self.result = None
+
+    @property
+    def done(self) -> bool:
+        """Tagged response for the command was received
+
+        :return: bool
+        """
+        return self.result is not None
+
+    def read_literal(self, size: int) -> Any:
+        """Reads literal value from the connection
+
+        :param size: int
+        :return: bytes
+        """
+        return self._imap_obj.read(size)
+
+    def __iter__(self) -> Iterator[Tuple[str, bytes, List[Any]]]:
+        imap_obj = self._imap_obj
+        while not self.done:
+            line = imap_obj._get_line()
+            if imap_obj._match(imap_obj.tagre, line):
+                self._tagged_response(imap_obj.mo)
+                continue
+
+            dat2 = None
+            if not imap_obj._match(imaplib.Untagged_response, line):
+                if imap_obj._match(imap_obj.Untagged_status, line):
+                    dat2 = imap_obj.mo.group('data2')
+
+            if imap_obj.mo is None:
+                if imap_obj._match(imaplib.Continuation, line):
+                    continue
+                raise imap_obj.abort('unexpected response: %r' % line)
+
+            typ = str(imap_obj.mo.group('type'), imap_obj._encoding)
+            dat = imap_obj.mo.group('data') or b''
+            if dat2:
+                dat = dat + b' ' + dat2
+
+            if typ in self._types:
+                yield (typ,) + self.__read_response(dat)
+            else:
+                self.__store_response(typ, dat)
+
+    def __read_response(self, dat: bytes) -> Tuple[bytes, List[Any]]:
+        """Reads the rest of response with all literals
+
+        :param dat: first line of the response
+        :return: tuple line, literals
+        """
+        imap_obj = self._imap_obj
+        lines = []
+        literals = []
+        while imap_obj._match(imap_obj.Literal, dat):
+            literals.append(self.read_literal(int(imap_obj.mo.group('size'))))
+            lines.append(dat)
+            dat = imap_obj._get_line()
+        lines.append(dat)
+        return b''.join(lines), literals
+
+    def __store_response(self, typ: str, dat: bytes):
+        """Stores untagged response the same way as imaplib does
+
+        :param typ: str
+        :param dat: bytes
+        """
+        imap_obj = self._imap_obj
+        while imap_obj._match(imap_obj.Literal, dat):
+            size = int(imap_obj.mo.group('size'))
+            imap_obj._append_untagged(typ, (dat, imap_obj.read(size)))
+            dat = imap_obj._get_line()
+        imap_obj._append_untagged(typ, dat)
+
+        if typ in ('OK', 'NO', 'BAD') and \
+                imap_obj._match(imaplib.Response_code, dat):
+            imap_obj._append_untagged(
+                str(imap_obj.mo.group('type'), imap_obj._encoding),
+                imap_obj.mo.group('data')
+            )
+        imap_obj._check_bye()
+
+    def _tagged_response(self, match):
+        """Handles tagged response
+
+        :param match: regex match object
+        """
+        tag = match.group('tag')
+        if tag != self._tag:
+            raise self._imap_obj.abort(
+                'unexpected tagged response: {}'.format(match.group(0))
+            )
+        self._imap_obj.tagged_commands.pop(tag, None)
+        self.result = (str(match.group('type'), self._imap_obj._encoding),
+                       [match.group('data')])
+
+    def close(self):
+        """Reads and drops the rest of responses so connection can be used
+        for the next command.
+
+        """
+        for _ in self:
+            pass
+
+
+class ImapPipelineReader(ImapResponseReader):
+    """Reads responses of several tagged commands which were sent without
+    waiting for completion of the previous one. Responses are matched to
+    commands by tag. Untagged responses of the requested types belong to the
+    oldest command which is not completed yet, because servers execute
+    commands of one connection in order.
+
+    ::
+        >>> reader = ImapPipelineReader(imap_obj)
+        >>> tags = [reader.send('UID', 'FETCH', uid, '(FLAGS)')
+        ...         for uid in ('1', '2', '3')]
+        >>> while reader.in_flight:
+        ...     tag, (typ, data), responses = reader.read()
+
+    """
+
+    def __init__(self, imap_obj: imaplib.IMAP4, types: tuple=('FETCH',)):
+        """
+
+        :param imap_obj: imaplib.IMAP4
+        :param types: untagged response types to collect
+        """
+        super().__init__(imap_obj, None, types)
+        # tag -> list of untagged responses, the oldest command is first
+        self.__pending = collections.OrderedDict()
+        self.__completed = None
+
+    @property
+    def done(self) -> bool:
+        """Tagged response of some command was received
+
+        :return: bool
+        """
+        return self.__completed is not None
+
+    @property
+    def in_flight(self) -> int:
+        """Number of sent commands without tagged response
+
+        :return: int
+        """
+        return len(self.__pending)
+
+    def send(self, name: str, *args) -> bytes:
+        """Sends command without waiting for its completion
+
+        :param name: command name e.g. UID
+        :param args: command arguments
+        :return: tag of the command
+        """
+        tag = self._imap_obj._command(name, *args)
+        self.__pending[tag] = []
+        return tag
+
+    def read(self) -> Tuple[bytes, Tuple[str, list], List[Tuple[bytes,
+                                                               list]]]:
+        """Reads responses until the next command is completed
+
+        Raises:
+            ImapRuntimeError - if there is no command in flight
+
+        :return: tuple tag, result (status, data) as imaplib returns it and
+            list of untagged responses of the command as tuples line,
+            literals
+        """
+        if not self.__pending:
+            raise ImapRuntimeError('There is no command in flight')
+        self.__completed = None
+        for _, line, literals in self:
+            next(iter(self.__pending.values())).append((line, literals))
+        tag, result = self.__completed
+        return tag, result, self.__pending.pop(tag)
+
+    def _tagged_response(self, match):
+        """Handles tagged response of any command in flight
+
+        :param match: regex match object
+        """
+        tag = match.group('tag')
+        if tag not in self.__pending:
+            raise self._imap_obj.abort(
+                'unexpected tagged response: {}'.format(match.group(0))
+            )
+        self._imap_obj.tagged_commands.pop(tag, None)
+        self.__completed = tag, (str(match.group('type'),
+                                     self._imap_obj._encoding),
+                                 [match.group('data')])
+
+    def close(self):
+        """Reads and drops responses of all commands in flight so
+        connection can be used for the next command.
+
+        """
+        while self.__pending:
+            self.read()
+
+
+class ZeroCopyResponseReader(ImapResponseReader):
+    """Response reader which reads literals directly into preallocated
+    buffers and returns them as memoryview, so literal data is not copied
+    again on the way to ImapFetchedItem.
+
+    """
+
+    def read_literal(self, size: int) -> memoryview:
+        """Reads literal value from the connection into new buffer
+
+        :param size: int
+        :return: memoryview, if literal is too big SpooledLiteral or bytes
+            as :class:LiteralSpoolMixin reads it
+        """
+        threshold = getattr(self._imap_obj, 'literal_spool_size', 0)
+        file = getattr(self._imap_obj, 'file', None)
+        if threshold and size > threshold:
+            return self._imap_obj.read(size)
+        if not hasattr(file, 'readinto'):
+            return memoryview(self._imap_obj.read(size))
+
+        view = memoryview(bytearray(size))
+        pos = 0
+        while pos < size:
+            read = file.readinto(view[pos:])
+            if not read:
+                raise self._imap_obj.abort('socket error: EOF')
+            pos += read
+        return view
@@ -11,27 +11,156 @@ import warnings
 
 
 try:
-    from .pyimapparser import ResponseTokenizer, parse_atom_name, get_part
+    from .pyimapparser import ResponseTokenizer, parse_atom_name, get_part, \
+        tokenize_response
 except ImportError as _:
     warnings.warn('Failed to load c++ parser module. Using slower version'
                   ' of parser', RuntimeWarning)
-    from ._parsers import ResponseTokenizer, parse_atom_name, get_part
+    from ._parsers import ResponseTokenizer, parse_atom_name, get_part, \
+        tokenize_response
 
 from .entity.fetch_item import FETCH_ITEMS
+from .utils import build_imap_response
 
 __DEFAULT_ATOM_PARSER = FETCH_ITEMS.get(b'X-')
 
 
-def tokenize_atom_response(line: bytes, literals: list):
+def tokenize_atom_response(line: bytes, literals: list, lazy: bool=False,
+                           decoder: 'FetchDecoder'=None):
     """Converts fetch response to dictionary
 
     :param line: bytes
     :param literals: list
+    :param lazy: yield raw atoms see :func:raw_atoms
+    :param decoder: FetchDecoder plan for the query
     :return: generator
     """
     parser = ResponseTokenizer(line, literals)
-    yield 'SEQ', parser.__next__()
-    rest_items = iter(parser.__next__())
+    atoms = _atoms_func(lazy, decoder)
+    yield from atoms(parser.__next__(), parser.__next__())
+
+
+def tokenize_fetch_response(data: list, lazy: bool=False,
+                            decoder: 'FetchDecoder'=None):
+    """Converts whole fetch response from imaplib into dictionaries parsing
+    all messages in one call
+
+    :param data: list imaplib response
+    :param lazy: yield raw atoms see :func:raw_atoms
+    :param decoder: FetchDecoder plan for the query
+    :return: generator
+    """
+    atoms = _atoms_func(lazy, decoder)
+    for seq, items in tokenize_response(*build_imap_response(data)):
+        yield atoms(seq, items)
+
+
+def _atoms_func(lazy: bool, decoder: 'FetchDecoder'=None):
+    if decoder is None:
+        return raw_atoms if lazy else build_atoms
+    return decoder.raw_atoms if lazy else decoder.build_atoms
+
+
+def find_atom(name: bytes) -> tuple:
+    """Finds parser for atom name from FETCH response
+
+    :param name: bytes e.g. BODY[1]<0>
+    :return: tuple key, FetchItem class, atom data
+    """
+    name, atom_data = parse_atom_name(name)
+    return name.decode(), FETCH_ITEMS.get(name, __DEFAULT_ATOM_PARSER), \
+        atom_data
+
+
+class FetchDecoder(object):
+    """Decoding plan for FETCH responses of one query. Parsers for the atoms
+    requested by the query are found once, unexpected atoms (e.g. FLAGS sent
+    by the server after BODY[] was fetched) are dispatched as usual.
+
+    """
+
+    __slots__ = ('__plan',)
+
+    def __init__(self, names=(), flag_registry: 'FlagRegistry'=None):
+        """
+
+        :param names: atom names as they will appear in the response
+            e.g. b'BODY[HEADER]'
+        :param flag_registry: FlagRegistry to build FLAGS as Flags bitmask
+            instead of list
+        """
+        self.__plan = {}
+        for name in names:
+            self.__plan[name] = find_atom(name)
+        if flag_registry is not None:
+            # registry has the same build method as FETCH items
+            self.__plan[b'FLAGS'] = ('FLAGS', flag_registry, None)
+
+    def __contains__(self, name: bytes) -> bool:
+        return name in self.__plan
+
+    def __repr__(self) -> str:
+        return '{}({})'.format(self.__class__.__name__, list(self.__plan))
+
+    def build_atoms(self, seq: int, items: list):
+        """Same as :func:build_atoms
+
+        :param seq: int message sequence number
+        :param items: list atom names and values
+        :return: generator
+        """
+        plan = self.__plan
+        yield 'SEQ', seq
+        rest_items = iter(items)
+        for item in rest_items:
+            try:
+                key, atom, atom_data = plan[item]
+            except KeyError as _:
+                key, atom, atom_data = find_atom(item)
+            yield key, atom.build(atom_data, rest_items.__next__())
+
+    def raw_atoms(self, seq: int, items: list):
+        """Same as :func:raw_atoms
+
+        :param seq: int message sequence number
+        :param items: list atom names and values
+        :return: generator
+        """
+        plan = self.__plan
+        yield 'SEQ', None, None, seq
+        rest_items = iter(items)
+        for item in rest_items:
+            try:
+                key, atom, atom_data = plan[item]
+            except KeyError as _:
+                key, atom, atom_data = find_atom(item)
+            yield key, atom, atom_data, rest_items.__next__()
+
+
+def raw_atoms(seq: int, items: list):
+    """Finds atom parsers for parsed message without building values
+
+    :param seq: int message sequence number
+    :param items: list atom names and values
+    :return: generator with tuples name, atom, atom data, raw value
+    """
+    yield 'SEQ', None, None, seq
+    rest_items = iter(items)
+    for item in rest_items:
+        name, atom_data = parse_atom_name(item)
+        atom = FETCH_ITEMS.get(name, __DEFAULT_ATOM_PARSER)
+        yield name.decode(), atom, atom_data, rest_items.__next__()
+
+
+def build_atoms(seq: int, items: list):
+    """Builds atom values for parsed message
+
+    :param seq: int message sequence number
+    :param items: list atom names and values
+    :return: generator
+    """
+    yield 'SEQ', seq
+    rest_items = iter(items)
     for item in rest_items:
         name, atom_data = parse_atom_name(item)
         atom = FETCH_ITEMS.get(name, __DEFAULT_ATOM_PARSER)
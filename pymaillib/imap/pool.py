@@ -0,0 +1,300 @@
+# -*- coding: utf-8 -*-
+"""
+    Imap4 Connection Pool
+    ~~~~~~~~~~~~~~~~
+    Pool of ImapClient connections of one mailbox, so concurrent requests
+    of the same user do not wait for each other on one connection.
+
+    :copyright: (c) 2017 WTFPL.
+    :license: WTFPL, see LICENSE for more details.
+"""
+from contextlib import contextmanager
+from threading import Condition
+from time import monotonic
+
+from typing import Callable, Iterator, List, Tuple
+
+from .client import ImapClient
+from .entity.folder import ImapFolder
+from .exceptions.base import ImapClientAbort, ImapByeByeException, \
+    ImapInvalidArgument, ImapPoolTimeout, ImapRuntimeError
+
+
+class ImapClientPool(object):
+    """Keeps from `min_size` to `max_size` connections. Idle connections are
+    validated with NOOP before checkout if they were not used for
+    `check_interval` seconds and closed after `idle_ttl` seconds. Connection
+    which has requested folder selected already is preferred, so SELECT is
+    not sent again.
+
+    ::
+        >>> pool = ImapClientPool(mailbox.get_imap_client, max_size=4)
+        >>> with pool.connection(folder) as client:
+        ...     items = list(client.fetch(query))
+
+    """
+
+    def __init__(self, factory: Callable[[], ImapClient], min_size: int=0,
+                 max_size: int=4, timeout: float=30, idle_ttl: float=300,
+                 check_interval: float=30):
+        """
+
+        :param factory: creates new connected ImapClient
+        :param min_size: connections which are opened at once and never
+            evicted
+        :param max_size: max number of connections
+        :param timeout: default number of seconds to wait for free
+            connection
+        :param idle_ttl: idle connections are closed after this number of
+            seconds
+        :param check_interval: connections idle for longer are checked with
+            NOOP before checkout
+        """
+        if max_size < 1:
+            raise ImapInvalidArgument('max_size', max_size)
+        if not 0 <= min_size <= max_size:
+            raise ImapInvalidArgument('min_size', min_size)
+        self.__factory = factory
+        self.__min_size = min_size
+        self.__max_size = max_size
+        self.__timeout = timeout
+        self.__idle_ttl = idle_ttl
+        self.__check_interval = check_interval
+        # tuples (client, released at), recently used are at the end
+        self.__idle = []
+        self.__size = 0
+        self.__closed = False
+        self.__cond = Condition()
+        for _ in range(min_size):
+            self.__size += 1
+            self.__idle.append((self.__create(), monotonic()))
+
+    def __enter__(self) -> 'ImapClientPool':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __repr__(self) -> str:
+        return '{}(size={}, idle={}, max_size={})'.format(
+            self.__class__.__name__, self.size, self.idle, self.__max_size
+        )
+
+    @property
+    def size(self) -> int:
+        """Number of opened connections including used ones
+
+        :return: int
+        """
+        return self.__size
+
+    @property
+    def idle(self) -> int:
+        """Number of connections waiting for checkout
+
+        :return: int
+        """
+        return len(self.__idle)
+
+    @property
+    def closed(self) -> bool:
+        """Pool was closed
+
+        :return: bool
+        """
+        return self.__closed
+
+    def acquire(self, folder: ImapFolder=None,
+                timeout: float=None) -> ImapClient:
+        """Checks out connection. It must be returned with :meth:release
+
+        Raises:
+            ImapPoolTimeout - if there is no free connection after `timeout`
+            ImapRuntimeError - if pool is closed
+
+        :param folder: folder to select
+        :param timeout: seconds to wait for free connection, pool default
+            if it's None
+        :return: ImapClient
+        """
+        if timeout is None:
+            timeout = self.__timeout
+        deadline = monotonic() + timeout
+        name = folder.imap_name() if folder is not None else None
+        while True:
+            client, idle_since = self.__checkout(name, deadline)
+            if client is None:
+                try:
+                    client = self.__create()
+                except BaseException:
+                    self.__discard(None)
+                    raise
+            elif not self.__validate(client, idle_since):
+                continue
+            try:
+                if name is not None and client.selected_folder != name:
+                    with client:
+                        client.select_folder(folder)
+            except BaseException:
+                self.release(client, True)
+                raise
+            return client
+
+    def release(self, client: ImapClient, discard: bool=False):
+        """Returns connection to the pool
+
+        :param client: ImapClient from :meth:acquire
+        :param discard: close connection e.g. after network error
+        """
+        if discard or self.__closed or not client.opened:
+            self.__discard(client)
+            return
+        with self.__cond:
+            self.__idle.append((client, monotonic()))
+            self.__cond.notify()
+
+    @contextmanager
+    def connection(self, folder: ImapFolder=None,
+                   timeout: float=None) -> Iterator[ImapClient]:
+        """Checks out connection with entered context for with statement.
+        Connection is closed if it was aborted by the server.
+
+        :param folder: folder to select
+        :param timeout: seconds to wait for free connection
+        :return: ImapClient
+        """
+        client = self.acquire(folder, timeout)
+        discard = False
+        try:
+            with client:
+                yield client
+        except (ImapClientAbort, ImapByeByeException, OSError):
+            discard = True
+            raise
+        finally:
+            self.release(client, discard)
+
+    def evict(self) -> int:
+        """Closes connections which were idle longer than `idle_ttl`
+
+        :return: number of closed connections
+        """
+        with self.__cond:
+            expired = self.__expired(monotonic())
+        for client in expired:
+            client.close()
+        return len(expired)
+
+    def close(self):
+        """Closes idle connections. Used connections are closed when they are
+        released.
+
+        """
+        with self.__cond:
+            self.__closed = True
+            idle, self.__idle = self.__idle, []
+            self.__size -= len(idle)
+            self.__cond.notify_all()
+        for client, _ in idle:
+            client.close()
+
+    def __create(self) -> ImapClient:
+        """Opens new connection
+
+        :return: ImapClient
+        """
+        return self.__factory()
+
+    def __checkout(self, name: str, deadline: float) -> Tuple[ImapClient,
+                                                             float]:
+        """Takes idle connection or reserves place for the new one
+
+        :param name: imap name of the folder to select or None
+        :param deadline: monotonic time
+        :return: tuple client, idle since or None, None to create new one
+        """
+        with self.__cond:
+            while True:
+                if self.__closed:
+                    raise ImapRuntimeError('Connection pool is closed')
+                expired = self.__expired(monotonic())
+                if expired:
+                    break
+                if self.__idle:
+                    return self.__idle.pop(self.__find(name))
+                if self.__size < self.__max_size:
+                    self.__size += 1
+                    return None, None
+                remaining = deadline - monotonic()
+                if remaining <= 0:
+                    raise ImapPoolTimeout(
+                        'No free IMAP connection in {} seconds'.format(
+                            self.__timeout)
+                    )
+                self.__cond.wait(remaining)
+        # close expired connections without holding the lock and try again
+        for client in expired:
+            client.close()
+        return self.__checkout(name, deadline)
+
+    def __find(self, name: str) -> int:
+        """Index of idle connection to checkout. Lock must be held.
+
+        :param name: folder which should be selected
+        :return: int
+        """
+        if name is not None:
+            for pos in range(len(self.__idle) - 1, -1, -1):
+                if self.__idle[pos][0].selected_folder == name:
+                    return pos
+        return -1
+
+    def __expired(self, now: float) -> List[ImapClient]:
+        """Removes idle connections older than `idle_ttl` keeping
+        `min_size` connections. Lock must be held.
+
+        :param now: monotonic time
+        :return: removed connections
+        """
+        expired = []
+        # the oldest are at the beginning
+        while self.__idle and self.__size > self.__min_size and \
+                now - self.__idle[0][1] > self.__idle_ttl:
+            expired.append(self.__idle.pop(0)[0])
+            self.__size -= 1
+        return expired
+
+    def __validate(self, client: ImapClient, idle_since: float) -> bool:
+        """Checks connection which was idle for a long time. Broken
+        connection is discarded.
+
+        :param client: ImapClient
+        :param idle_since: monotonic time
+        :return: bool
+        """
+        if client.opened and \
+                monotonic() - idle_since <= self.__check_interval:
+            return True
+        try:
+            if client.opened:
+                with client:
+                    client.imaplib('noop')
+                return True
+        except Exception as _:
+            pass
+        self.__discard(client)
+        return False
+
+    def __discard(self, client: ImapClient):
+        """Closes connection and frees its place in the pool
+
+        :param client: ImapClient or None if connection was not created
+        """
+        with self.__cond:
+            self.__size -= 1
+            self.__cond.notify()
+        if client is not None:
+            try:
+                client.close()
+            except Exception as _:
+                pass
@@ -13,14 +13,19 @@ from libcpp cimport bool, int
 
 from cython.operator cimport dereference, postincrement, preincrement,\
                              predecrement
+from cpython.datetime cimport datetime_new, import_datetime
 
 
 from .exceptions import ImapResponseParserError
 
-cdef extern from "ctype.h":
+cdef extern from "ctype.h" nogil:
     int isblank ( int c )
     int isalnum ( int c )
-    int atoi (const char * str)
+    int isdigit ( int c )
+    int tolower ( int c )
+
+cdef extern from "string.h" nogil:
+    const void * memchr(const void * ptr, int value, size_t num)
 
 cdef Py_UCS4 LIST_START = '('
 cdef Py_UCS4 LIST_END = ')'
@@ -34,115 +39,400 @@ cdef Py_UCS4 SQUARE_BRACKETS_END = ']'
 cdef Py_UCS4 ESCAPING_CHAR = '\\'
 cdef Py_UCS4 END_OF_LINE = '\0'
 cdef Py_UCS4 LESS_SIGN_LINE = '<'
-cdef Py_UCS4 ESCAPEDSLASH = '\\'
-cdef Py_UCS4 DOLLAR = '$'
-cdef Py_UCS4 AMPERSAND = '&'
+
+
+cdef object END_OF_LIST = object()
 
 
 cdef class ResponseTokenizer:
-    cdef string line
+    cdef bytes line
+    cdef const char * data
+    cdef size_t size
     cdef list literals
+    cdef Py_ssize_t literal_pos
     cdef size_t list_count
     cdef size_t pos
 
-    def __init__(self, const string & line, list  literals):
+    def __init__(self, line, list  literals):
+        if not isinstance(line, bytes):
+            line = bytes(line)
         self.literals = literals
+        self.literal_pos = 0
         self.list_count = 0
         self.pos = 0
+        # scanning is done over the buffer of bytes object without copying it
         self.line = line
+        self.data = self.line
+        self.size = len(self.line)
 
     def __iter__(self):
         return self
 
     def __next__(self):
-        if not self.has_next():
+        token = self.next_token()
+        if token is END_OF_LIST:
             raise StopIteration()
+        return token
 
-        self.skipWhiteSpaces()
-
+    cdef object next_token(self):
+        self.pos = skip_blanks(self.data, self.pos, self.size)
         if not self.has_next():
-            raise StopIteration()
+            return END_OF_LIST
 
-        cdef char current = self.line.at(postincrement(self.pos))
+        cdef size_t start = self.pos
+        cdef char current = self.data[postincrement(self.pos)]
 
         if current == LIST_START:
             preincrement(self.list_count)
-            return [item for item in self]
+            return self.read_list()
         elif current == LIST_END or current == END_OF_LINE:
             predecrement(self.list_count)
-            raise StopIteration()
+            return END_OF_LIST
         elif current == DOUBLE_QUOTE or current == SINGLE_QUOTE:
-            return self.read_until(current)
+            return self.read_quoted(current)
         elif current == LITERAL_START:
-            return self.get_literal_value(self.read_until(LITERAL_END))
-        elif self.is_atom(current):
-            return self.parse_value(<bytes>current + self.read_until(WHITESPACE))
+            return self.get_literal_value(self.read_literal_size())
+        return self.parse_atom(start)
+
+    cdef list read_list(self):
+        cdef list res = []
+        token = self.next_token()
+        while token is not END_OF_LIST:
+            res.append(token)
+            token = self.next_token()
+        return res
 
-        raise ImapResponseParserError(<bytes>current)
+    cpdef list read_responses(self):
+        """Reads all pairs of sequence number and list of atoms left in the
+        line
 
-    cdef object get_literal_value(self, const string & size):
-        assert self.literals, 'Literal list is empty'
-        value = self.literals.pop(0)
-        if len(value) != atoi(size.c_str()):
+        :return: list of tuples
+        """
+        cdef list res = []
+        seq = self.next_token()
+        while seq is not END_OF_LIST:
+            res.append((seq, self.next_token()))
+            seq = self.next_token()
+        return res
+
+    cdef object get_literal_value(self, long long size):
+        assert self.literal_pos < len(self.literals), 'Literal list is empty'
+        value = self.literals[self.literal_pos]
+        self.literal_pos += 1
+        if len(value) != size:
             msg = 'Expected {} octets but got {} . ' \
                   'Value: {}'.format(size, len(value), value)
             raise ImapResponseParserError(msg)
         return value
 
-    cdef object parse_value(self, bytes val):
-        """Parse value from IMAP response
+    cdef object parse_atom(self, size_t start):
+        """Reads atom and converts it into Python value. Only one bytes
+        object is created for text atoms.
 
-        :param val:
-        :return:
+        :param start: position of the first char of the atom
+        :return: None, int or bytes
         """
-        if val.lower() == b'nil' or not val:
+        cdef long long number
+        self.pos = atom_end(self.data, start, self.size)
+        cdef TokenKind kind = atom_kind(self.data, start, self.pos, & number)
+        if kind == TOKEN_NIL:
             return None
-        if val.isdigit():
-            return int(val)
-        return val
+        if kind == TOKEN_NUMBER:
+            return number
+        value = self.data[start:self.pos]
+        # numbers too big for long long
+        if self.pos - start >= 19 and value.isdigit():
+            return int(value)
+        return value
+
+    cdef bytes read_quoted(self, char quote):
+        """Reads quoted string, escaped chars are kept as is
+
+        :param quote: quote char
+        :return: bytes
+        """
+        cdef size_t start = self.pos
+        cdef size_t end = quoted_end(self.data, start, self.size, quote)
+        self.pos = end + 1
+        return self.data[start:end]
 
     cdef bool has_next(self):
-        return self.pos < self.line.size()
+        return self.pos < self.size
 
-    cdef void skipWhiteSpaces(self):
-        while self.has_next():
-            if not isblank(self.line.at(self.pos)):
-                break
-            preincrement(self.pos)
+    cdef long long read_literal_size(self):
+        """Reads {size} of literal, position is after '{'
 
-    cdef bool is_atom(self, const char & char_):
-        return isalnum(char_) or char_ == ESCAPEDSLASH or char_ == DOLLAR or char_ == AMPERSAND
+        :return: size of literal
+        """
+        cdef long long size = literal_size(self.data, self.pos, self.size)
+        cdef const char * found = <const char *>memchr(
+            self.data + self.pos, LITERAL_END, self.size - self.pos
+        )
+        self.pos = self.size if found == NULL else found - self.data + 1
+        return size
 
-    cdef string read_until(self, const char & delim, bool append_delim=False):
-        cdef string res
-        if not self.has_next():
-            return res
-        cdef char char_ = self.line.at(self.pos)
-        cdef char prev
-        while self.has_next() or char_ != END_OF_LINE:
-            if delim == WHITESPACE:
-                if self.list_count > 0 and char_ == LIST_END:
-                    break
-                if char_ == SQUARE_BRACKETS_START:
-                    preincrement(self.pos)
-                    res.push_back(char_)
-                    res.append(self.read_until(SQUARE_BRACKETS_END, True))
-                    break
-            if char_ == delim and prev != ESCAPING_CHAR:
-                if append_delim:
-                    res.push_back(char_)
-                preincrement(self.pos)
-                break
-            res.push_back(char_)
-            prev = char_
-            preincrement(self.pos)
-            if not self.has_next():
+
+cdef inline long long literal_size(const char * data, size_t pos,
+                                   size_t size) noexcept nogil:
+    """Reads digits of literal size till '}', other chars (e.g. '+' of
+    non-synchronizing literal) are skipped
+
+    """
+    cdef long long res = 0
+    while pos < size and data[pos] != LITERAL_END:
+        if isdigit(data[pos]):
+            res = res * 10 + data[pos] - c'0'
+        preincrement(pos)
+    return res
+
+
+# chars which end an atom, '[' starts text which is part of the atom
+cdef bool ATOM_SPECIALS[256]
+ATOM_SPECIALS[<unsigned char>b' '] = True
+ATOM_SPECIALS[<unsigned char>b'\t'] = True
+ATOM_SPECIALS[<unsigned char>b')'] = True
+ATOM_SPECIALS[<unsigned char>b'['] = True
+
+
+cdef inline size_t skip_blanks(const char * data, size_t pos,
+                               size_t size) noexcept nogil:
+    while pos < size and (data[pos] == WHITESPACE or data[pos] == b'\t'):
+        preincrement(pos)
+    return pos
+
+
+cdef inline size_t atom_end(const char * data, size_t pos,
+                            size_t size) noexcept nogil:
+    """Finds end of the atom. Text in square brackets is part of the atom
+    e.g. BODY[HEADER.FIELDS (SUBJECT)]<0>
+
+    :return: position after the last char of the atom
+    """
+    cdef const char * found
+    while pos < size:
+        if ATOM_SPECIALS[<unsigned char>data[pos]]:
+            if data[pos] != SQUARE_BRACKETS_START:
+                return pos
+            found = <const char *>memchr(data + pos, SQUARE_BRACKETS_END,
+                                         size - pos)
+            if found == NULL:
+                return size
+            pos = found - data
+        preincrement(pos)
+    return size
+
+
+cdef size_t quoted_end(const char * data, size_t pos, size_t size,
+                       char quote) noexcept nogil:
+    """Finds closing quote skipping escaped chars
+
+    :return: position of the closing quote or end of line
+    """
+    cdef const char * found
+    while pos < size:
+        found = <const char *>memchr(data + pos, quote, size - pos)
+        if found == NULL:
+            return size
+        pos = found - data
+        if not is_escaped(data, pos):
+            return pos
+        preincrement(pos)
+    return size
+
+
+cdef inline bool is_escaped(const char * data, size_t pos) noexcept nogil:
+    """Odd number of backslashes before the char escapes it"""
+    cdef size_t count = 0
+    while pos > 0 and data[pos - 1] == ESCAPING_CHAR:
+        preincrement(count)
+        predecrement(pos)
+    return count % 2 == 1
+
+
+# Token tape is built without the GIL, so several connections can scan big
+# responses in parallel. Python objects are created from the tape afterwards.
+cdef enum TokenKind:
+    TOKEN_LIST_START
+    TOKEN_LIST_END
+    TOKEN_ATOM
+    TOKEN_NIL
+    TOKEN_NUMBER
+    TOKEN_QUOTED
+    TOKEN_LITERAL
+
+
+cdef struct Token:
+    TokenKind kind
+    size_t start
+    size_t end
+    long long number
+
+
+cdef struct ScanState:
+    size_t pos
+    size_t depth
+    bool done
+
+
+cdef void scan_tape(const char * data, size_t size, ScanState * state,
+                    vector[Token] & tape, size_t limit) noexcept nogil:
+    """Splits line into tokens. Same rules as in pure Python tokenizer: quoted
+    strings are kept with escaped chars, text in square brackets is part of
+    the atom, ')' outside of any list stops scanning.
+
+    Scanning stops after limit tokens, so tape stays small and can be reused
+    for the next part of the line.
+
+    """
+    cdef size_t pos = state.pos
+    cdef size_t depth = state.depth
+    cdef Token token
+    cdef char char_
+    cdef const char * found
+    tape.clear()
+    while tape.size() < limit:
+        pos = skip_blanks(data, pos, size)
+        if pos >= size:
+            state.done = True
+            break
+        char_ = data[pos]
+        token.start = pos
+        token.number = 0
+        if char_ == LIST_START:
+            token.kind = TOKEN_LIST_START
+            preincrement(depth)
+            preincrement(pos)
+        elif char_ == LIST_END:
+            if depth == 0:
+                state.done = True
                 break
-            char_ = self.line.at(self.pos)
-        return res
+            token.kind = TOKEN_LIST_END
+            predecrement(depth)
+            preincrement(pos)
+        elif char_ == DOUBLE_QUOTE or char_ == SINGLE_QUOTE:
+            token.kind = TOKEN_QUOTED
+            token.start = pos + 1
+            token.end = quoted_end(data, token.start, size, char_)
+            pos = token.end + 1
+        elif char_ == LITERAL_START:
+            token.kind = TOKEN_LITERAL
+            token.number = literal_size(data, pos + 1, size)
+            found = <const char *>memchr(data + pos, LITERAL_END, size - pos)
+            token.end = size if found == NULL else found - data
+            pos = token.end + 1
+        else:
+            pos = atom_end(data, pos, size)
+            token.end = pos
+            token.kind = atom_kind(data, token.start, pos, & token.number)
+        tape.push_back(token)
+    state.pos = pos
+    state.depth = depth
+
+
+cdef TokenKind atom_kind(const char * data, size_t start, size_t end,
+                         long long * number) noexcept nogil:
+    cdef size_t i
+    if end - start == 3 and tolower(data[start]) == b'n' and \
+            tolower(data[start + 1]) == b'i' and \
+            tolower(data[start + 2]) == b'l':
+        return TOKEN_NIL
+    # bigger numbers are converted by Python
+    if end - start >= 19:
+        return TOKEN_ATOM
+    number[0] = 0
+    for i in range(start, end):
+        if not isdigit(data[i]):
+            return TOKEN_ATOM
+        number[0] = number[0] * 10 + data[i] - c'0'
+    return TOKEN_NUMBER
+
+
+cdef class TapeBuilder:
+    """Creates Python objects from the token tape. Lists not closed in one
+    part of the tape are continued with the next one.
 
+    """
+    cdef list values
+    cdef list stack
+    cdef list current
+    cdef list literals
+    cdef Py_ssize_t literal_pos
+
+    def __init__(self, list literals):
+        self.values = []
+        self.stack = []
+        self.current = self.values
+        self.literals = literals
+        self.literal_pos = 0
+
+    cdef void build(self, const char * data, vector[Token] & tape) except *:
+        cdef list current = self.current
+        cdef Token token
+        for token in tape:
+            if token.kind == TOKEN_LIST_START:
+                self.stack.append(current)
+                value = []
+                current.append(value)
+                current = value
+                continue
+            if token.kind == TOKEN_LIST_END:
+                current = self.stack.pop()
+                continue
+            if token.kind == TOKEN_NIL:
+                value = None
+            elif token.kind == TOKEN_NUMBER:
+                value = token.number
+            elif token.kind == TOKEN_ATOM:
+                value = data[token.start:token.end]
+                # numbers too big for long long
+                if token.end - token.start >= 19 and value.isdigit():
+                    value = int(value)
+            elif token.kind == TOKEN_QUOTED:
+                value = data[token.start:token.end]
+            else:
+                value = self.literal(token.number)
+            current.append(value)
+        self.current = current
+
+    cdef object literal(self, long long size):
+        assert self.literal_pos < len(self.literals), 'Literal list is empty'
+        value = self.literals[self.literal_pos]
+        self.literal_pos += 1
+        if len(value) != size:
+            msg = 'Expected {} octets but got {} . ' \
+                  'Value: {}'.format(size, len(value), value)
+            raise ImapResponseParserError(msg)
+        return value
+
+
+# number of tokens scanned without the GIL before Python objects are created
+cdef size_t TAPE_SIZE = 4096
+
+
+def tokenize_response(bytes line, list literals):
+    """Parses whole FETCH response (all messages joined in one line) in one
+    call. Scanning is done without holding the GIL.
+
+    :param line: bytes
+    :param literals: list with literal values for all messages
+    :return: list of tuples sequence number, list of atoms
+    """
+    cdef const char * data = line
+    cdef size_t size = len(line)
+    cdef vector[Token] tape
+    cdef ScanState state
+    state.pos = 0
+    state.depth = 0
+    state.done = False
+    cdef TapeBuilder builder = TapeBuilder(literals)
+    tape.reserve(TAPE_SIZE)
+    while not state.done:
+        with nogil:
+            scan_tape(data, size, & state, tape, TAPE_SIZE)
+        builder.build(data, tape)
+    values = builder.values
+    return list(zip(values[::2], values[1::2]))
 
-#cdef size_t NOT_FOUND = string.npos
 
 cdef bool is_range_valid(const size_t & pos,const size_t & pos2, const size_t & size):
     if pos < 0 or pos2 < 0:
@@ -192,3 +482,388 @@ cpdef tuple parse_atom_name(const string & name):
     return name.substr(0, tuncate_pos), {'part': part,
                                          'transferred': transferred}
 
+
+
+# ENVELOPE and BODYSTRUCTURE builders. Entities are created directly from
+# the tokenizer output: values are decoded while they are assigned, without
+# decode_list_items copies and SlotBasedImapEntity._bulk_append. Results are
+# the same as Envelope.from_list(decode_list_items(value)) and
+# BodyStructure.build(decode_list_items(value)). Unusual number of fields is
+# passed to the entity classes as is.
+
+cdef object Envelope = None
+cdef object Address
+cdef object AddressList
+cdef object BodyStructure
+cdef object SimpleBodyPart
+cdef object MultiPartBodyPart
+cdef object MessageRFC822BodPart
+cdef object decode_parameter_value
+cdef object parse_datetime
+cdef object build_content_part
+cdef object list_to_dict
+cdef object decode_list_items
+
+
+cdef int load_entities() except -1:
+    """Entities import the parser module so they are loaded on first use"""
+    global Envelope, Address, AddressList, BodyStructure, SimpleBodyPart, \
+        MultiPartBodyPart, MessageRFC822BodPart, decode_parameter_value, \
+        parse_datetime, build_content_part, list_to_dict, decode_list_items
+    from .entity import envelope as envelope_module, \
+        body_structure as body_structure_module
+    from . import utils
+    Address = envelope_module.Address
+    AddressList = envelope_module.AddressList
+    BodyStructure = body_structure_module.BodyStructure
+    SimpleBodyPart = body_structure_module.SimpleBodyPart
+    MultiPartBodyPart = body_structure_module.MultiPartBodyPart
+    MessageRFC822BodPart = body_structure_module.MessageRFC822BodPart
+    decode_parameter_value = utils.decode_parameter_value
+    parse_datetime = utils.parse_datetime
+    build_content_part = utils.build_content_part
+    list_to_dict = utils.list_to_dict
+    decode_list_items = utils.decode_list_items
+    Envelope = envelope_module.Envelope
+    return 0
+
+
+cdef inline object decode_value(object value):
+    """Same as decode_list_items for one value"""
+    if type(value) is bytes:
+        return (<bytes>value).decode('utf-8', 'replace')
+    if value is None or type(value) is str or type(value) is int:
+        return value
+    if type(value) is list:
+        return [decode_value(item) for item in <list>value]
+    if isinstance(value, (bytes, bytearray)):
+        return value.decode(errors='replace')
+    return decode_list_items([value])[0]
+
+
+cdef dict to_dict(object items):
+    """Same as list_to_dict(decode_list_items(items))"""
+    if type(items) is not list:
+        return list_to_dict(decode_value(items))
+    cdef dict res = {}
+    cdef list values = <list>items
+    cdef Py_ssize_t i
+    for i in range(0, len(values) - 1, 2):
+        value = values[i + 1]
+        if type(value) is list:
+            value = to_dict(value)
+        else:
+            value = decode_value(value)
+        res[decode_value(values[i])] = value
+    return res
+
+
+cdef object address(object item):
+    if type(item) is not list or len(<list>item) != 4:
+        return Address(*decode_value(item))
+    name, route, mailbox, host = decode_value(item)
+    cdef object res = Address.__new__(Address)
+    res.route = route
+    res.mailbox = mailbox
+    res.host = host
+    res._display_name = name
+    res.name = decode_parameter_value(name)
+    res._username = mailbox
+    res._domain = host
+    return res
+
+
+cdef object address_list(object items):
+    if not items:
+        return AddressList([])
+    return AddressList([address(item) for item in items])
+
+
+cdef object envelope(list items):
+    if len(items) != 10:
+        return Envelope.from_list(decode_value(items))
+    cdef object res = Envelope.__new__(Envelope)
+    res.date = parse_datetime(decode_value(items[0]))
+    res.subject = decode_parameter_value(decode_value(items[1]))
+    res.from_ = address_list(items[2])
+    res.sender = address_list(items[3])
+    res.reply_to = address_list(items[4])
+    res.to = address_list(items[5])
+    res.cc = address_list(items[6])
+    res.bcc = address_list(items[7])
+    res.in_reply_to = decode_value(items[8])
+    res.message_id = decode_value(items[9])
+    return res
+
+
+def build_envelope(list items):
+    """Builds Envelope from parsed ENVELOPE value
+
+    :param items: list from tokenizer (bytes or already decoded values)
+    :return: Envelope
+    """
+    if Envelope is None:
+        load_entities()
+    return envelope(items)
+
+
+def build_body_structure(list items, index=0, bool recursive=False):
+    """Builds BodyStructure from parsed BODYSTRUCTURE value
+
+    :param items: list from tokenizer (bytes or already decoded values)
+    :param index: int or str mime id of the part
+    :param recursive: is it nested message
+    :return: BodyStructure
+    """
+    if Envelope is None:
+        load_entities()
+    return BodyStructure(body_part(items, index, recursive))
+
+
+cdef object body_part(list items, object index, bool recursive):
+    cdef list parts
+    cdef Py_ssize_t pos
+    if type(items[0]) is list:
+        parts = []
+        rest = items
+        for pos, item in enumerate(items):
+            if type(item) is not list:
+                rest = items[pos:]
+                break
+            if recursive:
+                mime_id = '{}.{}'.format(index, pos + 1)
+            else:
+                mime_id = pos + 1
+            parts.append(body_part(item, mime_id, True))
+        return MultiPartBodyPart(*decode_value(rest), mime_id=index,
+                                 parts=parts)
+
+    if index == 0 and not recursive:
+        index = 1
+    if decode_value(items[1]).lower() == 'rfc822':
+        if not 10 <= len(items) <= 15:
+            return MessageRFC822BodPart(*decode_value(items), mime_id=index)
+        part = simple_part(MessageRFC822BodPart, items, index)
+        part.envelope = envelope(items[7])
+        part.bodystructure = build_body_structure(items[8], part.mime_id,
+                                                  True)
+        part.line_count = decode_value(items[9])
+        simple_part_rest(part, items, 10)
+        return part
+
+    if not 7 <= len(items) <= 12:
+        return SimpleBodyPart(*decode_value(items), mime_id=index)
+    part = simple_part(SimpleBodyPart, items, index)
+    simple_part_rest(part, items, 7)
+    return part
+
+
+cdef object simple_part(object cls, list items, object index):
+    """Same as SimpleBodyPart.__init__ without _init_rest call"""
+    cdef object part = cls.__new__(cls)
+    main_type = decode_value(items[0])
+    subtype = decode_value(items[1])
+    cdef dict attributes = to_dict(items[2])
+    part.main_type = main_type
+    part.subtype = subtype
+    part.part_id = decode_value(items[3])
+    part.description = decode_value(items[4])
+    part.encoding = decode_value(items[5])
+    part.size = decode_value(items[6])
+    part.content_part = build_content_part(main_type, subtype)
+    part.charset = attributes.pop('charset', None)
+    part.name = decode_parameter_value(attributes.pop('name', None))
+    part.attributes = attributes
+    part.mime_id = str(index)
+    part.filename = None
+    part.md5 = None
+    return part
+
+
+cdef void simple_part_rest(object part, list items,
+                           Py_ssize_t start) except *:
+    """Same as SimpleBodyPart._init_rest for items[start:]"""
+    cdef Py_ssize_t size = len(items)
+    part.text_size = decode_value(items[start]) if start < size else None
+    md5_or_list = items[start + 1] if start + 1 < size else None
+    if type(md5_or_list) is not list:
+        part.md5 = decode_value(md5_or_list)
+    else:
+        value = to_dict(md5_or_list)
+        if value.get('attachment'):
+            part.filename = decode_parameter_value(
+                value['attachment'].pop('filename', None)
+            )
+        part.attributes = {**part.attributes, **value}
+    part.disposition = to_dict(items[start + 2] if start + 2 < size
+                               else None)
+    part.language = decode_value(items[start + 3]) if start + 3 < size \
+        else None
+    part.location = decode_value(items[start + 4]) if start + 4 < size \
+        else None
+
+
+# INTERNALDATE and ENVELOPE date parser. Handles RFC 3501 date-time
+# e.g. '11-Nov-2015 08:37:14 -0500' and RFC 2822 dates with 4 digits year
+# e.g. 'Mon, 7 Feb 1994 21:52:25 -0800 (PST)'. None is returned for any
+# other format so caller can fall back to dateutil.
+
+import_datetime()
+
+cdef object get_timezone = None
+
+cdef const char * MONTHS = b'janfebmaraprmayjunjulaugsepoctnovdec'
+
+
+cdef inline size_t skip_spaces(const char * data, size_t pos,
+                               size_t size) noexcept nogil:
+    while pos < size and isblank(data[pos]):
+        pos += 1
+    return pos
+
+
+cdef inline int read_digits(const char * data, size_t * pos, size_t size,
+                            int min_len, int max_len) noexcept nogil:
+    """Reads number with min_len..max_len digits, -1 if there is none"""
+    cdef int value = 0
+    cdef int length = 0
+    while pos[0] < size and length < max_len and isdigit(data[pos[0]]):
+        value = value * 10 + (data[pos[0]] - c'0')
+        pos[0] += 1
+        length += 1
+    if length < min_len or (pos[0] < size and isdigit(data[pos[0]])):
+        return -1
+    return value
+
+
+cdef inline int read_month(const char * data, size_t pos,
+                           size_t size) noexcept nogil:
+    cdef int month
+    if pos + 3 > size:
+        return 0
+    for month in range(12):
+        if tolower(data[pos]) == MONTHS[month * 3] and \
+                tolower(data[pos + 1]) == MONTHS[month * 3 + 1] and \
+                tolower(data[pos + 2]) == MONTHS[month * 3 + 2]:
+            return month + 1
+    return 0
+
+
+cdef inline bool is_utc_zone(const char * data, size_t pos,
+                             size_t end) noexcept nogil:
+    cdef size_t length = end - pos
+    if length == 1:
+        return tolower(data[pos]) == c'z'
+    if length == 2:
+        return tolower(data[pos]) == c'u' and tolower(data[pos + 1]) == c't'
+    if length == 3:
+        return (tolower(data[pos]) == c'u' and
+                tolower(data[pos + 1]) == c't' and
+                tolower(data[pos + 2]) == c'c') or \
+               (tolower(data[pos]) == c'g' and
+                tolower(data[pos + 1]) == c'm' and
+                tolower(data[pos + 2]) == c't')
+    return False
+
+
+def parse_date_time(value):
+    """Parses IMAP date-time to datetime
+
+    :param value: str or bytes
+    :return: datetime or None if value has other format
+    """
+    global get_timezone
+    cdef bytes line
+    cdef const char * data
+    cdef const char * comment_end
+    cdef size_t size, pos = 0, start
+    cdef int day, month, year, hour, minute, second = 0
+    cdef int offset = 0
+    cdef int sign = 0
+
+    if isinstance(value, str):
+        try:
+            line = value.encode('ascii')
+        except UnicodeEncodeError as _:
+            return None
+    else:
+        line = bytes(value)
+    data = line
+    size = len(line)
+
+    pos = skip_spaces(data, pos, size)
+    # optional day of week
+    if pos + 3 < size and not isdigit(data[pos]):
+        pos += 3
+        if data[pos] != c',':
+            return None
+        pos = skip_spaces(data, pos + 1, size)
+
+    day = read_digits(data, &pos, size, 1, 2)
+    if day < 0 or pos >= size or (data[pos] != c'-' and data[pos] != c' '):
+        return None
+    pos += 1
+    pos = skip_spaces(data, pos, size)
+    month = read_month(data, pos, size)
+    if not month:
+        return None
+    pos += 3
+    if pos >= size or (data[pos] != c'-' and data[pos] != c' '):
+        return None
+    pos += 1
+    pos = skip_spaces(data, pos, size)
+    year = read_digits(data, &pos, size, 4, 4)
+    if year < 0 or pos >= size or not isblank(data[pos]):
+        return None
+
+    pos = skip_spaces(data, pos, size)
+    hour = read_digits(data, &pos, size, 1, 2)
+    if hour < 0 or pos >= size or data[pos] != c':':
+        return None
+    pos += 1
+    minute = read_digits(data, &pos, size, 2, 2)
+    if minute < 0:
+        return None
+    if pos < size and data[pos] == c':':
+        pos += 1
+        second = read_digits(data, &pos, size, 2, 2)
+        if second < 0:
+            return None
+
+    pos = skip_spaces(data, pos, size)
+    if pos < size and (data[pos] == c'+' or data[pos] == c'-'):
+        sign = -1 if data[pos] == c'-' else 1
+        pos += 1
+        start = pos
+        offset = read_digits(data, &pos, size, 4, 4)
+        if offset < 0:
+            return None
+        offset = sign * ((offset // 100) * 60 + offset % 100)
+    elif pos < size and data[pos] != c'(':
+        start = pos
+        while pos < size and isalnum(data[pos]):
+            pos += 1
+        if not is_utc_zone(data, start, pos):
+            return None
+        sign = 1
+
+    pos = skip_spaces(data, pos, size)
+    # optional comment e.g. (PST)
+    if pos < size and data[pos] == c'(':
+        comment_end = <const char *>memchr(data + pos, c')', size - pos)
+        if comment_end == NULL:
+            return None
+        pos = skip_spaces(data, comment_end - data + 1, size)
+    if pos != size:
+        return None
+
+    tzinfo = None
+    if sign:
+        if get_timezone is None:
+            from .utils import get_timezone as _get_timezone
+            get_timezone = _get_timezone
+        tzinfo = get_timezone(offset)
+    try:
+        return datetime_new(year, month, day, hour, minute, second, 0, tzinfo)
+    except ValueError as _:
+        return None
@@ -8,10 +8,39 @@
     :copyright: (c) 2017 WTFPL.
     :license: WTFPL, see LICENSE for more details.
 """
+import re
 from typing import Tuple
 
 from . import BaseQueryBuilder
 from ...entity.fetch_item import FetchItem, FETCH_ITEMS
+from ...parsers import FetchDecoder
+
+# server returns BODY.PEEK[1]<0.100> as BODY[1]<0>
+_PEEK = re.compile(r'^BODY\.PEEK')
+_PARTIAL = re.compile(r'<(\d+)\.\d+>$')
+
+
+def split_items(items: str) -> list:
+    """Splits fetch items keeping spaces inside of square brackets
+
+    :param items: e.g. 'UID BODY[HEADER.FIELDS (TO FROM)]'
+    :return: list
+    """
+    res = []
+    depth = 0
+    start = 0
+    for index, char in enumerate(items):
+        if char == '[':
+            depth += 1
+        elif char == ']':
+            depth -= 1
+        elif char == ' ' and not depth:
+            if index > start:
+                res.append(items[start:index])
+            start = index + 1
+    if start < len(items):
+        res.append(items[start:])
+    return res
 
 
 class FetchQueryBuilder(BaseQueryBuilder):
@@ -25,6 +54,7 @@ class FetchQueryBuilder(BaseQueryBuilder):
         self.fetch_uid()
         self.__peek = False
         self.__header_items = set()
+        self.__decoder = None
 
     def add(self, *args) -> 'FetchQueryBuilder':
         """Add some data items for IMAP FETCH command
@@ -34,6 +64,7 @@ class FetchQueryBuilder(BaseQueryBuilder):
         """
         for arg in args:
             self.__items.add(str(arg))
+        self.__decoder = None
         return self
 
     def set_peek(self, value: bool) -> 'FetchQueryBuilder':
@@ -43,6 +74,7 @@ class FetchQueryBuilder(BaseQueryBuilder):
         :return: FetchQueryBuilder obj
         """
         self.__peek = value
+        self.__decoder = None
         return self
 
     def build(self) -> Tuple[str, str]:
@@ -63,6 +95,31 @@ class FetchQueryBuilder(BaseQueryBuilder):
     def __repr__(self) -> str:
         return ' '.join(self.build())
 
+    def decoder(self, flag_registry: 'FlagRegistry'=None) -> FetchDecoder:
+        """Decoding plan for responses of this query. Created once and reused
+        until query is changed.
+
+        :param flag_registry: FlagRegistry to build FLAGS as Flags
+        :return: FetchDecoder
+        """
+        if flag_registry is not None:
+            return FetchDecoder(self.response_items(), flag_registry)
+        if self.__decoder is None:
+            self.__decoder = FetchDecoder(self.response_items())
+        return self.__decoder
+
+    def response_items(self) -> list:
+        """Names of items as server will send them in FETCH response
+
+        :return: list of bytes
+        """
+        items = self.build()[-1][1:-1]
+        res = []
+        for item in split_items(items):
+            item = _PARTIAL.sub(r'<\1>', _PEEK.sub('BODY', item))
+            res.append(item.encode())
+        return res
+
     def _get_fetch_item(self, name: bytes):
         """Get item from list with available items to fetch it want raise
         exception for now if name was not found it take base class FetchItem
@@ -86,6 +143,7 @@ class FetchQueryBuilder(BaseQueryBuilder):
         :return: FetchQueryBuilder
         """
         self.__header_items.add(item)
+        self.__decoder = None
         return self
 
     def __body_item(self, peek: bool, part: str='', size: int=0,
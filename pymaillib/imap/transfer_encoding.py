@@ -0,0 +1,237 @@
+# -*- coding: utf-8 -*-
+"""
+    Imap4 Content Transfer Encoding
+    ~~~~~~~~~~~~~~~~
+    Incremental decoders for base64, quoted-printable and uuencode body
+    parts. Data is passed in chunks of any size (e.g. from partial
+    BODY.PEEK[part]<offset.size> fetches) and decoded output is written to a
+    file-like object as soon as it is available.
+
+    :copyright: (c) 2017 WTFPL.
+    :license: WTFPL, see LICENSE for more details.
+"""
+import binascii
+import string
+
+from typing import Any, Iterable
+
+BASE64_CHARS = (string.ascii_letters + string.digits + '+/=').encode()
+# everything what is not base64 alphabet (line breaks, invalid characters)
+BASE64_IGNORED = bytes(set(range(256)).difference(BASE64_CHARS))
+
+UUENCODE = ('x-uuencode', 'uuencode', 'uue', 'x-uue')
+
+
+class TransferDecoder(object):
+    """Writes data to the sink as is. Base class for all decoders
+
+    ::
+        >>> with transfer_decoder('base64', open('file.pdf', 'wb')) as dec:
+        ...     for chunk in chunks:
+        ...         dec.write(chunk)
+
+    """
+
+    __slots__ = ('_sink', '_buffer', 'written')
+
+    def __init__(self, sink: Any):
+        """
+
+        :param sink: object with write method e.g. file, BytesIO, socket
+            file
+        """
+        self._sink = sink
+        self._buffer = b''
+        self.written = 0
+
+    def __enter__(self) -> 'TransferDecoder':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.close()
+
+    def _output(self, data: bytes):
+        """Writes decoded data to the sink
+
+        :param data: bytes
+        """
+        if data:
+            self._sink.write(data)
+            self.written += len(data)
+
+    def write(self, data: bytes) -> int:
+        """Decodes chunk of encoded data
+
+        :param data: bytes, bytearray or memoryview
+        :return: number of consumed bytes
+        """
+        self._output(bytes(data))
+        return len(data)
+
+    def close(self):
+        """Decodes rest of buffered data. Sink is not closed.
+
+        """
+        self._buffer = b''
+
+
+class Base64Decoder(TransferDecoder):
+    """base64 decoder. Line breaks and invalid characters are ignored.
+    Padded parts in the middle of data (e.g. base64 encoded line by line)
+    are decoded one by one.
+
+    """
+
+    __slots__ = ()
+
+    def write(self, data: bytes) -> int:
+        size = len(data)
+        data = self._buffer + bytes(data).translate(None, BASE64_IGNORED)
+        pos = data.find(b'=')
+        while pos >= 0:
+            if pos % 4 < 2:
+                # stray padding
+                data = data[:pos] + data[pos:].lstrip(b'=')
+            else:
+                end = pos - pos % 4 + 4
+                if end > len(data):
+                    break
+                self._output(binascii.a2b_base64(data[:end]))
+                data = data[end:].lstrip(b'=')
+            pos = data.find(b'=')
+        # complete quads, padded one is waiting for the rest of padding
+        end = pos - pos % 4 if pos >= 0 else len(data) - len(data) % 4
+        if end:
+            self._output(binascii.a2b_base64(data[:end]))
+            data = data[end:]
+        self._buffer = data
+        return size
+
+    def close(self):
+        data = self._buffer.rstrip(b'=')
+        if len(data) % 4 > 1:
+            # missing padding
+            self._output(binascii.a2b_base64(
+                data + b'=' * (4 - len(data) % 4)
+            ))
+        self._buffer = b''
+
+
+class QuotedPrintableDecoder(TransferDecoder):
+    """quoted-printable decoder. Complete lines are decoded, soft line breaks
+    are joined with the next chunk.
+
+    """
+
+    __slots__ = ()
+
+    def write(self, data: bytes) -> int:
+        size = len(data)
+        data = self._buffer + bytes(data)
+        end = data.rfind(b'\n') + 1
+        if end:
+            self._output(binascii.a2b_qp(data[:end]))
+            data = data[end:]
+        self._buffer = data
+        return size
+
+    def close(self):
+        self._output(binascii.a2b_qp(self._buffer))
+        self._buffer = b''
+
+
+class UUDecoder(TransferDecoder):
+    """uuencode decoder. Data before begin line and after end line is
+    skipped. If there is no begin line data is written as is.
+
+    """
+
+    __slots__ = ('__state',)
+
+    BEGIN, BODY, END = range(3)
+
+    def __init__(self, sink: Any):
+        super().__init__(sink)
+        self.__state = self.BEGIN
+
+    def write(self, data: bytes) -> int:
+        size = len(data)
+        data = self._buffer + bytes(data)
+        start = 0
+        end = data.find(b'\n') + 1
+        while end:
+            self.__line(data[start:end])
+            start, end = end, data.find(b'\n', end) + 1
+        if self.__state == self.BEGIN:
+            # lines are kept in case begin line won't be found
+            self._buffer = data
+        else:
+            self._buffer = data[start:]
+        return size
+
+    def __line(self, line: bytes):
+        """Decodes one line
+
+        :param line: bytes
+        """
+        if self.__state == self.BEGIN:
+            fields = line.split(b' ', 2)
+            if len(fields) == 3 and fields[0] == b'begin':
+                try:
+                    int(fields[1], 8)
+                    self.__state = self.BODY
+                except ValueError as _:
+                    pass
+            return
+        if self.__state == self.END:
+            return
+        if line.strip(b' \t\r\n\f') == b'end':
+            self.__state = self.END
+            return
+        try:
+            self._output(binascii.a2b_uu(line))
+        except binascii.Error as _:
+            # workaround for broken uuencoders same as uu module does
+            nbytes = (((line[0] - 32) & 63) * 4 + 5) // 3
+            self._output(binascii.a2b_uu(line[:nbytes]))
+
+    def close(self):
+        if self.__state == self.BEGIN:
+            # not uuencoded
+            self._output(self._buffer)
+        elif self._buffer:
+            self.__line(self._buffer)
+        self._buffer = b''
+
+
+def transfer_decoder(encoding: str, sink: Any) -> TransferDecoder:
+    """Creates decoder for Content-Transfer-Encoding
+
+    :param encoding: str e.g. base64. Data with 7bit, 8bit, binary or
+        unknown encodings is written as is
+    :param sink: object with write method
+    :return: TransferDecoder
+    """
+    encoding = (encoding or '').lower()
+    if encoding == 'base64':
+        return Base64Decoder(sink)
+    if encoding == 'quoted-printable':
+        return QuotedPrintableDecoder(sink)
+    if encoding in UUENCODE:
+        return UUDecoder(sink)
+    return TransferDecoder(sink)
+
+
+def decode_stream(encoding: str, chunks: Iterable[bytes], sink: Any) -> int:
+    """Decodes all chunks into the sink
+
+    :param encoding: Content-Transfer-Encoding
+    :param chunks: iterable with bytes
+    :param sink: object with write method
+    :return: number of written bytes
+    """
+    with transfer_decoder(encoding, sink) as decoder:
+        for chunk in chunks:
+            decoder.write(chunk)
+    return decoder.written
@@ -11,13 +11,17 @@
 
 import operator
 import collections
-from datetime import datetime
+import re
+from datetime import datetime, tzinfo
 from email import policy
 from email.header import decode_header as _email_decode_header
+from email.feedparser import BytesFeedParser
 from email.parser import BytesParser, BytesHeaderParser
+from functools import lru_cache
 from typing import Any, AnyStr
 
 import dateutil.parser
+from dateutil import tz
 
 byte2int = operator.itemgetter(0)
 
@@ -100,6 +104,25 @@ def decode_list_items(data):
     return res
 
 
+@lru_cache(maxsize=1024)
+def _decode_encoded_words(value: str) -> str:
+    """Decodes RFC 2047 encoded words. Subjects, senders and attachment
+    names repeat a lot in a mailbox so results are cached
+
+    :param value: str
+    :return: str
+    """
+    res = []
+    for part, enc in _email_decode_header(value):
+        if isinstance(part, bytes):
+            if not enc:
+                enc = 'utf-8'
+            res.append(part.decode(enc, errors='replace'))
+        else:
+            res.append(part)
+    return ''.join(res)
+
+
 def decode_parameter_value(value: AnyStr):
     """Decodes strings like '=?UTF-8?Q?' into human readable string
 
@@ -112,15 +135,13 @@ def decode_parameter_value(value: AnyStr):
     if isinstance(value, (bytes, bytearray)):
         value = value.decode()
 
-    res = []
-    for part, enc in _email_decode_header(value):
-        if isinstance(part, bytes):
-            if not enc:
-                enc = 'utf-8'
-            res.append(part.decode(enc, errors='replace'))
-        else:
-            res.append(part)
-    return ''.join(res)
+    if '=?' not in value:
+        return value
+    return _decode_encoded_words(value)
+
+
+decode_parameter_value.cache_info = _decode_encoded_words.cache_info
+decode_parameter_value.cache_clear = _decode_encoded_words.cache_clear
 
 
 def build_imap_response_line(lines):
@@ -144,34 +165,125 @@ def build_imap_response_line(lines):
         yield b''.join(result), literals
 
 
+def build_imap_response(lines):
+    """Build one line from the whole imaplib response for the batch parser.
+    Messages are not separated because each of them ends with ')'.
+
+    :param lines: iterable
+    :return: tuple bytes, list with literal values of all messages
+    """
+    result = []
+    literals = []
+    for line in lines:
+        if isinstance(line, tuple):
+            line, literal = line
+            literals.append(literal)
+        if line:
+            result.append(line)
+    return b''.join(result), literals
+
+
+@lru_cache(maxsize=128)
+def get_timezone(minutes: int) -> tzinfo:
+    """Timezone objects for UTC offsets are shared between parsed dates
+
+    :param minutes: offset from UTC
+    :return: tzinfo
+    """
+    if not minutes:
+        return tz.UTC
+    return tz.tzoffset(None, minutes * 60)
+
+
+_MONTHS = {name: num for num, name in enumerate(
+    ['jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct',
+     'nov', 'dec'], 1
+)}
+
+# RFC 3501 date-time e.g. '11-Nov-2015 08:37:14 -0500' and RFC 2822 date
+# e.g. 'Mon, 7 Feb 1994 21:52:25 -0800 (PST)'
+_DATE_TIME = re.compile(
+    r'\s*(?:[a-z]{3},\s*)?(\d{1,2})[- ]+([a-z]{3})[- ]+(\d{4})\s+'
+    r'(\d{1,2}):(\d{2})(?::(\d{2}))?'
+    r'(?:\s*(?:([+-])(\d{2})(\d{2})|(gmt|utc?|z)))?\s*(?:\([^)]*\))?\s*$',
+    re.IGNORECASE
+)
+
+
+def _parse_datetime(value: str) -> datetime:
+    """Parses RFC 3501 and RFC 2822 dates with 4 digits year
+
+    :param value: str
+    :return: datetime or None if value has other format
+    """
+    match = _DATE_TIME.match(value)
+    if not match:
+        return None
+    day, month, year, hour, minute, second, sign, tz_hours, tz_minutes, \
+        utc = match.groups()
+    month = _MONTHS.get(month.lower())
+    if not month:
+        return None
+    timezone = None
+    if sign:
+        offset = int(tz_hours) * 60 + int(tz_minutes)
+        timezone = get_timezone(-offset if sign == '-' else offset)
+    elif utc:
+        timezone = get_timezone(0)
+    try:
+        return datetime(int(year), month, int(day), int(hour), int(minute),
+                        int(second or 0), tzinfo=timezone)
+    except ValueError as _:
+        return None
+
+
+try:
+    from .pyimapparser import parse_date_time
+except ImportError as _:
+    parse_date_time = _parse_datetime
+
+
 def parse_datetime(value):
-    """Parse date string from imap to datetime object
+    """Parse date string from imap to datetime object. Dates from IMAP
+    responses are parsed by fast parser, other formats by dateutil.
 
-    :param value:
-    :return:
+    :param value: str or bytes
+    :return: datetime
     """
 
     if not value:
         return None
-    return dateutil.parser.parse(value)
+    if isinstance(value, (bytes, bytearray)):
+        value = value.decode('ascii', 'replace')
+    return parse_date_time(value) or dateutil.parser.parse(value)
 
 
-def parse_email(data: bytes) -> 'EmailMessage':
+def parse_email(data: Any) -> 'EmailMessage':
     """
 
-    :param data: bytes
+    :param data: bytes, memoryview or SpooledLiteral. Spooled literals are
+        fed to the parser by chunks.
     :return: EmailMessage
     """
+    if hasattr(data, 'chunks'):
+        parser = BytesFeedParser(_factory=EmailMessage, policy=policy.strict)
+        for chunk in data.chunks():
+            parser.feed(chunk)
+        return parser.close()
+    if isinstance(data, memoryview):
+        data = data.tobytes()
     return BytesParser(_class=EmailMessage, policy=policy.strict) \
         .parsebytes(data)
 
 
-def parse_email_headers(data: bytes) -> 'EmailMessage':
+def parse_email_headers(data: Any) -> 'EmailMessage':
     """
 
-    :param data: bytes
+    :param data: bytes, memoryview or SpooledLiteral
     :return: EmailMessage
     """
+    if not isinstance(data, bytes):
+        data = data.tobytes()
     return BytesHeaderParser(_class=EmailMessage, policy=policy.default) \
         .parsebytes(data)
 
@@ -15,7 +15,9 @@ from typing import Any
 from .settings import Config
 from .user import UserCredentials
 from .imap.client import ImapClient
+from .imap.entity.folder import ImapFolder
 from .imap.exceptions import ImapReferralsException
+from .imap.pool import ImapClientPool
 
 IMAP_URL_PATTERN = rb'(?P<protocol>.+?)://(?P<username>.+?);' \
                    rb'(?P<auth>.+?)@(?P<host>.*)'
@@ -38,6 +40,7 @@ class UserMailbox(object):
         :return:
         """
         self.__imap_store = None
+        self.__imap_pool = None
         assert username, 'Username cannot be empty'
         assert password, 'Username cannot be empty'
         self.__auth_data = UserCredentials(username, password)
@@ -76,6 +79,36 @@ class UserMailbox(object):
     def get_imap_client(self):
         return self.__create_imap_connection()
 
+    def imap_pool(self) -> ImapClientPool:
+        """Creates or returns cached pool of connections. Sizes and timeouts
+        are taken from pool_* options of the imap config.
+
+        :return: ImapClientPool
+        """
+        if self.__imap_pool and not self.__imap_pool.closed:
+            return self.__imap_pool
+        conf = self.__config['imap']
+        self.__imap_pool = ImapClientPool(
+            self.get_imap_client,
+            min_size=conf.get('pool_min_size', 0),
+            max_size=conf.get('pool_max_size', 4),
+            timeout=conf.get('pool_timeout', 30),
+            idle_ttl=conf.get('pool_idle_ttl', 300),
+            check_interval=conf.get('pool_check_interval', 30)
+        )
+        return self.__imap_pool
+
+    def connection(self, folder: ImapFolder=None, timeout: float=None):
+        """Checks out connection from :meth:imap_pool for with statement.
+        Unlike :meth:imap concurrent callers get own connections.
+
+        :param folder: folder to select, SELECT is skipped if connection has
+            it selected already
+        :param timeout: seconds to wait for free connection
+        :return: context manager with ImapClient
+        """
+        return self.imap_pool().connection(folder, timeout)
+
     def __create_imap_connection(self, attempts=None):
         if attempts is None:
             attempts = 0
@@ -109,6 +142,9 @@ class UserMailbox(object):
 
         :return:
         """
+        if getattr(self, '_UserMailbox__imap_pool', None):
+            self.__imap_pool.close()
+            self.__imap_pool = None
         if not hasattr(self, '__imap_store'):
             return
         self.__imap_store.close()
@@ -17,7 +17,15 @@ from .imap.constants import IMAP_DEFAULTS
 
 CONFIG_PROP_FUNC_MAP = {
     'secure': 'getboolean',
-    'port': 'getint'
+    'port': 'getint',
+    'literal_spool_size': 'getint',
+    'compress': 'getboolean',
+    'pipeline_depth': 'getint',
+    'pool_min_size': 'getint',
+    'pool_max_size': 'getint',
+    'pool_timeout': 'getfloat',
+    'pool_idle_ttl': 'getfloat',
+    'pool_check_interval': 'getfloat'
 }
 
 
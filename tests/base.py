@@ -3,6 +3,8 @@
     :copyright: (c) 2017 WTFPL.
     :license: WTFPL, see LICENSE for more details.
 """
+import imaplib
+import io
 import os
 import unittest
 
@@ -19,3 +21,40 @@ class BaseTestCase(unittest.TestCase):
 
         self.config = mailsettings.Config().from_config_file(self.test_conf)
 
+
+
+class FakeIMAP4(imaplib.IMAP4):
+    """imaplib.IMAP4 connected to a scripted server instead of a socket.
+
+    `responses` maps command name (bytes, e.g. b'FETCH' or b'UID') to the
+    untagged lines the server sends back before tagged response and
+    `status` maps command name to the tagged status (OK by default).
+    """
+
+    def __init__(self, responses: dict=None):
+        self.responses = {
+            b'CAPABILITY': b'* CAPABILITY IMAP4rev1\r\n',
+            **(responses or {})
+        }
+        self.status = {}
+        self.sent = []
+        super().__init__('localhost')
+        self.state = 'SELECTED'
+
+    def open(self, host='', port=imaplib.IMAP4_PORT, timeout=None):
+        self.host = host
+        self.port = port
+        self.sock = None
+        self.file = io.BytesIO(b'* OK fake server ready\r\n')
+
+    def send(self, data):
+        self.sent.append(data)
+        tag, command = data.split(b' ', 2)[:2]
+        command = command.strip().upper()
+        response = self.responses.get(command, b'')
+        status = self.status.get(command, b'OK done')
+        rest = self.file.read()
+        self.file = io.BytesIO(rest + response + tag + b' ' + status + b'\r\n')
+
+    def shutdown(self):
+        self.file.close()
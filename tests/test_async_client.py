@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+"""
+    :copyright: (c) 2017 WTFPL.
+    :license: WTFPL, see LICENSE for more details.
+"""
+import asyncio
+import re
+import unittest
+
+from pymaillib.imap.async_client import AsyncImapClient
+from pymaillib.imap.commands import ImapBaseCommand
+from pymaillib.imap.entity.email_message import ImapFetchedItem, \
+    RawEmailMessage
+from pymaillib.imap.entity.folder import ImapFolder
+from pymaillib.imap.exceptions import ImapAuthorizationException, \
+    ImapClientError
+from pymaillib.imap.flags import Flags
+from pymaillib.imap.query.builders.fetch import FetchQueryBuilder
+from pymaillib.imap.query.builders.search import SearchQueryBuilder
+from pymaillib.imap.query.builders.store import StoreQueryBuilder
+from pymaillib.user import UserCredentials
+from tests.test_fetch_stream import FETCH_RESPONSE
+
+RESPONSES = {
+    b'LOGIN': b'',
+    b'ID': b'* ID ("name" "fake" "version" "1.0")\r\n',
+    b'LIST': b'* LIST (\\HasNoChildren) "/" INBOX\r\n'
+             b'* LIST (\\HasNoChildren) "/" {9}\r\nfolder "1\r\n',
+    b'SELECT': b'* FLAGS (\\Seen $Label1)\r\n* 3 EXISTS\r\n* 0 RECENT\r\n'
+               b'* OK [UIDVALIDITY 123] UIDs valid\r\n'
+               b'* OK [UIDNEXT 13] next\r\n',
+    b'FETCH': FETCH_RESPONSE,
+    b'SEARCH': b'* SEARCH 1 3\r\n',
+    b'STORE': b'* 1 FETCH (UID 10 FLAGS (\\Seen \\Deleted))\r\n',
+    b'LOGOUT': b'* BYE logging out\r\n',
+}
+
+
+class FakeImapServer(object):
+    """Scripted IMAP server"""
+
+    def __init__(self, responses: dict):
+        self.responses = responses
+        self.status = {}
+        self.commands = []
+        self.literals = []
+
+    async def handle(self, reader: asyncio.StreamReader,
+                     writer: asyncio.StreamWriter):
+        writer.write(b'* OK [CAPABILITY IMAP4rev1 ID] ready\r\n')
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            tag, command, *_ = line.split(b' ')
+            command = command.strip()
+            if command == b'UID':
+                command = line.split(b' ')[2].strip()
+            self.commands.append(line.rstrip())
+            match = re.search(rb'\{(\d+)\}\r\n$', line)
+            if match:
+                writer.write(b'+ go ahead\r\n')
+                self.literals.append(
+                    await reader.readexactly(int(match.group(1))))
+                await reader.readline()
+            writer.write(self.responses.get(command, b'') + tag + b' ' +
+                         self.status.get(command, b'OK done') + b'\r\n')
+            if command == b'LOGOUT':
+                break
+        writer.close()
+
+
+class AsyncImapClientTest(unittest.TestCase):
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.server = FakeImapServer(dict(RESPONSES))
+        self.listener = self.loop.run_until_complete(
+            asyncio.start_server(self.server.handle, '127.0.0.1', 0))
+        self.settings = {
+            'host': '127.0.0.1',
+            'port': self.listener.sockets[0].getsockname()[1],
+        }
+
+    def tearDown(self):
+        self.listener.close()
+        self.loop.run_until_complete(self.listener.wait_closed())
+        self.loop.close()
+
+    def run_session(self, session):
+        async def run():
+            async with AsyncImapClient(self.settings,
+                                       UserCredentials('user', 'p"w')) as imap:
+                return await session(imap)
+        return self.loop.run_until_complete(run())
+
+    def test_session(self):
+        inbox = ImapFolder('INBOX', '/', {})
+
+        async def session(imap: AsyncImapClient):
+            self.assertTrue(imap.opened)
+            self.assertTrue(imap.supports('uid'))
+            self.assertEqual(imap.server_info.host, '127.0.0.1')
+            folders = await imap.folders()
+            stats = await imap.select_folder(inbox)
+            items = await imap.fetch(FetchQueryBuilder(uids='10:11')
+                                     .fetch_flags(), compact_flags=True)
+            found = await imap.search(SearchQueryBuilder().deleted())
+            stored = await imap.store(StoreQueryBuilder(uids=10)
+                                      .add('\\Deleted'))
+            appended = await imap.append_message(b'Subject: a\r\n\r\nb\r\n',
+                                                 inbox)
+            # only None arguments are skipped
+            await imap._command(ImapBaseCommand(), 'NOOP', 0, None)
+            return folders, stats, items, found, stored, appended
+
+        folders, stats, items, found, stored, appended = \
+            self.run_session(session)
+        self.assertEqual([folder.name for folder in folders],
+                         ['INBOX', 'folder "1'])
+        self.assertEqual(stats['EXISTS'], 3)
+        self.assertEqual(stats['UIDVALIDITY'], 123)
+        self.assertEqual(stats['FLAGS'], [b'\\Seen', b'$Label1'])
+
+        first, second = items
+        self.assertIsInstance(first, ImapFetchedItem)
+        self.assertIsInstance(first['FLAGS'], Flags)
+        self.assertEqual(first['FLAGS'], {'\\Seen'})
+        self.assertEqual(first['HEADER']['Subject'], 'test')
+        self.assertEqual(second['RFC822.SIZE'], 1020)
+
+        self.assertEqual(found, [1, 3])
+        self.assertEqual(stored[0]['FLAGS'], ['\\Seen', '\\Deleted'])
+        self.assertIsInstance(appended, RawEmailMessage)
+        self.assertEqual(self.server.literals, [b'Subject: a\r\n\r\nb\r\n'])
+
+        commands = [line.split(b' ', 1)[1] for line in self.server.commands]
+        self.assertEqual(commands[0], b'LOGIN "user" "p\\"w"')
+        self.assertIn(b'NOOP 0', commands)
+        self.assertIn(b'SELECT INBOX', commands)
+        self.assertIn(b'UID STORE 10 +FLAGS (\\Deleted)', commands)
+        self.assertTrue(any(line.startswith(b'UID FETCH 10:11 (')
+                            for line in commands))
+        self.assertEqual(commands[-1], b'LOGOUT')
+
+    def test_raw_fetch(self):
+        message = b'Subject: test\r\n\r\nbody\r\n'
+        self.server.responses[b'FETCH'] = \
+            b'* 1 FETCH (UID 10 RFC822 {%d}\r\n%s)\r\n' % (len(message),
+                                                           message)
+
+        async def session(imap: AsyncImapClient):
+            raw = await imap.fetch(FetchQueryBuilder(1).fetch_rfc822(),
+                                   raw=True)
+            parsed = await imap.fetch(FetchQueryBuilder(1).fetch_rfc822())
+            return raw, parsed
+
+        (raw, ), (parsed, ) = self.run_session(session)
+        self.assertEqual(raw['RFC822'].as_bytes(), message)
+        self.assertEqual(parsed['RFC822']['Subject'], 'test')
+
+    def test_shared_connection(self):
+        message = b'Subject: test\r\n\r\nbody\r\n'
+        self.server.responses[b'FETCH'] = \
+            b'* 1 FETCH (UID 10 RFC822 {%d}\r\n%s)\r\n' % (len(message),
+                                                           message)
+
+        async def session(imap: AsyncImapClient):
+            query = FetchQueryBuilder(1).fetch_rfc822()
+            return await asyncio.gather(imap.fetch(query, raw=True),
+                                        imap.fetch(query),
+                                        imap.fetch(query, raw=True))
+
+        (first, ), (parsed, ), (last, ) = self.run_session(session)
+        self.assertIsInstance(first['RFC822'], RawEmailMessage)
+        self.assertIsInstance(last['RFC822'], RawEmailMessage)
+        self.assertNotIsInstance(parsed['RFC822'], RawEmailMessage)
+        self.assertEqual(parsed['RFC822']['Subject'], 'test')
+
+    def test_errors(self):
+        self.server.status[b'SEARCH'] = b'BAD invalid search'
+
+        async def session(imap: AsyncImapClient):
+            with self.assertRaises(ImapClientError):
+                await imap.search(SearchQueryBuilder().deleted())
+            # connection is still usable
+            return await imap.search(SearchQueryBuilder().deleted())
+
+        with self.assertRaises(ImapClientError):
+            self.run_session(session)
+
+        self.server.status = {b'LOGIN': b'NO [AUTHENTICATIONFAILED] no'}
+        with self.assertRaises(ImapAuthorizationException):
+            self.run_session(session)
+
+    def test_concurrent_sessions(self):
+        async def session(num: int):
+            async with AsyncImapClient(self.settings,
+                                       UserCredentials('u', 'p')) as imap:
+                return num, await imap.search(SearchQueryBuilder().deleted())
+
+        async def run():
+            return await asyncio.gather(*[session(num) for num in range(20)])
+
+        self.assertEqual(self.loop.run_until_complete(run()),
+                         [(num, [1, 3]) for num in range(20)])
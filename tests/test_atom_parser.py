@@ -6,13 +6,22 @@
 import unittest
 
 import datetime
+from concurrent.futures import ThreadPoolExecutor
 
-from pymaillib.imap.entity.email_message import ImapFetchedItem
+from pymaillib.imap.exceptions.base import ImapResponseParserError
+from pymaillib.imap.entity.email_message import EmailMessage, \
+    ImapFetchedItem, LazyImapFetchedItem
 from pymaillib.imap.entity.body_structure import BodyStructure
 from pymaillib.imap.entity.envelope import Envelope, AddressList
-from pymaillib.imap.parsers import ResponseTokenizer, tokenize_atom_response
+from pymaillib.imap import _parsers
+from pymaillib.imap.parsers import ResponseTokenizer, \
+    tokenize_atom_response, tokenize_fetch_response, tokenize_response
+from pymaillib.imap import utils
 from pymaillib.imap.utils import parse_datetime, list_to_dict, \
-    build_imap_response_line
+    build_imap_response_line, build_imap_response, get_timezone, \
+    decode_parameter_value
+
+import dateutil.parser
 
 
 class AtomParserTest(unittest.TestCase):
@@ -26,6 +35,57 @@ class AtomParserTest(unittest.TestCase):
         for date in dates:
             self.assertIsInstance(parse_datetime(date), datetime.datetime)
 
+    def test_fast_parse_date(self):
+        dates = [
+            '11-Nov-2015 08:37:14 -0500',
+            ' 1-Feb-2016 18:37:14 +0130',
+            '11-Nov-2015 08:37:14',
+            'Mon, 7 Feb 1994 21:52:25 -0800 (PST)',
+            'Wed, 11 Nov 2015 08:37:14 GMT',
+            'Wed, 11 Nov 2015 08:37 +0000',
+            'Thu,  1 Jan 2015 8:05:00 Z',
+            'Thu, 1 Jan 2015 8:05:00 +0000 (UTC)',
+        ]
+        for date in dates:
+            expected = dateutil.parser.parse(date)
+            for func in (utils._parse_datetime, utils.parse_date_time):
+                res = func(date)
+                self.assertEqual(res, expected)
+                self.assertEqual(res.utcoffset(), expected.utcoffset())
+            self.assertEqual(parse_datetime(date.encode()), expected)
+
+        fallback = [
+            'Wed, 11 Nov 15 08:37:14 +0000',
+            '7 Feb 1994 21:52:25 EST',
+            '11-Nov-2015T19:20:30+01:00',
+            '31-Feb-2015 08:37:14 +0000',
+            '11-Nov-2015 08:37:14 -0500 junk',
+            '11-Bla-2015 08:37:14 -0500',
+        ]
+        for date in fallback:
+            self.assertIsNone(utils._parse_datetime(date))
+            self.assertIsNone(utils.parse_date_time(date))
+
+        first = parse_datetime(b'11-Nov-2015 08:37:14 -0500')
+        second = parse_datetime(b'12-Nov-2015 09:37:14 -0500')
+        self.assertIs(first.tzinfo, second.tzinfo)
+        self.assertIs(first.tzinfo, get_timezone(-300))
+
+    def test_decode_parameter_value(self):
+        decode_parameter_value.cache_clear()
+        self.assertEqual(decode_parameter_value(None), '')
+        self.assertEqual(decode_parameter_value(b'plain subject'),
+                         'plain subject')
+        self.assertEqual(decode_parameter_value.cache_info().misses, 0)
+
+        value = '=?UTF-8?B?0YLQtdGB0YI=?= =?UTF-8?Q?_file.txt?='
+        for _ in range(3):
+            self.assertEqual(decode_parameter_value(value), 'тест file.txt')
+            self.assertEqual(decode_parameter_value(value.encode()),
+                             'тест file.txt')
+        info = decode_parameter_value.cache_info()
+        self.assertEqual((info.hits, info.misses), (5, 1))
+
     def test_envelop_empty_subj(self):
         lines = [
             b'1 (UID 387 ENVELOPE ("Wed, 11 Nov 2015 08:37:14 -0500" "" '
@@ -485,6 +545,122 @@ class AtomParserTest(unittest.TestCase):
         for line in lines:
             self.assertEqual(list(ResponseTokenizer(line[0], [])), line[1])
 
+    def test_batch_tokenizer(self):
+        lines = [
+            b'1 (UID 10 FLAGS (\\Seen) RFC822.SIZE 1020)',
+            (b'2 (UID 11 BODY[1] {5}', b'Hello'),
+            b' FLAGS ())',
+            (b'3 (UID 12 BODY[1] {2}', b'Hi'), b')',
+        ]
+        line, literals = build_imap_response(lines)
+        self.assertEqual(tokenize_response(line, literals), [
+            (1, [b'UID', 10, b'FLAGS', [b'\\Seen'], b'RFC822.SIZE', 1020]),
+            (2, [b'UID', 11, b'BODY[1]', b'Hello', b'FLAGS', []]),
+            (3, [b'UID', 12, b'BODY[1]', b'Hi']),
+        ])
+
+        batch = [ImapFetchedItem(atoms)
+                 for atoms in tokenize_fetch_response(lines)]
+        self.assertEqual(batch, self.parse_items(lines))
+
+    def test_lazy_fetched_item(self):
+        lines = [
+            b'1 (UID 387 INTERNALDATE "11-Nov-2015 08:37:14 -0500" '
+            b'BODYSTRUCTURE ("text" "plain" ("charset" "US-ASCII") NIL NIL '
+            b'"quoted-printable" 388 20 NIL ("inline" NIL) NIL) FLAGS (\\Seen)'
+            b' BODY ("text" "plain" ("charset" "US-ASCII") NIL NIL "7bit" 38 2)'
+            b' ENVELOPE ("Wed, 11 Nov 2015 08:37:14 -0500" "subj" NIL NIL NIL'
+            b' NIL NIL NIL NIL "<id@MHS>"))'
+        ]
+        msg, = [LazyImapFetchedItem(atoms)
+                for atoms in tokenize_fetch_response(lines, lazy=True)]
+        self.assertEqual(msg.uid, 387)
+        self.assertEqual(msg['FLAGS'], ['\\Seen'])
+        self.assertNotIsInstance(dict.get(msg, 'ENVELOPE'), Envelope)
+
+        envelope = msg.envelope
+        self.assertIsInstance(envelope, Envelope)
+        self.assertIs(msg['ENVELOPE'], envelope)
+        self.assertIsInstance(msg.get('BODYSTRUCTURE'), BodyStructure)
+        self.assertIsInstance(msg['INTERNALDATE'], datetime.datetime)
+        self.assertEqual(msg.get('RFC822', 1), 1)
+        self.assertEqual(sorted(msg), sorted(self.parse_items(lines)[0]))
+
+    def test_lazy_fetched_item_copies(self):
+        lines = [
+            (b'1 (UID 387 ENVELOPE ("Wed, 11 Nov 2015 08:37:14 -0500" "subj"'
+             b' NIL NIL NIL NIL NIL NIL NIL "<id@MHS>") BODY[] {23}',
+             b'Subject: test\r\n\r\nbody\r\n'),
+            (b' BODY[1] {4}', b'body'), b')',
+        ]
+
+        def item():
+            msg, = [LazyImapFetchedItem(atoms)
+                    for atoms in tokenize_fetch_response(lines, lazy=True)]
+            self.assertNotIsInstance(dict.get(msg, 'ENVELOPE'), Envelope)
+            self.assertNotIsInstance(dict.get(msg, 'BODY')[0], EmailMessage)
+            return msg
+
+        msg = item()
+        self.assertEqual(msg['BODY'][1], b'body')
+        self.assertEqual(msg.get_fetched_part(0)['Subject'], 'test')
+        self.assertEqual(item().email_message['Subject'], 'test')
+
+        for copy in (dict(item()), {**item()}, item().copy()):
+            self.assertIsInstance(copy['ENVELOPE'], Envelope)
+            self.assertIsInstance(copy['BODY'][0], EmailMessage)
+        self.assertIsInstance(item().copy(), LazyImapFetchedItem)
+        self.assertIsInstance(item().setdefault('ENVELOPE'), Envelope)
+        self.assertEqual(item().setdefault('X', 1), 1)
+        self.assertEqual(sorted(item().copy()),
+                         sorted(self.parse_items(lines)[0]))
+
+    def test_python_tokenizer(self):
+        lines = [
+            (b'1 (UID 10 BODY[HEADER.FIELDS (SUBJECT DATE)] {9} FLAGS ())',
+             [b'Subject: '],
+             [1, [b'UID', 10, b'BODY[HEADER.FIELDS (SUBJECT DATE)]',
+                  b'Subject: ', b'FLAGS', []]]),
+            (b'2 (ENVELOPE ("a \\" (b" NIL ((NIL NIL "x" "y")) "") '
+             b'BODY[1] {0})', [b''],
+             [2, [b'ENVELOPE', [b'a \\" (b', None, [[None, None, b'x', b'y']],
+                               b''], b'BODY[1]', b'']]),
+            (b'(\\HasNoChildren) "/" "12"', [],
+             [[b'\\HasNoChildren'], b'/', b'12']),
+            (b'3 (BODY[]<0> {2}\tX "a\\\\" "b")', [b'ab'],
+             [3, [b'BODY[]<0>', b'ab', b'X', b'a\\\\', b'b']]),
+        ]
+        for line, literals, expected in lines:
+            self.assertEqual(
+                list(_parsers.ResponseTokenizer(line, literals)), expected
+            )
+            self.assertEqual(list(ResponseTokenizer(line, literals)), expected)
+
+    def test_batch_tokenizer_implementations(self):
+        line = b'1 (UID 10 BODY[HEADER.FIELDS (DATE)]<0> {9} FLAGS ()) ' \
+               b'2 (X nil "a \\" b" \'q\' 12345678901234567890123 (a (b))' \
+               b' "") 3 (\tA\t"x)" (B'
+        literals = [b'Subject: ']
+        expected = [
+            (1, [b'UID', 10, b'BODY[HEADER.FIELDS (DATE)]<0>', b'Subject: ',
+                 b'FLAGS', []]),
+            (2, [b'X', None, b'a \\" b', b'q', 12345678901234567890123,
+                 [b'a', [b'b']], b'']),
+            (3, [b'A', b'x)', [b'B']]),
+        ]
+        self.assertEqual(_parsers.tokenize_response(line, literals), expected)
+        self.assertEqual(tokenize_response(line, literals), expected)
+        self.assertEqual(tokenize_response(b'1 (A B) ) 2 (C D)', []),
+                         [(1, [b'A', b'B'])])
+        with self.assertRaises(ImapResponseParserError):
+            tokenize_response(b'1 (BODY[1] {3})', [b'ab'])
+
+        with ThreadPoolExecutor(4) as executor:
+            results = executor.map(lambda _: tokenize_response(line, literals),
+                                   range(16))
+            for result in results:
+                self.assertEqual(result, expected)
+
     def test_atom_special_ampersand(self):
         lines = [
             b'(\\X-DirectRef=000a9d8db93e5826 \\X-ModDate=20151112134408'
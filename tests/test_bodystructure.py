@@ -5,18 +5,61 @@
 """
 import unittest
 
+from pymaillib.imap.entity import ImapEntity
 from pymaillib.imap.entity.body_structure import BodyStructure, SimpleBodyPart,\
     MultiPartBodyPart, MessageRFC822BodPart
-from pymaillib.imap.entity.envelope import Envelope
+from pymaillib.imap.entity.envelope import Envelope, AddressList
+
+try:
+    from pymaillib.imap.pyimapparser import build_body_structure
+except ImportError as _:
+    build_body_structure = None
+
+
+def encode_items(data):
+    """Converts decoded test data to tokenizer output"""
+    if isinstance(data, list):
+        return [encode_items(item) for item in data]
+    if isinstance(data, str):
+        return data.encode()
+    return data
+
+
+def entity_state(obj):
+    """Values of all attributes of the entity and nested entities"""
+    if isinstance(obj, BodyStructure):
+        return type(obj), entity_state(obj.part)
+    if isinstance(obj, (AddressList, list)):
+        return [entity_state(item) for item in obj]
+    if isinstance(obj, dict):
+        return {key: entity_state(value) for key, value in obj.items()}
+    if not isinstance(obj, ImapEntity):
+        return obj
+    res = {}
+    for cls in type(obj).__mro__:
+        for name in getattr(cls, '__slots__', ()):
+            res[name] = entity_state(getattr(obj, name, AttributeError))
+    return type(obj), res
 
 
 class BodyStructureTest(unittest.TestCase):
 
+    def build(self, data):
+        obj = BodyStructure.build(data)
+        if build_body_structure:
+            self.assertEqual(entity_state(build_body_structure(data)),
+                             entity_state(obj))
+            self.assertEqual(
+                entity_state(build_body_structure(encode_items(data))),
+                entity_state(obj)
+            )
+        return obj
+
     def test_simple(self):
         data = ['text', 'plain', ['charset', 'US-ASCII'], None, None,
                 'quoted-printable', 388, 20, None, ['inline', None], None]
 
-        obj = BodyStructure.build(data)
+        obj = self.build(data)
         self.assertFalse(obj.is_multipart())
         self.assertIsInstance(obj.part, SimpleBodyPart)
         self.assertEqual(obj.part.content_part, 'text/plain')
@@ -27,7 +70,7 @@ class BodyStructureTest(unittest.TestCase):
         data = ['application', 'scalix-properties', None, None,
                         None, '7bit', 1671, None, None, None, None]
 
-        obj = BodyStructure.build(data)
+        obj = self.build(data)
         self.assertFalse(obj.is_multipart())
         self.assertIsInstance(obj.part, SimpleBodyPart)
         self.assertEqual(obj.part.content_part,
@@ -43,7 +86,7 @@ class BodyStructureTest(unittest.TestCase):
                 ['boundary', '----=_Part_310_216476006.1412669886901'],
                 None, None]
 
-        obj = BodyStructure.build(data)
+        obj = self.build(data)
         self.assertTrue(obj.is_multipart())
         self.assertIsInstance(obj.part, MultiPartBodyPart)
         self.assertEqual(len(obj.part.parts), 2)
@@ -71,7 +114,7 @@ class BodyStructureTest(unittest.TestCase):
                 ['boundary', '----=_Part_0_28145835.1448461057725'], None,
                 None]
 
-        obj = BodyStructure.build(data)
+        obj = self.build(data)
         self.assertTrue(obj.is_multipart())
         self.assertIsInstance(obj.part, MultiPartBodyPart)
         self.assertEqual(len(obj.part.parts), 2)
@@ -113,7 +156,7 @@ class BodyStructureTest(unittest.TestCase):
                    'D0=B8=D0=B5.xlsx?=']], None], 'mixed',
                 ['boundary', '----=_Part_0_4236961.1448518502536'], None,
                 None]
-        obj = BodyStructure.build(data)
+        obj = self.build(data)
         self.assertTrue(obj.is_multipart())
         self.assertIsInstance(obj.part, MultiPartBodyPart)
 
@@ -123,6 +166,13 @@ class BodyStructureTest(unittest.TestCase):
         self.assertIsNotNone(obj.part.parts[2].filename)
         self.assertIsNotNone(obj.part.boundary)
 
+        self.assertEqual(obj.attachments, obj.part.parts[1:])
+        self.assertEqual(obj.attachments_size, 38366 + 6788)
+        self.assertEqual(obj.text_parts, [obj.find_by_mime_id('1.1')])
+        self.assertEqual(obj.html_parts, [obj.find_by_mime_id('1.2')])
+        self.assertEqual(obj.inline_images, [])
+        self.assertIs(obj.find_by_mime_id('3'), obj.part.parts[2])
+
     def test_mixed_message_rfc822(self):
         data = [[['text', 'plain',
                   ['charset', 'utf-8', 'format', 'flowed'], None,
@@ -161,7 +211,7 @@ class BodyStructureTest(unittest.TestCase):
                 ['boundary', '------------000605010102080309050007'],
                 None, None, None]
 
-        obj = BodyStructure.build(data)
+        obj = self.build(data)
         self.assertTrue(obj.is_multipart())
         self.assertIsInstance(obj.part, MultiPartBodyPart)
         self.assertEqual(len(obj.part.parts), 2)
@@ -176,3 +226,34 @@ class BodyStructureTest(unittest.TestCase):
 
         self.assertIsNone(obj.find_by_mime_id('8'))
         self.assertIsNotNone(obj.find_by_mime_id('1.1'))
+        self.assertIs(obj.find_by_mime_id('2'), obj.part.parts[1])
+        self.assertEqual(obj.attachments, [obj.part.parts[1]])
+        self.assertEqual(obj.attachments_size, 19739)
+        # parts of attached message are not message body
+        self.assertEqual([part.mime_id for part in obj.text_parts], ['1.1'])
+        self.assertEqual([part.mime_id for part in obj.html_parts], ['1.2'])
+
+    def test_related_inline_images(self):
+        data = [[['text', 'html', ['charset', 'utf-8'], None, None, '7bit',
+                  100, 2, None, None, None],
+                 ['image', 'png', ['name', 'logo.png'], '<logo@mail>', None,
+                  'base64', 2000, None, None, None, None],
+                 ['IMAGE', 'JPEG', ['name', 'photo.jpg'], None, None,
+                  'base64', 3000, None, ['INLINE', ['filename', 'photo.jpg']],
+                  None, None],
+                 'related', ['boundary', 'b1'], None, None, None],
+                ['image', 'gif', ['name', 'cat.gif'], '<cat@mail>', None,
+                 'base64', 4000, None, ['attachment', ['filename', 'cat.gif']],
+                 None, None],
+                'mixed', ['boundary', 'b0'], None, None, None]
+
+        obj = self.build(data)
+        self.assertEqual([part.mime_id for part in obj.inline_images],
+                         ['1.2', '1.3'])
+        self.assertEqual([part.mime_id for part in obj.attachments], ['2'])
+        self.assertEqual(obj.attachments_size, 4000)
+        self.assertEqual(obj.text_parts, [])
+        self.assertEqual([part.mime_id for part in obj.html_parts], ['1.1'])
+        self.assertEqual(obj.find_by_mime_id('1.3').content_disposition,
+                         'inline')
+        self.assertIsNone(obj.find_by_mime_id('1.1').content_disposition)
@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+"""
+    :copyright: (c) 2017 WTFPL.
+    :license: WTFPL, see LICENSE for more details.
+"""
+import socketserver
+import threading
+import unittest
+import zlib
+
+from pymaillib.imap.client import ImapClient
+from pymaillib.imap.entity.folder import ImapFolder
+from pymaillib.imap.query.builders.fetch import FetchQueryBuilder
+from pymaillib.user import UserCredentials
+
+MESSAGE = b''.join(b'X-Header-%d: some repeated header value\r\n' % num
+                   for num in range(500)) + b'\r\nbody\r\n'
+
+
+class CompressHandler(socketserver.BaseRequestHandler):
+    """Scripted IMAP server which announces COMPRESS=DEFLATE after login"""
+
+    def setup(self):
+        self.buffer = b''
+        self.inflater = None
+        self.deflater = None
+
+    def write(self, data: bytes):
+        if self.deflater:
+            data = self.deflater.compress(data) + \
+                self.deflater.flush(zlib.Z_SYNC_FLUSH)
+        self.request.sendall(data)
+
+    def readline(self) -> bytes:
+        while b'\n' not in self.buffer:
+            chunk = self.request.recv(1 << 16)
+            if not chunk:
+                return b''
+            if self.inflater:
+                chunk = self.inflater.decompress(chunk)
+            self.buffer += chunk
+        line, _, self.buffer = self.buffer.partition(b'\n')
+        return line
+
+    def handle(self):
+        server = self.server
+        capabilities = b'IMAP4rev1'
+        self.write(b'* OK ready\r\n')
+        while True:
+            line = self.readline()
+            if not line:
+                break
+            tag, command = line.split()[:2]
+            command = command.upper()
+            server.commands.append(command)
+            response = b''
+            status = b'OK done'
+            if command == b'CAPABILITY':
+                response = b'* CAPABILITY ' + capabilities + b'\r\n'
+            elif command == b'LOGIN':
+                capabilities += b' ' + server.compress
+            elif command == b'SELECT':
+                response = b'* 1 EXISTS\r\n'
+            elif command == b'COMPRESS':
+                status = server.compress_status
+            elif command == b'FETCH':
+                response = b'* 1 FETCH (RFC822 {%d}\r\n%s)\r\n' % (
+                    len(MESSAGE), MESSAGE)
+            self.write(response + tag + b' ' + status + b'\r\n')
+            if command == b'COMPRESS' and status.startswith(b'OK'):
+                self.inflater = zlib.decompressobj(-zlib.MAX_WBITS)
+                self.deflater = zlib.compressobj(9, zlib.DEFLATED,
+                                                 -zlib.MAX_WBITS)
+
+
+class CompressTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = socketserver.ThreadingTCPServer(('127.0.0.1', 0),
+                                                      CompressHandler)
+        self.server.daemon_threads = True
+        self.server.commands = []
+        self.server.compress = b'COMPRESS=DEFLATE'
+        self.server.compress_status = b'OK deflate active'
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        self.settings = {
+            'host': '127.0.0.1',
+            'port': self.server.server_address[1],
+            'compress': True,
+        }
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def fetch(self) -> ImapClient:
+        imap = ImapClient(self.settings, UserCredentials('user', 'password'))
+        with imap:
+            imap.select_folder(ImapFolder('INBOX', '/', {}))
+            item, = imap.fetch(FetchQueryBuilder(1).fetch_rfc822())
+            self.assertEqual(item['RFC822']['X-Header-499'],
+                             'some repeated header value')
+        imap.close()
+        return imap
+
+    def test_compressed(self):
+        counters = self.fetch().transfer_counters
+        self.assertIn(b'COMPRESS', self.server.commands)
+        self.assertGreater(counters.received, len(MESSAGE))
+        self.assertGreater(counters.compression_ratio, 5)
+        self.assertNotEqual(counters.wire_sent, counters.sent)
+
+    def test_not_compressed(self):
+        self.server.compress = b'IDLE'
+        counters = self.fetch().transfer_counters
+        self.assertNotIn(b'COMPRESS', self.server.commands)
+        self.assertEqual(counters.received, counters.wire_received)
+        self.assertEqual(counters.sent, counters.wire_sent)
+
+        self.server.compress = b'COMPRESS=DEFLATE'
+        self.server.compress_status = b'NO not now'
+        with self.assertWarns(RuntimeWarning):
+            counters = self.fetch().transfer_counters
+        self.assertEqual(counters.compression_ratio, 1.0)
+
+        self.settings['compress'] = False
+        del self.server.commands[:]
+        self.fetch()
+        self.assertNotIn(b'CAPABILITY', self.server.commands[1:])
+        self.assertNotIn(b'COMPRESS', self.server.commands)
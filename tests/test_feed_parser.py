@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""
+    :copyright: (c) 2017 WTFPL.
+    :license: WTFPL, see LICENSE for more details.
+"""
+import unittest
+
+from pymaillib.imap.commands.fetch import ImapFetchCommand
+from pymaillib.imap.entity.email_message import ImapFetchedItem, \
+    LazyImapFetchedItem
+from pymaillib.imap.entity.envelope import Envelope
+from pymaillib.imap.feed_parser import ImapFeedParser, ImapResponse
+from pymaillib.imap.query.builders.fetch import FetchQueryBuilder
+from tests.base import FakeIMAP4
+from tests.test_fetch_stream import FETCH_RESPONSE
+
+
+class FeedParserTest(unittest.TestCase):
+
+    def test_feed_by_byte(self):
+        data = b'+ ready\r\n' + FETCH_RESPONSE + b'A001 OK FETCH done\r\n'
+        parser = ImapFeedParser(FetchQueryBuilder(1).decoder())
+        responses = []
+        for index in range(len(data)):
+            responses.extend(parser.feed(data[index:index + 1]))
+        self.assertFalse(parser.pending)
+        self.assertEqual([(item.tag, item.typ) for item in responses], [
+            (b'+', None), (b'*', 'FETCH'), (b'*', 'EXISTS'), (b'*', 'FETCH'),
+            (b'A001', 'OK')
+        ])
+        self.assertEqual(responses[0].data, b'ready')
+        self.assertEqual(responses[2].data, b'3')
+        self.assertEqual(responses[-1], ImapResponse(b'A001', 'OK',
+                                                     b'FETCH done'))
+
+        imap_obj = FakeIMAP4({b'FETCH': FETCH_RESPONSE})
+        buffered = list(ImapFetchCommand(FetchQueryBuilder(1)).run(imap_obj))
+        self.assertIsInstance(responses[1].data, ImapFetchedItem)
+        for item, expected in zip([responses[1].data, responses[3].data],
+                                  buffered):
+            self.assertEqual(item.keys(), expected.keys())
+            self.assertEqual(item.get('FLAGS'), expected.get('FLAGS'))
+        self.assertEqual(responses[1].data['HEADER']['Subject'], 'test')
+
+    def test_feed_chunks(self):
+        message = b'Subject: test\r\n\r\nbody {3}\r\n'
+        parser = ImapFeedParser(lazy=True)
+        self.assertEqual(parser.feed(
+            b'* 1 FETCH (UID 10 BODY[] {%d}\r\n%s' % (len(message),
+                                                       message[:5])
+        ), [])
+        self.assertTrue(parser.pending)
+        self.assertEqual(parser.feed(message[5:] + b' ENVELOPE ("Wed, 11 Nov'),
+                         [])
+        response, = parser.feed(b' 2015 08:37:14 -0500" "s" NIL NIL NIL NIL'
+                                b' NIL NIL NIL NIL))\r\n* OK still here\r')
+        self.assertTrue(parser.pending)
+        item = response.data
+        self.assertIsInstance(item, LazyImapFetchedItem)
+        self.assertEqual(item.email_message['Subject'], 'test')
+        self.assertIsInstance(item['ENVELOPE'], Envelope)
+        self.assertEqual(parser.feed(b'\n'),
+                         [ImapResponse(b'*', 'OK', b'still here')])
+        self.assertFalse(parser.pending)
@@ -84,6 +84,29 @@ class AtomParserTest(unittest.TestCase):
         self.assertIn('2.3', str(FetchQueryBuilder(1).fetch_body('1', 3, 2)))
         self.assertIn('0.3', str(FetchQueryBuilder(1).fetch_body('1', 3)))
 
+    def test_fetch_decoder(self):
+        query = FetchQueryBuilder(1).fetch_envelope()\
+            .fetch_body_peek('1', 3, 2).fetch_header_item('SUBJECT')
+        decoder = query.decoder()
+        self.assertIs(decoder, query.decoder())
+        self.assertCountEqual(query.response_items(), [
+            b'UID', b'ENVELOPE', b'BODY[1]<2>',
+            b'BODY[HEADER.FIELDS (SUBJECT)]'
+        ])
+        for name in query.response_items():
+            self.assertIn(name, decoder)
+        self.assertNotIn(b'FLAGS', decoder)
+
+        query.fetch_flags()
+        self.assertIsNot(decoder, query.decoder())
+        self.assertIn(b'FLAGS', query.decoder())
+
+        atoms = dict(decoder.build_atoms(
+            1, [b'UID', 10, b'BODY[1]<2>', b'abc', b'FLAGS', [b'\\Seen']]
+        ))
+        self.assertEqual(atoms, {'SEQ': 1, 'UID': 10, 'BODY': {1: b'abc'},
+                                 'FLAGS': ['\\Seen']})
+
     def __check_substring(self, generated: str, reference: str):
         translate_table = ''.maketrans('()]', '   ')
         for item in generated.split(' '):
@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+"""
+    :copyright: (c) 2017 WTFPL.
+    :license: WTFPL, see LICENSE for more details.
+"""
+import pickle
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+
+from pymaillib.imap.commands.fetch import ImapFetchCommand
+from pymaillib.imap.entity.email_message import ImapFetchedItem
+from pymaillib.imap.exceptions import ImapClientError
+from pymaillib.imap.imap4 import LiteralSpoolMixin, SpooledLiteral
+from pymaillib.imap.query.builders.fetch import FetchQueryBuilder
+from pymaillib.imap.utils import parse_email
+from tests.base import FakeIMAP4
+
+FETCH_RESPONSE = (
+    b'* 1 FETCH (UID 10 FLAGS (\\Seen) BODY[HEADER.FIELDS (SUBJECT)] {15}\r\n'
+    b'Subject: test\r\n)\r\n'
+    b'* 3 EXISTS\r\n'
+    b'* 2 FETCH (UID 11 FLAGS () RFC822.SIZE 1020)\r\n'
+)
+
+
+class SpoolingFakeIMAP4(LiteralSpoolMixin, FakeIMAP4):
+    literal_spool_size = 100
+
+
+class FetchStreamTest(unittest.TestCase):
+
+    def setUp(self):
+        self.imap_obj = FakeIMAP4({b'UID': FETCH_RESPONSE,
+                                   b'FETCH': FETCH_RESPONSE})
+
+    def test_stream_fetch(self):
+        query = FetchQueryBuilder(uids='10:11').fetch_flags()
+        items = ImapFetchCommand(query, stream=True).run(self.imap_obj)
+        first = next(items)
+        self.assertIsInstance(first, ImapFetchedItem)
+        self.assertEqual(first['UID'], 10)
+        self.assertEqual(first['HEADER']['Subject'], 'test')
+        rest = list(items)
+        self.assertEqual(len(rest), 1)
+        self.assertEqual(rest[0]['RFC822.SIZE'], 1020)
+        self.assertEqual(self.imap_obj.untagged_responses['EXISTS'], [b'3'])
+        self.assertFalse(self.imap_obj.tagged_commands)
+        self.assertTrue(self.imap_obj.sent[-1].startswith(
+            self.imap_obj.sent[-1].split(b' ')[0] + b' UID FETCH 10:11'))
+
+    def test_stream_matches_buffered_fetch(self):
+        query = FetchQueryBuilder(1)
+        buffered = list(ImapFetchCommand(query).run(self.imap_obj))
+        streamed = list(ImapFetchCommand(query, True).run(self.imap_obj))
+        self.assertEqual([item['UID'] for item in buffered],
+                         [item['UID'] for item in streamed])
+
+    def test_zero_copy_fetch(self):
+        message = b'Subject: test\r\n\r\nbody\r\n'
+        self.imap_obj.responses[b'FETCH'] = \
+            b'* 1 FETCH (UID 10 BODY[] {%d}\r\n%s RFC822.HEADER {15}\r\n' \
+            b'Subject: test\r\n)\r\n' % (len(message), message)
+        item, = ImapFetchCommand(FetchQueryBuilder(1), zero_copy=True)\
+            .run(self.imap_obj)
+        self.assertIsInstance(item['BODY'][0], memoryview)
+        self.assertEqual(item['BODY'][0], message)
+        self.assertEqual(item.email_message['Subject'], 'test')
+        self.assertEqual(item['HEADER']['Subject'], 'test')
+
+    def test_stream_closed_early(self):
+        query = FetchQueryBuilder(1)
+        items = ImapFetchCommand(query, stream=True).run(self.imap_obj)
+        next(items)
+        items.close()
+        self.assertFalse(self.imap_obj.tagged_commands)
+        self.assertEqual(len(list(ImapFetchCommand(query, True)
+                                  .run(self.imap_obj))), 2)
+
+    def test_stream_failed_command(self):
+        self.imap_obj.status[b'FETCH'] = b'NO FETCH invalid message set'
+        with self.assertRaises(ImapClientError):
+            list(ImapFetchCommand(FetchQueryBuilder(1), True)
+                 .run(self.imap_obj))
+        self.assertFalse(self.imap_obj.tagged_commands)
+
+    def test_executor_fetch(self):
+        message = b'Subject: test\r\n\r\nbody\r\n'
+        self.imap_obj.responses[b'FETCH'] = b''.join(
+            b'* %d FETCH (UID %d BODY[] {%d}\r\n%s)\r\n'
+            % (num, num + 10, len(message), message) for num in range(1, 6)
+        )
+        query = FetchQueryBuilder(1)
+        buffered = list(ImapFetchCommand(query).run(self.imap_obj))
+        item = pickle.loads(pickle.dumps(buffered[0]))
+        self.assertIsInstance(item, ImapFetchedItem)
+        self.assertEqual(item.email_message['Subject'], 'test')
+
+        with ProcessPoolExecutor(2) as executor:
+            for stream in (False, True):
+                items = list(ImapFetchCommand(query, stream,
+                                              executor=executor,
+                                              chunk_size=2)
+                             .run(self.imap_obj))
+                self.assertEqual([item['UID'] for item in items],
+                                 [item['UID'] for item in buffered])
+                self.assertEqual(items[-1].email_message['Subject'], 'test')
+        self.assertFalse(self.imap_obj.tagged_commands)
+
+    def test_spooled_literals(self):
+        imap_obj = SpoolingFakeIMAP4()
+        message = b'Subject: big\r\n\r\n' + b'body line\r\n' * 10000
+        imap_obj.responses[b'FETCH'] = (
+            b'* 1 FETCH (UID 10 RFC822 {%d}\r\n%s BODY[1] {8}\r\nYm9keQ==)'
+            b'\r\n* 2 FETCH (UID 11 BODY[1] {%d}\r\n%s)\r\n'
+            % (len(message), message, len(message), message)
+        )
+        for kwargs in ({}, {'stream': True}, {'zero_copy': True}):
+            first, second = ImapFetchCommand(FetchQueryBuilder(1), **kwargs)\
+                .run(imap_obj)
+            literal = first['RFC822']
+            self.assertIsInstance(literal, SpooledLiteral)
+            self.assertEqual(len(literal), len(message))
+            self.assertEqual(literal.tobytes(), message)
+            self.assertEqual(b''.join(literal.chunks(1000)), message)
+            self.assertEqual(first.email_message['Subject'], 'big')
+            self.assertEqual(first.email_message.get_content(),
+                             parse_email(message).get_content())
+            # small literals are not spooled
+            self.assertEqual(first['BODY'][1], b'Ym9keQ==')
+
+            data = second.get_fetched_part(1)
+            self.assertIsInstance(data, SpooledLiteral)
+            with data.mmap() as mapped:
+                self.assertEqual(mapped[:], message)
+            self.assertIn('size=%d' % len(message), repr(data))
+            self.assertEqual(pickle.loads(pickle.dumps(data)), message)
+            data.close()
+            self.assertTrue(data.closed)
+
+    def test_spooled_envelope_literals(self):
+        imap_obj = SpoolingFakeIMAP4()
+        subject = b'=?UTF-8?Q?long?= ' + b's' * 200
+        imap_obj.responses[b'FETCH'] = (
+            b'* 1 FETCH (UID 10 ENVELOPE ("Wed, 11 Nov 2015 08:37:14 -0500" '
+            b'{%d}\r\n%s NIL NIL NIL NIL NIL NIL NIL "<id@MHS>"))\r\n'
+            % (len(subject), subject)
+        )
+        query = FetchQueryBuilder(1).fetch_envelope()
+        for kwargs in ({}, {'stream': True}, {'zero_copy': True}):
+            item, = ImapFetchCommand(query, **kwargs).run(imap_obj)
+            self.assertEqual(item['ENVELOPE'].subject,
+                             'long ' + 's' * 200)
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+    :copyright: (c) 2017 WTFPL.
+    :license: WTFPL, see LICENSE for more details.
+"""
+import unittest
+from datetime import date, datetime, timezone, timedelta
+
+from pymaillib.imap.commands.fetch import ImapFetchTableCommand
+from pymaillib.imap.entity.fetch_table import FetchResultTable, numpy
+from pymaillib.imap.exceptions import ImapInvalidArgument
+from pymaillib.imap.query.builders.fetch import FetchQueryBuilder
+from tests.base import FakeIMAP4
+
+FETCH_RESPONSE = (
+    b'* 1 FETCH (UID 10 RFC822.SIZE 100 FLAGS (\\Seen) '
+    b'INTERNALDATE "31-Dec-2015 23:30:00 -0500")\r\n'
+    b'* 2 FETCH (UID 11 RFC822.SIZE 2000 FLAGS () '
+    b'INTERNALDATE "01-Jan-2016 08:00:00 +0000")\r\n'
+    b'* 3 EXISTS\r\n'
+    b'* 3 FETCH (UID 12 RFC822.SIZE 30 FLAGS (\\Seen \\Flagged) '
+    b'INTERNALDATE " 2-Jan-2016 01:00:00 +0200")\r\n'
+    b'* 4 FETCH (UID 13 RFC822.SIZE 400 FLAGS (\\Seen) '
+    b'INTERNALDATE "01-Feb-2016 08:00:00 +0000")\r\n'
+    b'* 5 FETCH (FLAGS (\\Deleted))\r\n'
+)
+
+
+class FetchResultTableTest(unittest.TestCase):
+
+    def setUp(self):
+        self.imap_obj = FakeIMAP4({b'UID': FETCH_RESPONSE})
+        self.query = FetchQueryBuilder(uids='10:13').fetch_rfc822_size()\
+            .fetch_flags().fetch_internal_date()
+
+    def fetch(self) -> FetchResultTable:
+        return ImapFetchTableCommand(self.query).run(self.imap_obj)
+
+    def test_fetch_table(self):
+        table = self.fetch()
+        self.assertEqual(len(table), 5)
+        self.assertEqual(set(table.columns),
+                         {'seq', 'uid', 'size', 'flags', 'internaldate',
+                          'tz_offset'})
+        self.assertEqual(list(table.column('uid')), [10, 11, 12, 13, 0])
+        self.assertEqual(list(table.column('seq')), [1, 2, 3, 4, 5])
+        self.assertEqual(self.imap_obj.untagged_responses['EXISTS'], [b'3'])
+        self.assertEqual(len(table.flag_sets), 4)
+        self.assertEqual(table.nbytes, 5 * (4 * 4 + 8 + 2))
+
+        row = table.row(0)
+        self.assertEqual(row['flags'], frozenset(['\\Seen']))
+        self.assertEqual(row['internaldate'],
+                         datetime(2016, 1, 1, 4, 30, tzinfo=timezone.utc))
+        self.assertEqual(row['internaldate'].utcoffset(), timedelta(hours=-5))
+        self.assertNotIn('tz_offset', row)
+        self.assertEqual(len(list(table)), 5)
+
+        # appends to existing table
+        table = ImapFetchTableCommand(self.query, table).run(self.imap_obj)
+        self.assertEqual(len(table), 10)
+        self.assertEqual(len(table.flag_sets), 4)
+
+    def test_invalid_query(self):
+        with self.assertRaises(ImapInvalidArgument):
+            ImapFetchTableCommand(FetchQueryBuilder(1).fetch_envelope())
+        with self.assertRaises(ImapInvalidArgument):
+            ImapFetchTableCommand('1:*')
+        with self.assertRaises(ImapInvalidArgument):
+            ImapFetchTableCommand(self.query, FetchResultTable(('seq',)))
+        with self.assertRaises(ImapInvalidArgument):
+            self.fetch().column('envelope')
+        with self.assertRaises(ImapInvalidArgument):
+            self.fetch().group_by_date(period='week')
+
+    def test_queries(self):
+        table = self.fetch()
+        seen = table.with_flag('\\Seen')
+        self.assertEqual(list(seen.column('uid')), [10, 12, 13])
+        self.assertEqual(list(table.with_flag('\\Seen', False).column('uid')),
+                         [11, 0])
+        self.assertIs(seen.flag_sets, table.flag_sets)
+
+        self.assertEqual(list(table.where('size', lambda size: size > 100)),
+                         [1, 3])
+        self.assertEqual(
+            list(table.filter('size', lambda size: size > 100)
+                 .column('uid')),
+            [11, 13]
+        )
+        self.assertEqual(list(table.sort('size', reverse=True)
+                              .column('size')), [2000, 400, 100, 30, 0])
+        self.assertEqual(table.sum('size'), 2530)
+
+        # local date of the message
+        by_day = table.group_by_date(period='day')
+        self.assertEqual(list(by_day[date(2015, 12, 31)]), [0])
+        self.assertEqual(list(by_day[date(2016, 1, 2)]), [2])
+        self.assertEqual(table.sum('size', table.group_by_date(
+            period='year')), {2015: 100, 2016: 2430, 1970: 0})
+        self.assertEqual(
+            table.sum('size', table.group_by_date(period='month')),
+            {(2015, 12): 100, (2016, 1): 2030, (2016, 2): 400, (1970, 1): 0}
+        )
+        groups = table.group_by('flags', lambda value: len(
+            table.flag_sets[value]))
+        self.assertEqual({key: list(value) for key, value in groups.items()},
+                         {0: [1], 1: [0, 3, 4], 2: [2]})
+
+    @unittest.skipIf(numpy is None, 'numpy is not installed')
+    def test_to_numpy(self):
+        table = self.fetch()
+        columns = table.to_numpy()
+        self.assertEqual(columns['size'].sum(), 2530)
+        self.assertEqual(list(columns['uid']), list(table.column('uid')))
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""
+    :copyright: (c) 2017 WTFPL.
+    :license: WTFPL, see LICENSE for more details.
+"""
+import pickle
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+
+from pymaillib.imap.commands.fetch import ImapFetchCommand
+from pymaillib.imap.commands.folder import ImapFolderDetailsCommand
+from pymaillib.imap.constants import FLAG_SEEN, FLAG_DELETED
+from pymaillib.imap.flags import FlagRegistry, Flags, SYSTEM_FLAGS
+from pymaillib.imap.query.builders.fetch import FetchQueryBuilder
+from tests.base import FakeIMAP4
+
+FETCH_RESPONSE = (
+    b'* 1 FETCH (UID 10 FLAGS (\\Seen $Label1))\r\n'
+    b'* 2 FETCH (UID 11 FLAGS ())\r\n'
+    b'* 3 FETCH (UID 12 FLAGS (\\SEEN \\Deleted $label1))\r\n'
+)
+
+
+class FlagsTest(unittest.TestCase):
+
+    def test_registry(self):
+        registry = FlagRegistry([b'$Label1'])
+        self.assertEqual(len(registry), len(SYSTEM_FLAGS) + 1)
+        self.assertEqual(registry.bit(FLAG_SEEN), 1)
+        self.assertEqual(registry.bit('\\seen'), 1)
+        self.assertEqual(registry.bit(b'\\SEEN'), 1)
+        self.assertEqual(FlagRegistry().bit(FLAG_DELETED),
+                         registry.bit(FLAG_DELETED))
+        self.assertEqual(registry.bit('$label1'), 1 << len(SYSTEM_FLAGS))
+        self.assertEqual(registry.mask([b'$NEW', FLAG_SEEN]),
+                         1 | 1 << (len(SYSTEM_FLAGS) + 1))
+        self.assertEqual(list(registry.names(registry.mask([b'$new']))),
+                         ['$NEW'])
+
+        copy = pickle.loads(pickle.dumps(registry))
+        self.assertEqual(copy.mask(['$New', '$Label1']),
+                         registry.mask(['$New', '$Label1']))
+
+    def test_flags(self):
+        registry = FlagRegistry()
+        flags = registry.flags([b'\\Seen', b'$Label1'])
+        self.assertIsInstance(flags, Flags)
+        self.assertEqual(len(flags), 2)
+        self.assertIn('\\seen', flags)
+        self.assertNotIn(FLAG_DELETED, flags)
+        self.assertEqual(flags, {'\\Seen', '$Label1'})
+        self.assertEqual(flags, registry.flags(['$LABEL1', '\\Seen']))
+        self.assertEqual(hash(flags), hash(frozenset(flags)))
+        self.assertEqual(str(flags), '(\\Seen $Label1)')
+        self.assertFalse(registry.flags())
+
+        other = registry.flags([FLAG_SEEN, FLAG_DELETED])
+        self.assertEqual(flags.diff(other), {'$Label1', FLAG_DELETED})
+        self.assertEqual(int(flags.diff(other)), int(flags) ^ int(other))
+        self.assertEqual(flags & other, {FLAG_SEEN})
+        self.assertEqual(flags | other, {FLAG_SEEN, FLAG_DELETED, '$Label1'})
+        self.assertEqual(flags - [FLAG_SEEN], {'$Label1'})
+        self.assertIsInstance({'$Label1'} & flags, Flags)
+        self.assertTrue(registry.flags([FLAG_SEEN]) <= flags)
+
+        # membership, intersection and difference do not register unknown
+        # flags
+        size = len(registry)
+        self.assertNotIn('$Unknown', flags)
+        self.assertNotIn(b'$unknown', flags)
+        self.assertNotIn(None, flags)
+        self.assertEqual(flags & ['$Junk1', FLAG_SEEN], {FLAG_SEEN})
+        self.assertEqual(flags - ['$Junk2', FLAG_SEEN], {'$Label1'})
+        self.assertEqual(len(registry), size)
+        self.assertEqual(['$Junk3', FLAG_SEEN] - flags, {'$Junk3'})
+        self.assertEqual(flags | ['$Junk4'], {FLAG_SEEN, '$Label1', '$Junk4'})
+        self.assertEqual(len(registry), size + 2)
+
+        # other registry is compared by names
+        self.assertEqual(FlagRegistry().flags(['$Label1', FLAG_SEEN]), flags)
+        self.assertEqual(pickle.loads(pickle.dumps(flags)), flags)
+
+    def test_fetch_compact_flags(self):
+        imap_obj = FakeIMAP4({b'UID': FETCH_RESPONSE})
+        registry = FlagRegistry()
+        query = FetchQueryBuilder(uids='10:12').fetch_flags()
+        for lazy in (False, True):
+            first, second, third = ImapFetchCommand(
+                query, stream=lazy, lazy=lazy, flag_registry=registry
+            ).run(imap_obj)
+            self.assertIsInstance(first['FLAGS'], Flags)
+            self.assertIs(first['FLAGS'].registry, registry)
+            self.assertEqual(first['FLAGS'], {FLAG_SEEN, '$Label1'})
+            self.assertEqual(second['FLAGS'], set())
+            self.assertEqual(first['FLAGS'].diff(third['FLAGS']),
+                             {FLAG_DELETED})
+
+        # worker processes build flags with copies of the registry
+        registry = FlagRegistry()
+        with ProcessPoolExecutor(2) as executor:
+            items = list(ImapFetchCommand(
+                query, executor=executor, chunk_size=1, flag_registry=registry
+            ).run(FakeIMAP4({b'UID': FETCH_RESPONSE.replace(
+                b'\\SEEN \\Deleted $label1', b'$Other')})))
+        self.assertTrue(all(item['FLAGS'].registry is registry
+                            for item in items))
+        self.assertEqual(items[0]['FLAGS'].diff(items[2]['FLAGS']),
+                         {FLAG_SEEN, '$Label1', '$Other'})
+        self.assertEqual(int(items[2]['FLAGS']), registry.bit('$Other'))
+
+        # default is not changed
+        item = next(ImapFetchCommand(query).run(imap_obj))
+        self.assertEqual(item['FLAGS'], ['\\Seen', '$Label1'])
+
+    def test_folder_flags(self):
+        values = {'FLAGS': b'()', 'PERMANENTFLAGS': b'(\\Seen $Label1 \\*)'}
+        info = ImapFolderDetailsCommand.folder_info(b'0', values.get)
+        self.assertEqual(info['FLAGS'], [])
+        self.assertEqual(info['PERMANENTFLAGS'],
+                         [b'\\Seen', b'$Label1', b'\\*'])
+        registry = FlagRegistry()
+        registry.mask(info['FLAGS'])
+        self.assertEqual(len(registry), len(SYSTEM_FLAGS))
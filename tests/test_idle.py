@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""
+    :copyright: (c) 2017 WTFPL.
+    :license: WTFPL, see LICENSE for more details.
+"""
+import imaplib
+import socketserver
+import threading
+import time
+import unittest
+
+from pymaillib.imap.client import ImapClient
+from pymaillib.imap.entity.folder import ImapFolder, FolderChange
+from pymaillib.imap.exceptions import ImapInvalidArgument
+from pymaillib.imap.commands.idle import ImapIdleCommand
+from pymaillib.imap.query.builders.search import SearchQueryBuilder
+from pymaillib.user import UserCredentials
+
+RESPONSES = {
+    b'CAPABILITY': b'* CAPABILITY IMAP4rev1 IDLE\r\n',
+    b'SELECT': b'* FLAGS (\\Seen)\r\n* 3 EXISTS\r\n* 0 RECENT\r\n',
+    b'SEARCH': b'* SEARCH 1\r\n* 4 EXISTS\r\n',
+}
+
+
+class IdleHandler(socketserver.StreamRequestHandler):
+    """Scripted IMAP server which sends `updates` after IDLE
+    continuation"""
+
+    def handle(self):
+        server = self.server
+        self.wfile.write(b'* OK ready\r\n')
+        for line in self.rfile:
+            tag, command = line.split()[:2]
+            command = command.upper()
+            server.commands.append(command)
+            if command == b'IDLE':
+                self.wfile.write(b'+ idling\r\n')
+                for update in server.updates.pop(0) if server.updates else ():
+                    if update is None:
+                        # connection is lost
+                        return
+                    self.wfile.write(update)
+                server.commands.append(self.rfile.readline().strip())
+            self.wfile.write(RESPONSES.get(command, b'') + tag +
+                             b' OK done\r\n')
+
+
+class ImapIdleTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = socketserver.ThreadingTCPServer(('127.0.0.1', 0),
+                                                      IdleHandler)
+        self.server.daemon_threads = True
+        self.server.commands = []
+        self.server.updates = []
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        self.imap = ImapClient({
+            'host': '127.0.0.1',
+            'port': self.server.server_address[1],
+        }, UserCredentials('user', 'password'))
+        self.inbox = ImapFolder('INBOX', '/', {})
+        self.query = SearchQueryBuilder().deleted()
+
+    def tearDown(self):
+        self.imap.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def commands(self) -> list:
+        """Commands received after SELECT"""
+        commands = self.server.commands
+        return commands[commands.index(b'SELECT') + 1:]
+
+    def test_changes(self):
+        self.server.updates = [
+            [b'* 5 EXISTS\r\n', b'* 2 FETCH (FLAGS (\\Seen))\r\n'],
+            [b'* 1 EXPUNGE\r\n'],
+        ]
+        with self.imap:
+            changes = self.imap.idle(self.inbox, timeout=5)
+            self.assertEqual(next(changes), FolderChange('EXISTS', 5, None))
+            self.assertEqual(next(changes), FolderChange(
+                'FETCH', 2, {'SEQ': 2, 'FLAGS': ['\\Seen']}
+            ))
+            # IDLE is done before other command and started again
+            self.assertEqual(list(self.imap.search(self.query)), [1])
+            self.assertEqual(next(changes), FolderChange('EXISTS', 4, None))
+            self.assertEqual(next(changes), FolderChange('EXPUNGE', 1, None))
+            changes.close()
+        self.assertEqual(self.commands(), [b'IDLE', b'DONE', b'SEARCH',
+                                           b'IDLE', b'DONE'])
+
+    def test_timeout_and_renew(self):
+        start = time.monotonic()
+        with self.imap:
+            self.assertEqual(list(self.imap.idle(self.inbox, timeout=0.3,
+                                                 renew=0.1)), [])
+            self.assertGreaterEqual(time.monotonic() - start, 0.3)
+            list(self.imap.search(self.query))
+        commands = self.commands()
+        self.assertGreaterEqual(commands.count(b'IDLE'), 2)
+        self.assertEqual(commands.count(b'IDLE'), commands.count(b'DONE'))
+        self.assertEqual(commands[-1], b'SEARCH')
+
+        with self.assertRaises(ImapInvalidArgument):
+            ImapIdleCommand(renew=0)
+
+    def test_broken_connection(self):
+        self.server.updates = [[b'garbage\r\n', None]]
+        with self.imap:
+            with self.assertRaisesRegex(imaplib.IMAP4.abort,
+                                        'unexpected response'):
+                list(self.imap.idle(self.inbox, timeout=5))
+        self.assertNotIn(b'DONE', self.commands())
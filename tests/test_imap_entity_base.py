@@ -31,3 +31,53 @@ class BodyStructureTest(unittest.TestCase):
         with self.assertRaises(TypeError) as exp:
             SomeTestClass(1, 2, 3, 4, d=3)
         self.assertEqual('Too many values provided [4] {}', str(exp.exception))
+
+    def test_generated_methods(self):
+
+        class Point(SlotBasedImapEntity):
+
+            __slots__ = ('x', 'y', '_cache')
+
+        class Point3D(Point):
+
+            __slots__ = ('x', 'y', 'z')
+
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, **kwargs)
+                self.z = self.z or 0
+
+        class Point4D(Point3D):
+
+            __slots__ = ('w',)
+
+        class Unordered(SlotBasedImapEntity):
+
+            __slots__ = {'a', 'b'}
+
+        self.assertTrue(Point.__init__.generated)
+        self.assertTrue(Point.dump.generated)
+        self.assertDictEqual(Point(1, 2, 3).dump(), {'x': 1, 'y': 2})
+        self.assertDictEqual(Point(y=2, x=1, _cache=3).dump(),
+                             {'x': 1, 'y': 2})
+        self.assertDictEqual(Point(1, y=2, _cache=3).dump(),
+                             {'x': 1, 'y': 2})
+
+        with self.assertRaises(TypeError) as exp:
+            Point(1, 2)
+        self.assertEqual('Missing positional argument for _cache',
+                         exp.exception.args[0])
+        with self.assertRaises(TypeError) as exp:
+            Point(1, 2, 3, 4)
+        self.assertEqual('Too many values provided [4] {}',
+                         str(exp.exception))
+
+        # own __init__ is kept and uses generated one for own slots
+        self.assertDictEqual(Point3D(1, 2, None).dump(),
+                             {'x': 1, 'y': 2, 'z': 0})
+        self.assertIs(Point4D.__init__, Point3D.__init__)
+        with self.assertRaises(TypeError) as _:
+            Point4D(1, 2, 3)
+
+        self.assertDictEqual(Unordered(a=1, b=2).dump(), {'a': 1, 'b': 2})
+        with self.assertRaises(TypeError) as _:
+            Unordered()
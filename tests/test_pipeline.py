@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""
+    :copyright: (c) 2017 WTFPL.
+    :license: WTFPL, see LICENSE for more details.
+"""
+import io
+import re
+import unittest
+
+from pymaillib.imap.commands.pipeline import ImapPipelineCommand, \
+    PipelineStats
+from pymaillib.imap.entity.email_message import RawEmailMessage
+from pymaillib.imap.exceptions import ImapClientError, ImapInvalidArgument
+from pymaillib.imap.imap4 import ImapPipelineReader
+from pymaillib.imap.query.builders.fetch import FetchQueryBuilder
+from pymaillib.imap.query.builders.store import StoreQueryBuilder
+from tests.base import FakeIMAP4
+
+MESSAGE = b'Subject: test\r\n\r\nbody\r\n'
+
+
+class PipelineIMAP4(FakeIMAP4):
+    """Answers per UID and records how many commands were sent before the
+    client started reading responses"""
+
+    def __init__(self, missing=(), failing=()):
+        super().__init__()
+        self.missing = missing
+        self.failing = failing
+        self.batches = []
+        self.__reading = True
+
+    def send(self, data):
+        match = re.match(rb'(\w+) UID (FETCH|STORE) (\d+)', data)
+        if not match:
+            return super().send(data)
+        if self.__reading:
+            self.batches.append(0)
+            self.__reading = False
+        self.batches[-1] += 1
+        self.sent.append(data)
+        tag, command, uid = match.groups()
+        response = b''
+        if command == b'FETCH' and int(uid) not in self.missing:
+            response = b'* %s FETCH (UID %s RFC822 {%d}\r\n%s)\r\n' % (
+                uid, uid, len(MESSAGE), MESSAGE)
+        elif command == b'STORE':
+            response = b'* %s FETCH (UID %s FLAGS (\\Seen))\r\n' % (uid, uid)
+        status = b'NO failed' if int(uid) in self.failing else b'OK done'
+        self.file = io.BytesIO(self.file.read() + response + tag + b' ' +
+                               status + b'\r\n')
+
+    def readline(self):
+        self.__reading = True
+        return super().readline()
+
+
+class ImapPipelineTest(unittest.TestCase):
+
+    def test_reader(self):
+        imap_obj = PipelineIMAP4(missing=(2, ))
+        reader = ImapPipelineReader(imap_obj)
+        tags = [reader.send('UID', 'FETCH', uid, '(RFC822)')
+                for uid in ('1', '2', '3')]
+        self.assertEqual(reader.in_flight, 3)
+        results = []
+        while reader.in_flight:
+            tag, result, responses = reader.read()
+            results.append((tag, result[0], len(responses)))
+        self.assertEqual(results, [(tags[0], 'OK', 1), (tags[1], 'OK', 0),
+                                   (tags[2], 'OK', 1)])
+        self.assertEqual(imap_obj.batches, [3])
+
+    def test_pipeline(self):
+        imap_obj = PipelineIMAP4(missing=(4, ))
+        stats = PipelineStats()
+        queries = [FetchQueryBuilder(uids=uid).fetch_rfc822()
+                   for uid in range(1, 8)]
+        queries.append(StoreQueryBuilder(uids=8).add('\\Seen'))
+        results = list(ImapPipelineCommand(queries, depth=3, raw=True,
+                                           stats=stats).run(imap_obj))
+
+        self.assertEqual([query for query, _ in results], queries)
+        for uid, (_, items) in enumerate(results[:-1], 1):
+            if uid == 4:
+                self.assertEqual(items, [])
+                continue
+            item, = items
+            self.assertEqual(item.uid, uid)
+            self.assertIsInstance(item.rfc822, RawEmailMessage)
+            self.assertEqual(item.rfc822.as_bytes(), MESSAGE)
+        self.assertEqual(results[-1][1], [{'SEQ': 8, 'UID': 8,
+                                              'FLAGS': ['\\Seen']}])
+
+        # next command is sent as soon as one is completed
+        self.assertEqual(imap_obj.batches, [3, 1, 1, 1, 1, 1])
+        self.assertEqual((stats.commands, stats.round_trips,
+                          stats.max_in_flight), (8, 1, 3))
+        self.assertEqual(stats.saved_round_trips, 7)
+
+    def test_failed_command(self):
+        imap_obj = PipelineIMAP4(failing=(2, ))
+        queries = [FetchQueryBuilder(uids=uid).fetch_rfc822()
+                   for uid in range(1, 6)]
+        results = ImapPipelineCommand(queries, depth=4).run(imap_obj)
+        query, _ = next(results)
+        self.assertIs(query, queries[0])
+        with self.assertRaises(ImapClientError):
+            next(results)
+        # responses of commands in flight were dropped, connection is usable
+        self.assertEqual(imap_obj.batches, [4, 1])
+        self.assertEqual(imap_obj.file.read(), b'')
+        with self.assertRaises(ImapInvalidArgument):
+            ImapPipelineCommand(queries, depth=0)
+        with self.assertRaises(ImapInvalidArgument):
+            list(ImapPipelineCommand(['UID FETCH 1 (FLAGS)']).run(imap_obj))
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""
+    :copyright: (c) 2017 WTFPL.
+    :license: WTFPL, see LICENSE for more details.
+"""
+import threading
+import unittest
+
+from pymaillib.imap.commands.wrapper import ImapLibWrapper
+from pymaillib.imap.entity.folder import ImapFolder
+from pymaillib.imap.exceptions import ImapClientAbort, ImapPoolTimeout, \
+    ImapInvalidArgument, ImapRuntimeError
+from pymaillib.imap.pool import ImapClientPool
+
+
+class PoolClient(object):
+    """Connection which records executed commands instead of sending them"""
+
+    def __init__(self):
+        self.opened = True
+        self.selected_folder = None
+        self.commands = []
+        self.broken = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+    def select_folder(self, folder: ImapFolder):
+        self.commands.append('SELECT')
+        self.selected_folder = folder.imap_name()
+
+    def imaplib(self, func, *args, **kwargs):
+        self.commands.append(func.upper())
+        if self.broken:
+            raise ImapClientAbort('socket error: EOF')
+
+    def close(self):
+        self.opened = False
+
+
+class ImapClientPoolTest(unittest.TestCase):
+
+    def setUp(self):
+        self.clients = []
+        self.inbox = ImapFolder('INBOX', '/', {})
+        self.sent = ImapFolder('Sent', '/', {})
+
+    def factory(self) -> PoolClient:
+        client = PoolClient()
+        self.clients.append(client)
+        return client
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ImapInvalidArgument):
+            ImapClientPool(self.factory, max_size=0)
+        with self.assertRaises(ImapInvalidArgument):
+            ImapClientPool(self.factory, min_size=3, max_size=2)
+
+    def test_checkout(self):
+        pool = ImapClientPool(self.factory, min_size=1, max_size=2)
+        self.assertEqual((pool.size, pool.idle), (1, 1))
+        with pool.connection(self.inbox) as first:
+            self.assertIs(first, self.clients[0])
+            with pool.connection(self.sent) as second:
+                self.assertEqual(pool.size, 2)
+                with self.assertRaises(ImapPoolTimeout):
+                    pool.acquire(timeout=0.01)
+        self.assertEqual(pool.idle, 2)
+
+        # connection with selected folder is preferred
+        for folder, client in ((self.inbox, first), (self.sent, second),
+                               (self.inbox, first)):
+            with pool.connection(folder) as conn:
+                self.assertIs(conn, client)
+        self.assertEqual(first.commands, ['SELECT'])
+        self.assertEqual(second.commands, ['SELECT'])
+
+        pool.close()
+        self.assertEqual(pool.size, 0)
+        self.assertFalse(first.opened)
+        with self.assertRaises(ImapRuntimeError):
+            pool.acquire()
+
+    def test_waits_for_release(self):
+        pool = ImapClientPool(self.factory, max_size=1)
+        client = pool.acquire()
+        result = []
+        thread = threading.Thread(target=lambda: result.append(
+            pool.acquire(timeout=5)))
+        thread.start()
+        pool.release(client)
+        thread.join()
+        self.assertEqual(result, [client])
+        self.assertEqual(len(self.clients), 1)
+
+    def test_validation_and_eviction(self):
+        pool = ImapClientPool(self.factory, max_size=2, check_interval=0)
+        with pool.connection():
+            pass
+        client = self.clients[0]
+        # checked with NOOP after idling
+        with pool.connection() as conn:
+            self.assertIs(conn, client)
+        self.assertEqual(client.commands, ['NOOP'])
+
+        client.broken = True
+        with pool.connection() as conn:
+            self.assertIsNot(conn, client)
+        self.assertFalse(client.opened)
+        self.assertEqual(pool.size, 1)
+
+        # aborted connection is not returned to the pool
+        with self.assertRaises(ImapClientAbort):
+            with pool.connection():
+                raise ImapClientAbort('socket error: EOF')
+        self.assertEqual((pool.size, pool.idle), (0, 0))
+
+        pool = ImapClientPool(self.factory, min_size=1, max_size=2,
+                              idle_ttl=0)
+        first, second = pool.acquire(), pool.acquire()
+        pool.release(first)
+        pool.release(second)
+        self.assertEqual(pool.evict(), 1)
+        self.assertEqual((pool.size, pool.idle), (1, 1))
+        self.assertFalse(first.opened)
+        self.assertTrue(second.opened)
+
+    def test_noop_is_base_command(self):
+        # connections are validated with client.imaplib('noop')
+        self.assertEqual(ImapLibWrapper('noop').name, 'NOOP')
+        self.assertEqual(ImapLibWrapper('response', 'OK').name, 'IMAP4')
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""
+    :copyright: (c) 2017 WTFPL.
+    :license: WTFPL, see LICENSE for more details.
+"""
+import pickle
+import unittest
+
+from pymaillib.imap.commands.fetch import ImapFetchCommand
+from pymaillib.imap.commands.message import AppendMessageCommand
+from pymaillib.imap.entity.email_message import RawEmailMessage, \
+    RawImapFetchedItem, EmailMessage
+from pymaillib.imap.entity.folder import ImapFolder
+from pymaillib.imap.query.builders.fetch import FetchQueryBuilder
+from tests.base import FakeIMAP4
+
+# parsing and serialization would change folding and header case
+MESSAGE = (b'subject:   =?utf-8?q?caf=C3=A9?=\r\n'
+           b'X-Long: aaa\r\n\tbbb\r\n'
+           b'Content-Type: text/plain\r\n\r\n'
+           b'body\r\n')
+
+
+class AppendIMAP4(FakeIMAP4):
+    """Accepts APPEND literal"""
+
+    def __init__(self):
+        super().__init__({b'APPEND': b'+ go ahead\r\n'})
+        self.status[b'APPEND'] = b'OK [APPENDUID 1 55] done'
+        self.literals = []
+
+    def send(self, data):
+        if self.sent and self.sent[-1].endswith(b'}\r\n'):
+            self.literals.append(data)
+            self.sent.append(data)
+            return
+        if data == b'\r\n':
+            return
+        super().send(data)
+
+
+class RawEmailMessageTest(unittest.TestCase):
+
+    def setUp(self):
+        self.imap_obj = FakeIMAP4({b'FETCH': (
+            b'* 1 FETCH (UID 10 RFC822 {%d}\r\n%s BODY[] {%d}\r\n%s)\r\n'
+            % (len(MESSAGE), MESSAGE, len(MESSAGE), MESSAGE)
+        )})
+
+    def test_raw_fetch(self):
+        for kwargs in ({}, {'lazy': True}, {'zero_copy': True}):
+            item, = ImapFetchCommand(FetchQueryBuilder(1), raw=True,
+                                     **kwargs).run(self.imap_obj)
+            self.assertIsInstance(item, RawImapFetchedItem)
+            for message in (item['RFC822'], item.get_fetched_part(0)):
+                self.assertIsInstance(message, RawEmailMessage)
+                self.assertEqual(message.as_bytes(), MESSAGE)
+                self.assertEqual(len(message), len(MESSAGE))
+                self.assertEqual(message['Subject'], 'café')
+                self.assertEqual(message.header_bytes(), MESSAGE[:-6])
+            self.assertIsInstance(item.email_message, EmailMessage)
+            self.assertEqual(item.email_message.get_content(), 'body\r\n')
+
+            copy = pickle.loads(pickle.dumps(item))
+            self.assertEqual(copy['RFC822'].as_bytes(), MESSAGE)
+
+        # default is not changed
+        item, = ImapFetchCommand(FetchQueryBuilder(1)).run(self.imap_obj)
+        self.assertIsInstance(item['RFC822'], EmailMessage)
+
+    def test_append_raw(self):
+        folder = ImapFolder('INBOX', '/', {})
+        for message in (RawEmailMessage(MESSAGE), memoryview(MESSAGE)):
+            imap_obj = AppendIMAP4()
+            result = AppendMessageCommand(message, folder).run(imap_obj)
+            self.assertIsInstance(result, RawEmailMessage)
+            self.assertEqual(result.uid, 55)
+            self.assertEqual(imap_obj.literals, [MESSAGE])
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""
+    :copyright: (c) 2017 WTFPL.
+    :license: WTFPL, see LICENSE for more details.
+"""
+import base64
+import binascii
+import io
+import quopri
+import re
+import unittest
+
+from pymaillib.imap.commands.fetch import ImapFetchPartCommand
+from pymaillib.imap.entity.email_message import decode_part
+from pymaillib.imap.transfer_encoding import decode_stream, \
+    transfer_decoder, Base64Decoder
+from tests.base import FakeIMAP4
+
+PAYLOAD = bytes(range(256)) * 40
+
+
+def uuencode(data: bytes) -> bytes:
+    lines = [binascii.b2a_uu(data[pos:pos + 45])
+             for pos in range(0, len(data), 45)]
+    return b'begin 666 file.bin\n' + b''.join(lines) + b' \nend\n'
+
+
+ENCODED = {
+    'base64': [
+        base64.encodebytes(PAYLOAD),
+        base64.encodebytes(PAYLOAD).replace(b'\n', b'\r\n'),
+        base64.b64encode(PAYLOAD)[:-2],
+        # encoded line by line with padding and invalid characters
+        b''.join(base64.b64encode(PAYLOAD[pos:pos + 56]) + b'\r\n'
+                 for pos in range(0, len(PAYLOAD), 56)) + b'!!QQ==',
+    ],
+    'quoted-printable': [
+        quopri.encodestring(PAYLOAD),
+        b'abc=\r\ndef=3D\r\n=C3=A9 end=',
+    ],
+    'x-uuencode': [
+        uuencode(PAYLOAD),
+        uuencode(PAYLOAD).replace(b'\n', b'\r\n'),
+        b'not uuencoded\r\n',
+    ],
+}
+
+
+class PartialFetchIMAP4(FakeIMAP4):
+    """Returns requested range of the message part"""
+
+    def __init__(self, part: bytes):
+        self.part = part
+        self.requests = []
+        super().__init__()
+
+    def send(self, data):
+        match = re.search(rb'UID FETCH (\d+) .*BODY\.PEEK\[([\d.]+)\]'
+                          rb'<(\d+)\.(\d+)>', data)
+        if match:
+            uid, mime_id, start, size = match.groups()
+            start, size = int(start), int(size)
+            self.requests.append((start, size))
+            chunk = self.part[start:start + size]
+            self.responses[b'UID'] = b'* 1 FETCH (UID %s BODY[%s]<%d> {%d}' \
+                                     b'\r\n%s)\r\n' % (uid, mime_id, start,
+                                                       len(chunk), chunk)
+        super().send(data)
+
+
+class TransferEncodingTest(unittest.TestCase):
+
+    def test_chunked_decoding(self):
+        class Part(object):
+            encoding = None
+
+        part = Part()
+        for encoding, items in ENCODED.items():
+            part.encoding = encoding
+            for data in items:
+                expected = decode_part(part, data)
+                for size in (1, 3, 4, 57, 1000, len(data)):
+                    out_file = io.BytesIO()
+                    chunks = [data[pos:pos + size]
+                              for pos in range(0, len(data), size)]
+                    written = decode_stream(encoding, chunks, out_file)
+                    self.assertEqual(out_file.getvalue(), expected,
+                                     (encoding, size, data[:20]))
+                    self.assertEqual(written, len(expected))
+
+        part.encoding = 'base64'
+        self.assertEqual(decode_part(part, memoryview(ENCODED['base64'][0])),
+                         PAYLOAD)
+        part.encoding = 'x-uuencode'
+        for data in ENCODED['x-uuencode'][:2]:
+            self.assertEqual(decode_part(part, memoryview(data)), PAYLOAD)
+        self.assertEqual(decode_part(part, ENCODED['x-uuencode'][2]),
+                         ENCODED['x-uuencode'][2])
+
+    def test_transfer_decoder(self):
+        out_file = io.BytesIO()
+        with transfer_decoder('BASE64', out_file) as decoder:
+            self.assertIsInstance(decoder, Base64Decoder)
+            decoder.write(b'QUJ')
+            self.assertEqual(out_file.getvalue(), b'')
+            decoder.write(memoryview(b'DRA'))
+            self.assertEqual(out_file.getvalue(), b'ABC')
+        self.assertEqual(out_file.getvalue(), b'ABCD')
+
+        out_file = io.BytesIO()
+        self.assertEqual(decode_stream('7bit', [b'a', b'b'], out_file), 2)
+        self.assertEqual(out_file.getvalue(), b'ab')
+
+    def test_fetch_part(self):
+        encoded = ENCODED['base64'][1]
+        imap_obj = PartialFetchIMAP4(encoded)
+        out_file = io.BytesIO()
+        written = ImapFetchPartCommand(10, '1.2', out_file, 'base64',
+                                       chunk_size=1000).run(imap_obj)
+        self.assertEqual(out_file.getvalue(), PAYLOAD)
+        self.assertEqual(written, len(PAYLOAD))
+        self.assertEqual(imap_obj.requests,
+                         [(pos, 1000) for pos in range(0, len(encoded),
+                                                       1000)])
+
+        # part size is multiple of chunk size
+        imap_obj = PartialFetchIMAP4(encoded[:3000])
+        out_file = io.BytesIO()
+        ImapFetchPartCommand(10, 2, out_file, chunk_size=1000).run(imap_obj)
+        self.assertEqual(out_file.getvalue(), encoded[:3000])
+        self.assertEqual(len(imap_obj.requests), 4)